@@ -1,16 +1,77 @@
 # Database/db_manager.py
+import asyncio
+import contextvars
+import logging
+import math
+import os
+import re
 import threading
 import time
 import urllib
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker
 
+from services.metrics import metrics
+from services.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class DatabaseBusyError(Exception):
+    """Hàng đợi SQL của region đã đầy — không nhận thêm query."""
+
+
+class DatabaseTimeoutError(Exception):
+    """Query vượt quá timeout (hoặc bị hủy vì request hết hạn)."""
+
+
+class _Call:
+    """Một lời gọi SQL chạy trong worker thread; cho phép hủy câu lệnh đang chạy."""
+
+    __slots__ = ("conn", "cancelled")
+
+    def __init__(self):
+        self.conn = None
+        self.cancelled = False
+
+    def cancel(self):
+        """Hủy statement đang chạy (pyodbc Cursor.cancel → SQLCancel) nếu driver hỗ trợ."""
+        self.cancelled = True
+        conn = self.conn
+        cursor = conn.info.get("active_cursor") if conn is not None else None
+        if cursor is not None and hasattr(cursor, "cancel"):
+            try:
+                cursor.cancel()
+            except Exception as e:
+                logger.debug(f"[DBManager] Cursor cancel failed: {e}")
+
+
+class _FanOutFailure:
+    """Region thất bại trong fan_out (phân biệt với kết quả hợp lệ của fn)."""
+
+    __slots__ = ("kind", "message")
+
+    def __init__(self, kind: str, message: str):
+        self.kind = kind
+        self.message = message
+
 
 class MultiDBManager:
     """
     Quản lý nhiều SQL Server region — tái sử dụng connection pool.
     Cho phép mỗi region có username/password riêng.
+
+    Thread-safe: engine được tạo / dispose dưới một lock, và engine còn
+    connection đang mượn (connect() hoặc pool checkout) không bị dọn idle.
+    Dùng get_db_manager() để cả process chung một bộ pool.
     """
 
     DB_MAP = {
@@ -46,18 +107,52 @@ class MultiDBManager:
     }
 
     def __init__(
-        self, default_driver="ODBC Driver 18 for SQL Server", idle_timeout=30 * 60
+        self,
+        default_driver="ODBC Driver 18 for SQL Server",
+        idle_timeout=30 * 60,
+        workers_per_region: int = None,
+        max_queue_per_region: int = None,
+        query_timeout: float = None,
+        connect_timeout: int = None,
+        pool_size: int = None,
+        max_overflow: int = None,
+        pool_timeout: float = None,
     ):
         """
         Args:
             default_driver (str): tên ODBC driver mặc định.
             idle_timeout (int): thời gian idle (giây) trước khi đóng connection pool.
+            workers_per_region (int): số thread chạy SQL đồng thời mỗi region (DB_REGION_WORKERS).
+            max_queue_per_region (int): số query đang chạy + đang chờ tối đa mỗi region (DB_REGION_MAX_QUEUE).
+            query_timeout (float): timeout mặc định (giây) cho một query async (DB_QUERY_TIMEOUT).
+            connect_timeout (int): login timeout (giây) của pyodbc (DB_CONNECT_TIMEOUT).
+            pool_size (int): connection giữ sẵn mỗi region (DB_POOL_SIZE, default = workers_per_region).
+                Override theo region: DB_POOL_SIZE_<region_id> hoặc "pool_size" trong DB_MAP.
+            max_overflow (int): connection vượt pool_size tối đa (DB_MAX_OVERFLOW,
+                override DB_MAX_OVERFLOW_<region_id> / "max_overflow").
+            pool_timeout (float): thời gian chờ tối đa (giây) để mượn connection (DB_POOL_TIMEOUT).
         """
         self.default_driver = default_driver
         self.idle_timeout = idle_timeout
+        self.workers_per_region = workers_per_region or int(os.getenv("DB_REGION_WORKERS", "8"))
+        self.max_queue_per_region = max_queue_per_region or int(os.getenv("DB_REGION_MAX_QUEUE", "64"))
+        self.query_timeout = query_timeout or float(os.getenv("DB_QUERY_TIMEOUT", "15"))
+        self.connect_timeout = connect_timeout or int(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+        self.pool_size = pool_size or int(os.getenv("DB_POOL_SIZE", str(self.workers_per_region)))
+        self.max_overflow = (
+            max_overflow if max_overflow is not None else int(os.getenv("DB_MAX_OVERFLOW", "4"))
+        )
+        self.pool_timeout = pool_timeout or float(os.getenv("DB_POOL_TIMEOUT", "10"))
+        self.warmup_connections = int(os.getenv("DB_POOL_WARMUP", "0"))
         self.engines = {}
         self.sessions = {}
         self.last_used = {}
+        self.leases: Dict[int, int] = {}
+        self.executors: Dict[int, ThreadPoolExecutor] = {}
+        self.pending: Dict[int, int] = {}
+        # engines / sessions / last_used / leases
+        self._engine_lock = threading.RLock()
+        self._executor_lock = threading.Lock()
         self.__start_cleanup_thread()
 
     # ----------------------------------------------------------------------
@@ -82,63 +177,455 @@ class MultiDBManager:
 
     # ----------------------------------------------------------------------
 
+    def pool_config(self, region_id: int) -> Dict[str, int]:
+        """pool_size / max_overflow của region (env theo region > DB_MAP > mặc định)."""
+        cfg = self.DB_MAP.get(region_id) or {}
+        return {
+            "pool_size": int(os.getenv(f"DB_POOL_SIZE_{region_id}", cfg.get("pool_size", self.pool_size))),
+            "max_overflow": int(
+                os.getenv(f"DB_MAX_OVERFLOW_{region_id}", cfg.get("max_overflow", self.max_overflow))
+            ),
+        }
+
     def get_engine(self, region_id: int):
         """Trả về SQLAlchemy engine tương ứng với region, tạo nếu chưa có"""
         cfg = self.DB_MAP.get(region_id)
         if not cfg:
             raise ValueError(f"Invalid region_id: {region_id}")
 
-        if region_id not in self.engines:
-            params = self.build_connection_string(cfg)
-            engine = create_engine(
-                f"mssql+pyodbc:///?odbc_connect={params}",
-                pool_size=100,
-                max_overflow=20,
-                pool_pre_ping=True,
-                pool_recycle=1800,
-            )
-            self.engines[region_id] = engine
-            self.sessions[region_id] = sessionmaker(bind=engine)
-            print(
-                f"[DBManager] ✅ Created engine for region {region_id}: {cfg['server']}"
-            )
+        with self._engine_lock:
+            engine = self.engines.get(region_id)
+            if engine is None:
+                engine = self.__create_engine(region_id, cfg)
+                self.engines[region_id] = engine
+                self.sessions[region_id] = sessionmaker(bind=engine)
+            self.last_used[region_id] = time.time()
+            return engine
 
-        self.last_used[region_id] = time.time()
-        return self.engines[region_id]
+    def __create_engine(self, region_id: int, cfg: dict):
+        pool = self.pool_config(region_id)
+        params = self.build_connection_string(cfg)
+        engine = create_engine(
+            f"mssql+pyodbc:///?odbc_connect={params}",
+            pool_size=pool["pool_size"],
+            max_overflow=pool["max_overflow"],
+            pool_timeout=self.pool_timeout,
+            pool_pre_ping=True,
+            pool_recycle=1800,
+            connect_args={"timeout": self.connect_timeout},
+        )
+        self.__instrument(engine, region_id)
+        self.__instrument_pool(engine, region_id)
+        print(
+            f"[DBManager] ✅ Created engine for region {region_id}: {cfg['server']} "
+            f"(pool {pool['pool_size']}+{pool['max_overflow']})"
+        )
+        return engine
 
     # ----------------------------------------------------------------------
 
     def get_session(self, region_id: int):
         """Tạo session tương ứng với vùng"""
-        if region_id not in self.sessions:
+        with self._engine_lock:
             self.get_engine(region_id)
-        self.last_used[region_id] = time.time()
-        return self.sessions[region_id]()
+            return self.sessions[region_id]()
+
+    @contextmanager
+    def connect(self, region_id: int):
+        """
+        Mượn một connection của region (with ... as conn).
+
+        Engine không bị dọn idle khi còn connection đang mượn; thời gian chờ
+        pool được ghi vào db.pool.checkout_wait_ms.
+        """
+        with self._engine_lock:
+            engine = self.get_engine(region_id)
+            self.leases[region_id] = self.leases.get(region_id, 0) + 1
+        try:
+            start = time.perf_counter()
+            try:
+                conn = engine.connect()
+            except PoolTimeoutError:
+                metrics.inc("db.pool.timeouts", region=region_id)
+                raise
+            finally:
+                metrics.observe(
+                    "db.pool.checkout_wait_ms", (time.perf_counter() - start) * 1000, region=region_id
+                )
+            with conn:
+                yield conn
+        finally:
+            with self._engine_lock:
+                self.leases[region_id] -= 1
+                self.last_used[region_id] = time.time()
+
+    def warm_up(self, region_ids: Iterable[int] = None, connections: int = None) -> Dict[int, int]:
+        """
+        Mở sẵn connection cho các region (default tất cả) rồi trả về pool.
+
+        Args:
+            connections: số connection mỗi region (default DB_POOL_WARMUP, tối đa pool_size)
+
+        Returns:
+            {region_id: số connection mở được}
+        """
+        connections = connections if connections is not None else self.warmup_connections
+        region_ids = list(region_ids if region_ids is not None else self.DB_MAP)
+        opened: Dict[int, int] = {}
+
+        def open_region(region_id: int) -> int:
+            count = min(connections, self.pool_config(region_id)["pool_size"])
+            engine = self.get_engine(region_id)
+            conns = []
+            try:
+                # Giữ tất cả cùng lúc → mỗi lần connect là một connection mới thật
+                for _ in range(count):
+                    conns.append(engine.connect())
+            except Exception as e:
+                logger.warning(f"[DBManager] Warm-up region {region_id} stopped at {len(conns)}: {e}")
+            finally:
+                for conn in conns:
+                    conn.close()
+            return len(conns)
+
+        if connections <= 0 or not region_ids:
+            return opened
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(region_ids), thread_name_prefix="db-warmup") as pool:
+            for region_id, count in zip(region_ids, pool.map(open_region, region_ids)):
+                opened[region_id] = count
+        logger.info(f"[DBManager] Warm-up {opened} in {(time.perf_counter() - start) * 1000:.0f}ms")
+        return opened
+
+    def pool_stats(self) -> Dict[int, Dict[str, int]]:
+        """Trạng thái pool của các engine đang mở (để chỉnh DB_POOL_SIZE theo số liệu)."""
+        with self._engine_lock:
+            engines = dict(self.engines)
+            leases = dict(self.leases)
+        stats = {}
+        for region_id, engine in engines.items():
+            pool = engine.pool
+            stats[region_id] = {
+                **self.pool_config(region_id),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(0, pool.overflow()),
+                "leases": leases.get(region_id, 0),
+                "pending": self.pending.get(region_id, 0),
+            }
+        return stats
+
+    # ----------------------------------------------------------------------
+    # Cross-region fan-out: mọi region chạy đồng thời, wall time ≈ region chậm nhất
+    # ----------------------------------------------------------------------
+
+    async def fan_out(
+        self,
+        fn: Callable[[int], Awaitable[Any]],
+        region_ids: Iterable[int] = None,
+        timeout: float = None,
+    ) -> Dict[int, Any]:
+        """
+        Chạy fn(region_id) đồng thời cho các region (default tất cả).
+
+        Args:
+            fn: Coroutine function nhận region_id
+            timeout: Giây cho mỗi region (default DB_QUERY_TIMEOUT)
+
+        Returns:
+            {region_id: kết quả} của các region thành công; region lỗi hoặc
+            quá timeout chỉ được log (db.fanout.regions{outcome})
+        """
+        region_ids = list(region_ids if region_ids is not None else self.DB_MAP)
+        timeout = timeout or self.query_timeout
+        start = time.perf_counter()
+
+        async def one(region_id: int):
+            try:
+                return await asyncio.wait_for(fn(region_id), timeout=timeout)
+            except asyncio.TimeoutError:
+                return _FanOutFailure("timeout", f"exceeded {timeout:.1f}s")
+            except Exception as e:
+                return _FanOutFailure("error", str(e))
+
+        with tracer.span("db.fanout", regions=len(region_ids)) as span:
+            outcomes = await asyncio.gather(*(one(r) for r in region_ids))
+            results = self.__collect(region_ids, outcomes, start)
+            span.set_attributes(ok=len(results))
+        return results
+
+    def fan_out_blocking(
+        self,
+        fn: Callable[[int], Any],
+        region_ids: Iterable[int] = None,
+        timeout: float = None,
+    ) -> Dict[int, Any]:
+        """
+        Bản đồng bộ cho jobs / preload: fn(region_id) blocking, mỗi region một thread.
+
+        Args:
+            timeout: Giây cho mỗi region (default: chờ tới khi xong); thread quá
+                hạn không bị dừng, chỉ bị bỏ qua kết quả
+
+        Returns:
+            {region_id: kết quả} của các region thành công
+        """
+        region_ids = list(region_ids if region_ids is not None else self.DB_MAP)
+        if not region_ids:
+            return {}
+        start = time.perf_counter()
+        # copy_context: span của fn vẫn nằm dưới span hiện tại
+        pool = ThreadPoolExecutor(max_workers=len(region_ids), thread_name_prefix="db-fanout")
+        try:
+            futures = [pool.submit(contextvars.copy_context().run, fn, r) for r in region_ids]
+            wait_futures(futures, timeout=timeout)
+            outcomes = []
+            for future in futures:
+                if not future.done():
+                    outcomes.append(_FanOutFailure("timeout", f"exceeded {timeout:.1f}s"))
+                elif future.exception() is not None:
+                    outcomes.append(_FanOutFailure("error", str(future.exception())))
+                else:
+                    outcomes.append(future.result())
+        finally:
+            pool.shutdown(wait=False)
+        return self.__collect(region_ids, outcomes, start)
+
+    def __collect(self, region_ids, outcomes, start: float) -> Dict[int, Any]:
+        results = {}
+        for region_id, outcome in zip(region_ids, outcomes):
+            if isinstance(outcome, _FanOutFailure):
+                metrics.inc("db.fanout.regions", outcome=outcome.kind)
+                logger.warning(f"[DBManager] Fan-out region {region_id} {outcome.kind}: {outcome.message}")
+            else:
+                metrics.inc("db.fanout.regions", outcome="ok")
+                results[region_id] = outcome
+        metrics.observe("db.fanout.ms", (time.perf_counter() - start) * 1000)
+        return results
+
+    def close(self):
+        """Dispose mọi engine và dừng thread pool SQL (shutdown)."""
+        with self._engine_lock:
+            engines = list(self.engines.values())
+            self.engines.clear()
+            self.sessions.clear()
+            self.last_used.clear()
+        for engine in engines:
+            engine.dispose()
+        with self._executor_lock:
+            executors = list(self.executors.values())
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    # ----------------------------------------------------------------------
+    # Async API: SQL chạy trong thread pool riêng của từng region,
+    # không bao giờ block event loop.
+    # ----------------------------------------------------------------------
+
+    async def fetchall(self, region_id: int, statement, params: dict = None, timeout: float = None):
+        """SELECT → list of rows (async, off the event loop)."""
+        return await self.run(
+            region_id, lambda conn: conn.execute(statement, params or {}).fetchall(), timeout
+        )
+
+    async def fetchone(self, region_id: int, statement, params: dict = None, timeout: float = None):
+        """SELECT → first row or None (async, off the event loop)."""
+        return await self.run(
+            region_id, lambda conn: conn.execute(statement, params or {}).fetchone(), timeout
+        )
+
+    async def run(self, region_id: int, fn: Callable[[Any], Any], timeout: float = None):
+        """
+        Chạy fn(connection) trong thread pool của region.
+
+        Args:
+            region_id: Region (chọn engine + thread pool)
+            fn: Hàm blocking nhận SQLAlchemy Connection
+            timeout: Giây (default DB_QUERY_TIMEOUT); tính cả thời gian chờ trong hàng đợi
+
+        Raises:
+            DatabaseBusyError: Hàng đợi của region đã đầy
+            DatabaseTimeoutError: Hết timeout — query chưa chạy bị bỏ, đang chạy bị cancel
+        """
+        timeout = timeout or self.query_timeout
+        executor = self.__get_executor(region_id)
+        with self._executor_lock:
+            if self.pending[region_id] >= self.max_queue_per_region:
+                metrics.inc("db.rejected", region=region_id)
+                raise DatabaseBusyError(f"SQL queue full for region {region_id}")
+            self.pending[region_id] += 1
+            metrics.set_gauge("db.pending", self.pending[region_id], region=region_id)
+
+        call = _Call()
+        submitted = time.perf_counter()
+        expires_at = time.monotonic() + timeout
+        # copy_context: span "db.query" vẫn nằm dưới span hiện tại (tool.execute)
+        ctx = contextvars.copy_context()
+        future = executor.submit(
+            ctx.run, self.__call_in_thread, region_id, fn, call, submitted, expires_at
+        )
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            metrics.inc("db.timeouts", region=region_id)
+            call.cancel()
+            raise DatabaseTimeoutError(
+                f"SQL on region {region_id} exceeded {timeout:.1f}s"
+            ) from None
+        except asyncio.CancelledError:
+            metrics.inc("db.cancelled", region=region_id)
+            call.cancel()
+            raise
+        finally:
+            future.cancel()  # chưa bắt đầu → bỏ khỏi hàng đợi
+            if future.cancelled():
+                self.__done(region_id)
+
+    def __call_in_thread(self, region_id, fn, call: _Call, submitted: float, expires_at: float):
+        try:
+            started = time.perf_counter()
+            metrics.observe("db.queue_wait_ms", (started - submitted) * 1000, region=region_id)
+            remaining = expires_at - time.monotonic()
+            if call.cancelled or remaining <= 0:
+                raise DatabaseTimeoutError(f"SQL on region {region_id} expired in queue")
+
+            with self.connect(region_id) as conn:
+                call.conn = conn
+                # Timeout phía driver: server tự dừng statement khi hết giờ
+                driver_conn = conn.connection.dbapi_connection
+                if hasattr(driver_conn, "timeout"):
+                    driver_conn.timeout = max(1, math.ceil(remaining))
+                try:
+                    return fn(conn)
+                finally:
+                    if hasattr(driver_conn, "timeout"):
+                        driver_conn.timeout = 0
+                    call.conn = None
+                    metrics.observe(
+                        "db.exec_ms", (time.perf_counter() - started) * 1000, region=region_id
+                    )
+        finally:
+            self.__done(region_id)
+
+    def __done(self, region_id: int):
+        with self._executor_lock:
+            self.pending[region_id] -= 1
+            metrics.set_gauge("db.pending", self.pending[region_id], region=region_id)
+
+    def __get_executor(self, region_id: int) -> ThreadPoolExecutor:
+        if region_id not in self.DB_MAP:
+            raise ValueError(f"Invalid region_id: {region_id}")
+        with self._executor_lock:
+            if region_id not in self.executors:
+                self.executors[region_id] = ThreadPoolExecutor(
+                    max_workers=self.workers_per_region,
+                    thread_name_prefix=f"db-region-{region_id}",
+                )
+                self.pending[region_id] = 0
+            return self.executors[region_id]
+
+    # ----------------------------------------------------------------------
+
+    def __instrument(self, engine, region_id: int):
+        """Mỗi câu SQL là một span "db.query" (region, statement, rowcount)"""
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            conn.info["active_cursor"] = cursor  # cho _Call.cancel()
+            context._trace_span = tracer.start_span(
+                "db.query",
+                region=region_id,
+                statement=_WHITESPACE.sub(" ", statement).strip()[:300],
+            )
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            conn.info.pop("active_cursor", None)
+            span = getattr(context, "_trace_span", None)
+            if span is not None:
+                span.set_attribute("rowcount", cursor.rowcount)
+                tracer.end_span(span)
+
+        @event.listens_for(engine, "handle_error")
+        def _error(exception_context):
+            if exception_context.connection is not None:
+                exception_context.connection.info.pop("active_cursor", None)
+            span = getattr(exception_context.execution_context, "_trace_span", None)
+            if span is not None:
+                span.record_error(exception_context.original_exception)
+                tracer.end_span(span)
+
+    def __instrument_pool(self, engine, region_id: int):
+        """Checkout / overflow của pool → metrics db.pool.*"""
+        pool = engine.pool
+
+        def publish():
+            metrics.set_gauge("db.pool.checked_out", pool.checkedout(), region=region_id)
+            metrics.set_gauge("db.pool.overflow", max(0, pool.overflow()), region=region_id)
+
+        @event.listens_for(engine, "connect")
+        def _connect(dbapi_connection, connection_record):
+            metrics.inc("db.pool.connects", region=region_id)
+
+        @event.listens_for(engine, "checkout")
+        def _checkout(dbapi_connection, connection_record, connection_proxy):
+            metrics.inc("db.pool.checkouts", region=region_id)
+            if pool.overflow() > 0:
+                metrics.inc("db.pool.overflow_checkouts", region=region_id)
+            publish()
+
+        @event.listens_for(engine, "checkin")
+        def _checkin(dbapi_connection, connection_record):
+            publish()
 
     # ----------------------------------------------------------------------
 
     def __cleanup_idle_engines(self):
-        """Tự động đóng engine sau khi idle quá lâu"""
+        """Tự động đóng engine sau khi idle quá lâu (không dọn engine đang có connection mượn)"""
         while True:
             now = time.time()
-            for region_id, last in list(self.last_used.items()):
-                if now - last > self.idle_timeout:
-                    cfg = self.DB_MAP.get(region_id, {})
-                    print(
-                        f"[DBManager] 💤 Disposing idle engine for region {region_id} ({cfg.get('server')})"
-                    )
-                    try:
-                        self.engines[region_id].dispose()
-                    except Exception as e:
-                        print(
-                            f"[DBManager] ⚠️ Dispose failed for region {region_id}: {e}"
-                        )
-                    finally:
+            idle = []
+            with self._engine_lock:
+                for region_id, last in list(self.last_used.items()):
+                    engine = self.engines.get(region_id)
+                    if (
+                        now - last > self.idle_timeout
+                        and not self.leases.get(region_id)
+                        and (engine is None or engine.pool.checkedout() == 0)
+                    ):
+                        idle.append((region_id, engine))
                         self.engines.pop(region_id, None)
                         self.sessions.pop(region_id, None)
                         self.last_used.pop(region_id, None)
+            # dispose ngoài lock: get_engine() tạo engine mới nếu cần, không phải chờ
+            for region_id, engine in idle:
+                if engine is None:
+                    continue
+                cfg = self.DB_MAP.get(region_id, {})
+                print(
+                    f"[DBManager] 💤 Disposing idle engine for region {region_id} ({cfg.get('server')})"
+                )
+                try:
+                    engine.dispose()
+                except Exception as e:
+                    print(
+                        f"[DBManager] ⚠️ Dispose failed for region {region_id}: {e}"
+                    )
             time.sleep(300)
 
     def __start_cleanup_thread(self):
         t = threading.Thread(target=self.__cleanup_idle_engines, daemon=True)
         t.start()
+
+
+_shared_manager: Optional[MultiDBManager] = None
+_shared_lock = threading.Lock()
+
+
+def get_db_manager() -> MultiDBManager:
+    """Trả về MultiDBManager dùng chung cho toàn process (một bộ pool mỗi region)."""
+    global _shared_manager
+    with _shared_lock:
+        if _shared_manager is None:
+            _shared_manager = MultiDBManager()
+        return _shared_manager
@@ -1,12 +1,71 @@
 """
 Reflection module for query rewriting.
 Rewrites follow-up questions to be standalone using conversation context.
+
+Cheap path first: pronouns / anaphora ("nó", "ở đó", "there", "거기",
+"そこ", "那里"...) are replaced by the last place of the session
+(ctx "target_place" of SessionMemory / ChatManager). The LLM is only called when the
+question stays ambiguous (no remembered place, elliptical follow-ups,
+follow-ups that refer to the remembered place without a pronoun).
+The rules need a place source (place_extractor or PlaceIndex); without
+one every follow-up goes to the LLM as before.
+
+GraphOrchestrator uses the rules only (rewrite_follow_up): a follow-up the
+rules can't resolve is passed on unchanged, the agent's LLM sees the history.
 """
 import logging
+import os
+import re
+import time
+from typing import Callable, List, Optional, Tuple
+
 from langchain_core.chat_history import InMemoryChatMessageHistory
 
+from services.llm_scheduler import get_llm_scheduler
+from services.metrics import metrics
+
 logger = logging.getLogger(__name__)
 
+TARGET_PLACE_KEY = "target_place"
+
+# (pattern, template) — {place} is the remembered place; \\1 keeps a captured preposition
+_W = r"(?<![\w])"   # word start (also works next to Vietnamese letters)
+_E = r"(?![\w])"    # word end
+ANAPHORA: List[Tuple[re.Pattern, str]] = [
+    # Vietnamese
+    (re.compile(rf"{_W}(ở|tại|đến|tới) (chỗ |nơi )?(đó|đấy|đây|này|ấy|kia){_E}", re.I), r"\1 {place}"),
+    (re.compile(rf"{_W}(chỗ|nơi|địa điểm|điểm|cái) (đó|đấy|này|ấy|kia){_E}", re.I), "{place}"),
+    (re.compile(rf"{_W}nó{_E}", re.I), "{place}"),
+    # English
+    (re.compile(rf"{_W}(that|this) (place|site|spot|location){_E}", re.I), "{place}"),
+    (re.compile(rf"{_W}(go|get|going|getting|come|coming) there{_E}", re.I), r"\1 to {place}"),
+    (re.compile(rf"(?<!is )(?<!are )(?<!was )(?<!were ){_W}there{_E}(?! (is|are|was|were){_E})", re.I), "at {place}"),
+    (re.compile(rf"{_W}its{_E}", re.I), "{place}'s"),
+    # "it" of weather / time ("what time is it", "it's raining") is not a pronoun
+    (
+        re.compile(
+            rf"(?<!time is )(?<!day is ){_W}it{_E}"
+            rf"(?!(\s+is|'s|\s+was)?\s+(raining|snowing|sunny|cloudy|windy|cold|hot|late|early){_E})",
+            re.I,
+        ),
+        "{place}",
+    ),
+    # French
+    (re.compile(rf"{_W}(cet endroit|ce lieu|ce site){_E}", re.I), "{place}"),
+    (re.compile(rf"{_W}là-bas{_E}", re.I), "à {place}"),
+    # Korean / Japanese / Chinese / Thai (no word boundaries)
+    (re.compile(r"거기|그곳|그 곳|그 장소|그것"), "{place}"),
+    (re.compile(r"その場所|あそこ|そこ|それ"), "{place}"),
+    (re.compile(r"那个地方|那個地方|那里|那裡|那儿|它"), "{place}"),
+    (re.compile(r"สถานที่นั้น|ที่นั่น|มัน"), "{place}"),
+]
+
+# Follow-ups that omit the subject entirely → left to the LLM
+ELLIPSIS = re.compile(
+    r"^\s*(còn|thế còn|vậy còn|what about|how about|and (the|what)|et (le|la|les)|그럼|それで|那么|还有)\b",
+    re.I,
+)
+
 
 class Reflection:
     """
@@ -15,12 +74,34 @@ class Reflection:
     
     Optimization:
     - Skips LLM if first message (no context needed)
+    - Resolves pronouns with the remembered place before calling the LLM
     - Uses minimal prompt for speed
     """
 
-    def __init__(self, llm, max_turns: int = 3):
+    def __init__(
+        self,
+        llm,
+        max_turns: int = 3,
+        place_extractor: Optional[Callable[[str], Optional[str]]] = None,
+        place_index=None,
+    ):
+        """
+        Args:
+            llm: LangChain chat model (fallback rewriter of __call__; None for rewrite_follow_up only)
+            max_turns: History turns shown to the LLM
+            place_extractor: query → place name mentioned in it; used to keep
+                "target_place" up to date
+            place_index: PlaceIndex used as place_extractor when none is given
+                (PlaceIndex.find_in_text on the session's ctx region_id / project_id)
+        """
         self.llm = llm
         self.max_turns = max_turns
+        self.place_extractor = place_extractor
+        self.place_index = place_index
+        # Running LLM rewrite latency, used to report time saved by rule hits
+        self._llm_ms = float(os.getenv("REFLECTION_LLM_MS_ESTIMATE", "800"))
+        self._hits = 0
+        self._llm_calls = 0
 
     def _format_history(self, history: InMemoryChatMessageHistory) -> str:
         """Format recent history as compact string."""
@@ -47,11 +128,18 @@ class Reflection:
         if len(history.messages) <= 2:
             last_msg = history.messages[-1].content if history.messages else ""
             logger.debug("Reflection: first message, skipping LLM")
+            self._remember_place(session_memory, session_id, last_msg)
             return last_msg
 
+        current_question = history.messages[-1].content
+
+        # Cheap path: rules + remembered place
+        rewritten = self._rewrite_with_rules(session_memory, session_id, current_question)
+        if rewritten is not None:
+            return rewritten
+
         # Clean, simple prompt
         history_str = self._format_history(history)
-        current_question = history.messages[-1].content
         
         prompt = f"""Rewrite the LATEST question to be standalone.
 
@@ -69,11 +157,124 @@ LATEST question: {current_question}
 
 Standalone question:"""
 
+        # Busy LLM queue → fall through to the original question
         try:
-            result = self.llm.invoke(prompt)
+            start = time.perf_counter()
+            with get_llm_scheduler().slot_sync():
+                result = self.llm.invoke(prompt)
+            self._record_llm((time.perf_counter() - start) * 1000)
             rewritten = result.content.strip().strip('"')
             print(f"🔄 [REFLECTION] {history.messages[-1].content} → {rewritten}")
+            self._remember_place(session_memory, session_id, rewritten)
             return rewritten
         except Exception as e:
             logger.error(f"Reflection error: {e}")
             return history.messages[-1].content
+
+    def rewrite_follow_up(self, session_memory, session_id: str, question: str, has_history: bool) -> str:
+        """
+        Rules only, no LLM: pronouns → remembered place, else the question unchanged.
+
+        Args:
+            session_memory: Anything with get_ctx / set_ctx (SessionMemory, ChatManager)
+            has_history: Session already has earlier turns (else: just remember its place)
+        """
+        if not has_history:
+            self._remember_place(session_memory, session_id, question)
+            return question
+        rewritten = self._rewrite_with_rules(session_memory, session_id, question, saves_llm=False)
+        if rewritten is None:
+            metrics.inc("reflection.decisions", outcome="deferred")
+            return question
+        return rewritten
+
+    # ==========================================================
+    # RULE-BASED REWRITE
+    # ==========================================================
+    def _rewrite_with_rules(
+        self, session_memory, session_id: str, question: str, saves_llm: bool = True
+    ) -> Optional[str]:
+        """
+        Resolve the question without the LLM.
+
+        Returns:
+            Standalone question, or None when the LLM is still needed
+        """
+        if not self._tracks_places:
+            return None  # no place source → rules can't tell a follow-up from a new question
+
+        # Question names its own place → already standalone
+        mentioned = self._extract_place(session_memory, session_id, question)
+        if mentioned:
+            session_memory.set_ctx(session_id, TARGET_PLACE_KEY, mentioned)
+            self._record_hit("own_place", saves_llm)
+            return question
+
+        # "còn ...?", "それで、..." → subject omitted, a pronoun swap would mangle it
+        if ELLIPSIS.search(question):
+            return None
+
+        place = session_memory.get_ctx(session_id, TARGET_PLACE_KEY)
+        if not place:
+            if self._has_anaphora(question):
+                return None  # pronoun without a remembered place → LLM
+            # No place anywhere in the session → nothing to resolve
+            self._record_hit("standalone", saves_llm)
+            return question
+
+        # Every pronoun of every pattern; \x00 keeps the place out of later patterns
+        rewritten, replaced = question, 0
+        for pattern, template in ANAPHORA:
+            rewritten, n = pattern.subn(lambda m, t=template: m.expand(t.replace("{place}", "\x00")), rewritten)
+            replaced += n
+        if not replaced:
+            # "Giờ mở cửa thế nào?" right after a place → implicit follow-up → LLM
+            return None
+
+        rewritten = rewritten.replace("\x00", place)
+        logger.info(f"🔄 [REFLECTION:rule] {question} → {rewritten}")
+        self._record_hit("anaphora", saves_llm)
+        return rewritten
+
+    @property
+    def _tracks_places(self) -> bool:
+        return self.place_extractor is not None or self.place_index is not None
+
+    @staticmethod
+    def _has_anaphora(question: str) -> bool:
+        return any(pattern.search(question) for pattern, _ in ANAPHORA)
+
+    def _extract_place(self, session_memory, session_id: str, question: str) -> Optional[str]:
+        if self.place_extractor:
+            return self.place_extractor(question)
+        if self.place_index is not None:
+            match = self.place_index.find_in_text(
+                question,
+                session_memory.get_ctx(session_id, "region_id", 0),
+                session_memory.get_ctx(session_id, "project_id", 1),
+            )
+            return match.name if match else None
+        return None
+
+    def _remember_place(self, session_memory, session_id: str, question: str):
+        place = self._extract_place(session_memory, session_id, question)
+        if place:
+            session_memory.set_ctx(session_id, TARGET_PLACE_KEY, place)
+
+    def _record_hit(self, reason: str, saves_llm: bool = True):
+        self._hits += 1
+        metrics.inc("reflection.decisions", outcome="rule", reason=reason)
+        if saves_llm:
+            metrics.inc("reflection.saved_ms", self._llm_ms)
+        self._publish_hit_rate()
+
+    def _record_llm(self, elapsed_ms: float):
+        self._llm_calls += 1
+        self._llm_ms = 0.8 * self._llm_ms + 0.2 * elapsed_ms
+        metrics.inc("reflection.decisions", outcome="llm")
+        metrics.observe("reflection.llm_ms", elapsed_ms)
+        self._publish_hit_rate()
+
+    def _publish_hit_rate(self):
+        total = self._hits + self._llm_calls
+        metrics.set_gauge("reflection.rule_hit_rate", round(self._hits / total, 4))
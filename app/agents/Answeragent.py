@@ -3,10 +3,10 @@ import logging
 import re
 from typing import Any, Dict, List, Optional
 
-from langdetect import detect, LangDetectException
-from deep_translator import GoogleTranslator
-
 from agents.BaseAgent import BaseAgent
+from services.language import get_language_detector
+from services.llm_scheduler import LLMBusyError, get_llm_scheduler
+from services.translation import get_translation_service
 from utils.SessionMemory import SessionMemory
 
 logger = logging.getLogger(__name__)
@@ -15,6 +15,7 @@ logger = logging.getLogger(__name__)
 LANG_NAMES = {
     "vi": "tiếng Việt",
     "en": "English",
+    "zh": "中文",
     "zh-cn": "中文",
     "zh-tw": "中文",
     "ja": "日本語",
@@ -27,6 +28,7 @@ LANG_NAMES = {
 TRANSLATE_CODES = {
     "vi": "vi",
     "en": "en",
+    "zh": "zh-cn",
     "zh-cn": "zh-cn",
     "zh-tw": "zh-tw",
     "ja": "ja",
@@ -63,23 +65,17 @@ class AnswerAgent(BaseAgent):
     # LANGUAGE DETECTION
     # =========================================================================
     def _detect_language(self, text: str) -> str:
-        """Detect language of input text."""
-        try:
-            lang = detect(text)
-            return lang
-        except LangDetectException:
-            return "vi"
+        """Detect language of input text (script → function words → langdetect)."""
+        return get_language_detector().detect(text)
 
     def _translate_to(self, text: str, target_lang: str) -> str:
-        """Translate text to target language using Google Translate."""
+        """Translate text to target language (cached Google Translate)."""
         if not text or target_lang == "vi":
             return text
 
         try:
             target_code = TRANSLATE_CODES.get(target_lang, "en")
-            translator = GoogleTranslator(source="vi", target=target_code)
-            result = translator.translate(text)
-            return result
+            return get_translation_service().translate_sync(text, target_code, source="vi")
         except Exception as e:
             logger.error(f"Translation error: {e}")
             return text
@@ -127,7 +123,8 @@ Trả lời:"""
                 },
                 {"role": "user", "content": prompt},
             ]
-            response = self.llm.invoke(messages)
+            with get_llm_scheduler().slot_sync():
+                response = self.llm.invoke(messages)
             result = response.content.strip().strip('"')
 
             # Translate if user's language is not Vietnamese
@@ -137,6 +134,8 @@ Trả lời:"""
 
             return result
 
+        except LLMBusyError:
+            raise
         except Exception as e:
             logger.error(f"Synthesizer error: {e}")
             return str(raw_data)
@@ -146,4 +145,5 @@ Trả lời:"""
     # =========================================================================
     def run(self, prompt: str, *args, **kwargs):
         """Legacy wrapper method."""
-        return self.llm.invoke(prompt).content
+        with get_llm_scheduler().slot_sync():
+            return self.llm.invoke(prompt).content
@@ -4,6 +4,8 @@ from langchain_community.chat_models import ChatOllama
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 import os
 
+from services.llm_scheduler import LLMBusyError, get_llm_scheduler
+
 logger = logging.getLogger(__name__)
 
 
@@ -54,7 +56,8 @@ class BaseAgent:
         messages.append(HumanMessage(content=query))
 
         try:
-            resp = self.llm.invoke(messages)
+            with get_llm_scheduler().slot_sync():
+                resp = self.llm.invoke(messages)
             text = (resp.content or "").strip()
 
             if self.memory:
@@ -62,6 +65,8 @@ class BaseAgent:
 
             return text
 
+        except LLMBusyError:
+            raise
         except Exception as e:
             logger.error(f"LLM error: {e}")
             return f"[Error calling LLM: {e}]"
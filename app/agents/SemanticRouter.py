@@ -1,9 +1,10 @@
 """
 Semantic Router for intent classification.
 Simple binary classification: RAG query vs Chitchat.
+Used as the embedding fallback of agents.chitchat.ChitchatClassifier.
 """
 import logging
-from typing import Dict
+from typing import Dict, List
 
 import numpy as np
 from sentence_transformers import SentenceTransformer
@@ -20,14 +21,23 @@ class SemanticRouter:
     def __init__(self, embedder: SentenceTransformer):
         self.model = embedder
 
-        # Binary classification: RAG or Chitchat
-        labels = {
-            "rag": "question about place, location, information, directions, media, history, opening hours",
-            "chitchat": "casual conversation, greeting, thanks, bye, hello, small talk",
+        # Binary classification: RAG or Chitchat (several multilingual exemplars each)
+        labels: Dict[str, List[str]] = {
+            "rag": [
+                "question about place, location, information, directions, media, history, opening hours",
+                "địa điểm này ở đâu, giới thiệu, đường đi, giờ mở cửa",
+                "이 장소는 어디에 있나요 / この場所はどこですか / 这个地方在哪里",
+            ],
+            "chitchat": [
+                "casual conversation, greeting, thanks, bye, hello, small talk",
+                "xin chào, cảm ơn, tạm biệt, bạn khỏe không",
+                "안녕하세요, 감사합니다 / こんにちは, ありがとう / 你好, 谢谢 / สวัสดี, ขอบคุณ / bonjour, merci",
+            ],
         }
 
         self.label_names = list(labels.keys())
-        label_texts = [f"passage: {desc}" for desc in labels.values()]
+        self.label_index = [name for name, texts in labels.items() for _ in texts]
+        label_texts = [f"passage: {t}" for texts in labels.values() for t in texts]
         self.label_vectors = self.model.encode(label_texts, normalize_embeddings=True)
 
         logger.info("SemanticRouter ready (RAG/Chitchat)")
@@ -37,17 +47,20 @@ class SemanticRouter:
         Classify query as RAG or Chitchat.
         
         Returns:
-            {"is_chitchat": bool, "score": float}
+            {"is_chitchat": bool, "score": float, "rag_score": float, "chitchat_score": float}
         """
         if not text or not text.strip():
-            return {"is_chitchat": True, "score": 0.0}
+            return {"is_chitchat": True, "score": 0.0, "rag_score": 0.0, "chitchat_score": 0.0}
 
         q_vec = self.model.encode(f"query: {text}", normalize_embeddings=True)
         sims = q_vec @ self.label_vectors.T
 
-        # Index 0 = RAG, Index 1 = Chitchat
-        rag_score = float(sims[0])
-        chitchat_score = float(sims[1])
+        # Best exemplar per label
+        best = {name: -1.0 for name in self.label_names}
+        for name, sim in zip(self.label_index, sims):
+            best[name] = max(best[name], float(sim))
+        rag_score = best["rag"]
+        chitchat_score = best["chitchat"]
 
         is_chitchat = chitchat_score > rag_score
 
@@ -56,4 +69,6 @@ class SemanticRouter:
         return {
             "is_chitchat": is_chitchat,
             "score": max(rag_score, chitchat_score),
+            "rag_score": rag_score,
+            "chitchat_score": chitchat_score,
         }
@@ -3,5 +3,7 @@ from .BaseAgent import BaseAgent
 from .Answeragent import AnswerAgent
 from .SemanticRouter import SemanticRouter
 from .travel_agent import TravelAgent
+from .fast_path import FastPathRouter
+from .chitchat import ChitchatClassifier
 
-__all__ = ["BaseAgent", "AnswerAgent", "SemanticRouter", "TravelAgent"]
\ No newline at end of file
+__all__ = ["BaseAgent", "AnswerAgent", "SemanticRouter", "TravelAgent", "FastPathRouter", "ChitchatClassifier"]
\ No newline at end of file
@@ -0,0 +1,267 @@
+"""
+ChitchatClassifier: multilingual small-talk detection without the LLM.
+
+1. Compiled matcher (<1ms): the whole message must be a greeting / thanks /
+   bye / "who are you" phrase (vi, en, ko, ja, zh, th, fr), optionally
+   followed by filler words ("bạn", "so much", "ครับ"...). "hi, Hồ Gươm ở
+   đâu?" is therefore NOT chitchat and still reaches the agent.
+   Accents are matched as written: the phrase's accented form or its fully
+   unaccented form ("chào" / "chao"), never a different accent ("cháo").
+2. Embedding fallback (optional): very short messages the patterns miss are
+   classified by SemanticRouter, unless they look like a travel question
+   (question words, a known place name).
+
+Replies are canned, in the user's language; Ollama is never contacted.
+"""
+import logging
+import os
+import re
+import time
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from rag.normalize import strip_accents
+from services.language import get_language_detector
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_LANGUAGES = ("vi", "en", "ko", "ja", "zh", "th", "fr")
+DEFAULT_LANGUAGE = "vi"
+
+PHRASES: Dict[str, Dict[str, List[str]]] = {
+    "vi": {
+        "greeting": ["xin chào", "chào", "chào buổi sáng", "chào buổi tối", "alo",
+                     "bạn khỏe không", "bạn có khỏe không"],
+        "thanks": ["cảm ơn", "cám ơn", "cảm ơn nhiều", "thanks bạn"],
+        "bye": ["tạm biệt", "hẹn gặp lại", "bái bai", "bai bai"],
+        "identity": ["bạn là ai", "tên bạn là gì", "bạn tên gì", "bạn là gì"],
+    },
+    "en": {
+        "greeting": ["hi", "hello", "hey", "hiya", "howdy", "good morning", "good afternoon",
+                     "good evening", "how are you", "how are you doing", "what's up"],
+        "thanks": ["thanks", "thank you", "thx", "ty", "many thanks", "cheers", "appreciate it"],
+        "bye": ["bye", "goodbye", "bye bye", "see you", "see you later", "see ya", "good night"],
+        "identity": ["who are you", "what are you", "what is your name", "what's your name"],
+    },
+    "ko": {
+        "greeting": ["안녕", "안녕하세요", "안녕하십니까", "반가워요", "반갑습니다"],
+        "thanks": ["감사합니다", "감사해요", "고마워", "고마워요", "고맙습니다"],
+        "bye": ["안녕히 가세요", "안녕히 계세요", "잘 가", "잘 가요", "다음에 봐요"],
+        "identity": ["누구세요", "너는 누구야", "당신은 누구입니까", "이름이 뭐예요"],
+    },
+    "ja": {
+        "greeting": ["こんにちは", "こんばんは", "おはよう", "おはようございます", "はじめまして", "やあ"],
+        "thanks": ["ありがとう", "ありがとうございます", "どうもありがとう", "サンキュー"],
+        "bye": ["さようなら", "バイバイ", "またね", "じゃあね", "おやすみ", "おやすみなさい"],
+        "identity": ["あなたは誰", "あなたは誰ですか", "お名前は", "名前は何ですか"],
+    },
+    "zh": {
+        "greeting": ["你好", "您好", "大家好", "嗨", "哈喽", "早上好", "晚上好"],
+        "thanks": ["谢谢", "谢谢你", "謝謝", "多谢", "感谢"],
+        "bye": ["再见", "再見", "拜拜", "回头见"],
+        "identity": ["你是谁", "你叫什么", "你叫什么名字"],
+    },
+    "th": {
+        "greeting": ["สวัสดี", "หวัดดี"],
+        "thanks": ["ขอบคุณ", "ขอบใจ", "ขอบคุณมาก"],
+        "bye": ["ลาก่อน", "บาย", "แล้วพบกันใหม่"],
+        "identity": ["คุณคือใคร", "คุณชื่ออะไร"],
+    },
+    "fr": {
+        "greeting": ["bonjour", "bonsoir", "salut", "coucou", "ça va", "comment ça va"],
+        "thanks": ["merci", "merci beaucoup", "je vous remercie"],
+        "bye": ["au revoir", "à bientôt", "à plus", "bonne nuit", "adieu"],
+        "identity": ["qui es tu", "qui êtes vous", "comment tu t'appelles", "comment vous appelez vous"],
+    },
+}
+
+# Words that may follow a phrase without changing its meaning
+FILLERS = [
+    "bạn", "ạ", "nhé", "nha", "nhiều", "lắm", "em", "anh", "chị", "mình",
+    "you", "there", "so much", "very much", "a lot", "again", "all", "everyone", "friend",
+    "beaucoup", "à toi", "à vous", "tout le monde",
+    "요", "ね", "よ", "です", "啊", "呀", "了", "吧", "ครับ", "ค่ะ", "คะ", "นะ", "จ้า",
+    "bot", "tbot", "t bot",
+]
+
+# Information questions: never small talk, so no embedding fallback for them
+QUESTION_WORDS = [
+    "ở đâu", "đâu", "mấy giờ", "bao nhiêu", "bao xa", "khi nào", "lúc nào", "bao giờ",
+    "giá vé", "đường đi", "đi đường nào", "mở cửa", "đóng cửa",
+    "where", "when", "what time", "how much", "how far", "how to get", "how do i get",
+    "ticket", "tickets", "price", "open", "opening hours",
+    "où", "quand", "combien", "quelle heure",
+    "어디", "몇 시", "얼마", "どこ", "何時", "いくら", "哪里", "哪裡", "在哪", "几点", "多少钱", "怎么去",
+    "ที่ไหน", "กี่โมง", "เท่าไหร่",
+]
+
+RESPONSES: Dict[str, Dict[str, str]] = {
+    "greeting": {
+        "vi": "Xin chào bạn! 👋 Mình là T-Bot, hướng dẫn viên du lịch AI. Bạn muốn tìm hiểu về địa điểm nào không ạ?",
+        "en": "Hello! 👋 I'm T-Bot, your AI travel guide. Which place would you like to learn about?",
+        "ko": "안녕하세요! 👋 저는 AI 여행 가이드 T-Bot입니다. 어떤 장소에 대해 알고 싶으신가요?",
+        "ja": "こんにちは！👋 AI旅行ガイドのT-Botです。どの場所について知りたいですか？",
+        "zh": "你好！👋 我是AI导游T-Bot。你想了解哪个地方呢？",
+        "th": "สวัสดีครับ! 👋 ผม T-Bot ไกด์ท่องเที่ยว AI อยากรู้เกี่ยวกับสถานที่ไหนครับ?",
+        "fr": "Bonjour ! 👋 Je suis T-Bot, votre guide touristique IA. Quel lieu souhaitez-vous découvrir ?",
+    },
+    "thanks": {
+        "vi": "Dạ không có chi ạ! 😊 Bạn cần hỗ trợ gì thêm không nhé?",
+        "en": "You're welcome! 😊 Is there anything else I can help with?",
+        "ko": "천만에요! 😊 더 도와드릴 것이 있을까요?",
+        "ja": "どういたしまして！😊 ほかにお手伝いできることはありますか？",
+        "zh": "不客气！😊 还有什么可以帮你的吗？",
+        "th": "ยินดีครับ! 😊 มีอะไรให้ช่วยอีกไหมครับ?",
+        "fr": "Avec plaisir ! 😊 Puis-je vous aider pour autre chose ?",
+    },
+    "bye": {
+        "vi": "Tạm biệt bạn! Chúc bạn có chuyến đi vui vẻ nhé! 🌟",
+        "en": "Goodbye! Have a wonderful trip! 🌟",
+        "ko": "안녕히 가세요! 즐거운 여행 되세요! 🌟",
+        "ja": "さようなら！素敵な旅をお楽しみください！🌟",
+        "zh": "再见！祝你旅途愉快！🌟",
+        "th": "ลาก่อนครับ! ขอให้เดินทางอย่างมีความสุขนะครับ! 🌟",
+        "fr": "Au revoir ! Excellent voyage ! 🌟",
+    },
+    "identity": {
+        "vi": "Mình là T-Bot, trợ lý du lịch AI của bạn. Mình có thể giúp bạn tìm thông tin về các địa điểm du lịch, video, hướng dẫn đường đi và nhiều thứ khác nữa! 🗺️",
+        "en": "I'm T-Bot, your AI travel assistant. I can help you with information about places, videos, directions and more! 🗺️",
+        "ko": "저는 AI 여행 도우미 T-Bot입니다. 관광지 정보, 영상, 길 안내 등을 도와드릴 수 있어요! 🗺️",
+        "ja": "私はAI旅行アシスタントのT-Botです。観光地の情報、動画、道案内などをお手伝いします！🗺️",
+        "zh": "我是你的AI旅行助手T-Bot，可以帮你查找景点信息、视频、路线等！🗺️",
+        "th": "ผม T-Bot ผู้ช่วยท่องเที่ยว AI ของคุณ ช่วยหาข้อมูลสถานที่ วิดีโอ เส้นทาง และอื่นๆ ได้ครับ! 🗺️",
+        "fr": "Je suis T-Bot, votre assistant de voyage IA. Je peux vous aider avec des informations sur les lieux, des vidéos, des itinéraires et plus encore ! 🗺️",
+    },
+    "smalltalk": {
+        "vi": "Mình là T-Bot, sẵn sàng hỗ trợ bạn về các địa điểm du lịch. Bạn muốn tìm hiểu gì ạ?",
+        "en": "I'm T-Bot, ready to help you explore places. What would you like to know?",
+        "ko": "저는 T-Bot이에요. 관광지에 대해 무엇이든 물어보세요!",
+        "ja": "T-Botです。観光地について何でも聞いてください！",
+        "zh": "我是T-Bot，随时为你介绍景点。你想了解什么？",
+        "th": "ผม T-Bot พร้อมช่วยเรื่องสถานที่ท่องเที่ยวครับ อยากรู้อะไรครับ?",
+        "fr": "Je suis T-Bot, prêt à vous faire découvrir les lieux. Que souhaitez-vous savoir ?",
+    },
+}
+
+_SPACES = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    """Lowercase, bỏ dấu câu/emoji, gộp khoảng trắng; giữ nguyên dấu (áp dụng cho cả pattern lẫn input)."""
+    text = unicodedata.normalize("NFC", text or "").lower()
+    text = "".join(
+        c if c.isalnum() or c.isspace() or unicodedata.category(c).startswith("M") else " "
+        for c in text
+    )
+    return _SPACES.sub(" ", text).strip()
+
+
+def _is_latin(phrase: str) -> bool:
+    return strip_accents(_normalize(phrase)).replace(" ", "").isascii()
+
+
+def _alternation(phrases: List[str]) -> str:
+    """Regex alternation of the phrases, each as written and fully unaccented."""
+    forms = set()
+    for phrase in phrases:
+        normalized = _normalize(phrase)
+        forms.update(f for f in (normalized, strip_accents(normalized)) if f)
+    return "|".join(re.escape(f).replace(r"\ ", r"\s*") for f in sorted(forms, key=len, reverse=True))
+
+
+@dataclass
+class ChitchatMatch:
+    """Kết quả nhận diện small talk."""
+    category: str   # greeting | thanks | bye | identity | smalltalk
+    language: str
+    source: str     # "pattern" | "semantic"
+
+    @property
+    def reply(self) -> str:
+        return RESPONSES[self.category][self.language]
+
+
+class ChitchatClassifier:
+    """Multilingual small-talk classifier (compiled patterns + optional embedding fallback)."""
+
+    def __init__(
+        self,
+        router=None,
+        fallback_max_words: int = None,
+        semantic_margin: float = None,
+    ):
+        """
+        Args:
+            router: SemanticRouter cho fallback (None = chỉ dùng pattern)
+            fallback_max_words: Chỉ fallback cho câu ngắn (CHITCHAT_FALLBACK_MAX_WORDS)
+            semantic_margin: chitchat_score - rag_score tối thiểu (CHITCHAT_SEMANTIC_MARGIN)
+        """
+        self.router = router
+        self.fallback_max_words = fallback_max_words or int(os.getenv("CHITCHAT_FALLBACK_MAX_WORDS", "4"))
+        self.semantic_margin = (
+            semantic_margin if semantic_margin is not None
+            else float(os.getenv("CHITCHAT_SEMANTIC_MARGIN", "0.05"))
+        )
+
+        # One anchored regex; the named group that matched gives language + category
+        groups = [
+            f"(?P<{lang}__{category}>{_alternation(phrases)})"
+            for lang, categories in PHRASES.items()
+            for category, phrases in categories.items()
+        ]
+        # Latin fillers need a space ("hi em" ok, "hiem" not); CJK/Thai ones don't
+        latin = [f for f in FILLERS if _is_latin(f)]
+        other = [f for f in FILLERS if f not in latin]
+        self._pattern = re.compile(
+            rf"(?:{'|'.join(groups)})"
+            rf"(?:\s+(?:{_alternation(latin)})|\s*(?:{_alternation(other)}))*"
+        )
+        # Same rule for question words: whole words in Latin scripts, substrings otherwise
+        latin = [w for w in QUESTION_WORDS if _is_latin(w)]
+        other = [w for w in QUESTION_WORDS if w not in latin]
+        self._question = re.compile(
+            rf"(?<!\w)(?:{_alternation(latin)})(?!\w)|{_alternation(other)}"
+        )
+
+        logger.info(f"ChitchatClassifier ready | semantic_fallback={'✅' if router else '❌'}")
+
+    def match(self, text: str, language: Optional[str] = None) -> Optional[ChitchatMatch]:
+        """Compiled matcher only (no embedding). language = client hint."""
+        start = time.perf_counter()
+        m = self._pattern.fullmatch(_normalize(text))
+        metrics.observe("chitchat.match_ms", (time.perf_counter() - start) * 1000, buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5))
+        if m is None:
+            return None
+        matched_lang, category = m.lastgroup.split("__")
+        metrics.inc("chitchat.decisions", source="pattern", category=category)
+        return ChitchatMatch(category, self._reply_language(language, matched_lang), "pattern")
+
+    def should_fallback(self, text: str) -> bool:
+        """True nếu nên thử embedding fallback (có router, câu đủ ngắn, không có từ để hỏi)."""
+        if self.router is None:
+            return False
+        normalized = _normalize(text)
+        if not normalized or self._question.search(normalized):
+            return False
+        # CJK/Thai have no spaces: count ~3 chars as a word
+        words = len(normalized.split()) if " " in normalized else max(1, len(normalized) // 3)
+        return words <= self.fallback_max_words
+
+    def match_semantic(self, text: str, language: Optional[str] = None) -> Optional[ChitchatMatch]:
+        """Embedding fallback via SemanticRouter (blocking — call off the event loop)."""
+        result = self.router.classify(text)
+        if result["chitchat_score"] - result["rag_score"] < self.semantic_margin:
+            metrics.inc("chitchat.decisions", source="semantic", category="none")
+            return None
+        metrics.inc("chitchat.decisions", source="semantic", category="smalltalk")
+        detected = get_language_detector().identify(text) or "en"
+        return ChitchatMatch("smalltalk", self._reply_language(language, detected), "semantic")
+
+    @staticmethod
+    def _reply_language(hint: Optional[str], detected: str) -> str:
+        hint = (hint or "").lower()[:2]
+        if hint in SUPPORTED_LANGUAGES:
+            return hint
+        return detected if detected in SUPPORTED_LANGUAGES else DEFAULT_LANGUAGE
@@ -0,0 +1,116 @@
+"""
+FastPathRouter: deterministic tool dispatch for high-confidence questions.
+
+QueryStore (intent templates) + LocationStore (place matching) pick the tool
+and its place_name without an LLM round trip; TravelAgent then only makes
+one LLM call to synthesize the answer. Low-confidence questions return None
+and go through the full agent loop.
+"""
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from services.metrics import SCORE_BUCKETS, metrics
+
+logger = logging.getLogger(__name__)
+
+# QueryStore intent → ToolExecutor tool
+INTENT_TOOLS = {
+    "info": "get_place_info",
+    "location": "get_place_location",
+    "media": "get_place_media",
+    "attractions": "get_attractions",
+}
+
+
+class FastPathRouter:
+    """Choose a tool + place deterministically when both scores clear a threshold."""
+
+    def __init__(
+        self,
+        query_store,
+        location_store,
+        intent_threshold: float = None,
+        place_threshold: float = None,
+        intent_margin: float = None,
+    ):
+        """
+        Args:
+            query_store: QueryStore with intent templates
+            location_store: Preloaded LocationStore (SubProject names)
+            intent_threshold: Min template similarity (FAST_PATH_INTENT_THRESHOLD)
+            place_threshold: Min place match score (FAST_PATH_PLACE_THRESHOLD)
+            intent_margin: Min gap between best and 2nd-best intent
+        """
+        self.query_store = query_store
+        self.location_store = location_store
+        self.intent_threshold = intent_threshold or float(os.getenv("FAST_PATH_INTENT_THRESHOLD", "0.85"))
+        self.place_threshold = place_threshold or float(os.getenv("FAST_PATH_PLACE_THRESHOLD", "0.85"))
+        self.intent_margin = intent_margin if intent_margin is not None else float(
+            os.getenv("FAST_PATH_INTENT_MARGIN", "0.02")
+        )
+
+        logger.info(
+            f"FastPathRouter ready | intent>={self.intent_threshold} "
+            f"place>={self.place_threshold} margin>={self.intent_margin}"
+        )
+
+    def route(self, query: str, region_id: int, project_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Returns:
+            {"name": tool, "args": {...}, "intent_score", "place_score"} or None
+        """
+        matches = self.query_store.match(query, top_k=2)
+        if not matches:
+            return self._miss("no_intent")
+
+        best = matches[0]
+        intent = best["template"]["intent"]
+        intent_score = best["score"]
+        margin = intent_score - matches[1]["score"] if len(matches) > 1 else 1.0
+        metrics.observe("fast_path.intent_score", intent_score, buckets=SCORE_BUCKETS, intent=intent)
+
+        tool_name = INTENT_TOOLS.get(intent)
+        if tool_name is None:
+            return self._miss("unknown_intent")
+        if intent_score < self.intent_threshold or margin < self.intent_margin:
+            return self._miss("low_intent")
+
+        place = self._resolve_place(query, region_id, project_id)
+        if place is None:
+            return self._miss("no_place")
+        metrics.observe("fast_path.place_score", place["score"], buckets=SCORE_BUCKETS)
+        if place["score"] < self.place_threshold:
+            return self._miss("low_place")
+
+        metrics.inc("fast_path.decisions", outcome="hit", tool=tool_name)
+        logger.info(
+            f"⚡ Fast path: {tool_name}({place['name']}) | "
+            f"intent={intent_score:.3f} place={place['score']:.3f}"
+        )
+        return {
+            "name": tool_name,
+            "args": {"place_name": place["name"]},
+            "intent_score": intent_score,
+            "place_score": place["score"],
+        }
+
+    def _resolve_place(self, query: str, region_id: int, project_id: int) -> Optional[Dict]:
+        """Best place match among NER entities (or the whole query if no NER)."""
+        candidates: List[str] = []
+        if self.location_store.ner_service is not None:
+            candidates = self.location_store.extract_ner(query)
+        if not candidates:
+            candidates = [query]
+
+        best = None
+        for candidate in candidates:
+            match = self.location_store.match(region_id, project_id, candidate)
+            if match and (best is None or match["score"] > best["score"]):
+                best = match
+        return best
+
+    @staticmethod
+    def _miss(reason: str) -> None:
+        metrics.inc("fast_path.decisions", outcome=reason)
+        return None
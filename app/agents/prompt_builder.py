@@ -0,0 +1,170 @@
+"""
+PromptBuilder: token-budgeted prompt assembly for the agent loop.
+
+- Compacts tool results (drops internal fields, truncates long text and lists)
+- Fits the conversation into a token budget by shortening, then dropping,
+  the oldest history turns
+Token counts are a fast local estimate; Ollama's real prompt_eval_count is
+recorded separately by OllamaClient.
+"""
+import json
+import logging
+import math
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 3072, 4096, 6144, 8192, 16384)
+
+# CJK / kana / hangul ≈ 1 token per char; other words ≈ 1 token per 4 chars
+_TOKEN_RE = re.compile(r"[぀-ヿ㐀-鿿가-힯]|\w+|[^\w\s]")
+
+# Fields the LLM never needs to answer
+DROP_FIELDS = {"source"}
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a string (fast, tokenizer-free)."""
+    if not text:
+        return 0
+    return sum(max(1, math.ceil(len(t) / 4)) for t in _TOKEN_RE.findall(text))
+
+
+def message_tokens(message: Dict[str, Any]) -> int:
+    """Approximate tokens of one chat message (content + tool_calls + role overhead)."""
+    tokens = 4 + estimate_tokens(message.get("content") or "")
+    if message.get("tool_calls"):
+        tokens += estimate_tokens(json.dumps(message["tool_calls"], ensure_ascii=False))
+    return tokens
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    space = cut.rfind(" ")
+    if space > max_chars * 0.6:
+        cut = cut[:space]
+    return cut.rstrip(" ,.;:") + "…"
+
+
+class PromptBuilder:
+    """Assemble agent prompts under a configurable token budget."""
+
+    def __init__(
+        self,
+        budget_tokens: int = None,
+        max_text_chars: int = None,
+        max_list_items: int = None,
+        history_summary_chars: int = 160,
+        static_overhead: int = 0,
+    ):
+        """
+        Args:
+            budget_tokens: Max estimated prompt tokens (PROMPT_TOKEN_BUDGET)
+            max_text_chars: Truncate long strings in tool results (PROMPT_MAX_TEXT_CHARS)
+            max_list_items: Max items kept per list in tool results (PROMPT_MAX_LIST_ITEMS)
+            history_summary_chars: Old history messages are shortened to this length
+            static_overhead: Tokens of content outside messages (tool schema)
+        """
+        self.budget_tokens = budget_tokens or int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+        self.max_text_chars = max_text_chars or int(os.getenv("PROMPT_MAX_TEXT_CHARS", "600"))
+        self.max_list_items = max_list_items or int(os.getenv("PROMPT_MAX_LIST_ITEMS", "5"))
+        self.history_summary_chars = history_summary_chars
+        self.static_overhead = static_overhead
+
+    # ------------------------------------------------------------------
+    # Tool results
+    # ------------------------------------------------------------------
+
+    def compact_tool_result(self, result: Dict[str, Any]) -> Tuple[str, int, int]:
+        """
+        Serialize a tool result for the prompt.
+
+        Returns:
+            (content, raw_tokens, compact_tokens)
+        """
+        raw = json.dumps(result, ensure_ascii=False)
+        content = json.dumps(self._compact(result), ensure_ascii=False, separators=(",", ":"))
+        raw_tokens, compact_tokens = estimate_tokens(raw), estimate_tokens(content)
+        metrics.observe("prompt.tool_result_tokens", raw_tokens, buckets=TOKEN_BUCKETS, stage="raw")
+        metrics.observe("prompt.tool_result_tokens", compact_tokens, buckets=TOKEN_BUCKETS, stage="compact")
+        return content, raw_tokens, compact_tokens
+
+    def _compact(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            return {
+                k: self._compact(v)
+                for k, v in value.items()
+                if k not in DROP_FIELDS and v not in (None, "", [], {})
+            }
+        if isinstance(value, list):
+            items = [self._compact(v) for v in value[: self.max_list_items]]
+            if len(value) > self.max_list_items:
+                items.append(f"... (+{len(value) - self.max_list_items})")
+            return items
+        if isinstance(value, str):
+            return _truncate(value, self.max_text_chars)
+        return value
+
+    # ------------------------------------------------------------------
+    # Budget fitting
+    # ------------------------------------------------------------------
+
+    def fit(
+        self, messages: List[Dict[str, Any]], history_count: int = 0
+    ) -> Tuple[List[Dict[str, Any]], int, int]:
+        """
+        Fit messages into the token budget.
+
+        Layout expected: [system, *history (history_count), user, *current turn].
+        System prompt, current question and current-turn tool messages are
+        never dropped; old history is shortened first, then dropped oldest-first.
+
+        Returns:
+            (messages_to_send, tokens_before, tokens_after)
+        """
+        tokens_before = self.static_overhead + sum(message_tokens(m) for m in messages)
+        if tokens_before <= self.budget_tokens or history_count <= 0:
+            return messages, tokens_before, tokens_before
+
+        system = messages[:1]
+        history = [dict(m) for m in messages[1:1 + history_count]]
+        rest = messages[1 + history_count:]
+
+        def total() -> int:
+            return self.static_overhead + sum(
+                message_tokens(m) for m in system + history + rest
+            )
+
+        # 1. Shorten old history (keep the most recent exchange intact)
+        for m in history[:-2]:
+            m["content"] = _truncate(m.get("content") or "", self.history_summary_chars)
+        # 2. Drop oldest history until within budget
+        while history and total() > self.budget_tokens:
+            history.pop(0)
+
+        fitted = system + history + rest
+        tokens_after = total()
+        if tokens_after > self.budget_tokens:
+            logger.debug(f"[Prompt] still over budget after fitting: {tokens_after}/{self.budget_tokens}")
+        return fitted, tokens_before, tokens_after
+
+    @staticmethod
+    def record_request(raw_tokens: int, sent_tokens: int, iterations: int):
+        """Per-request prompt-size telemetry."""
+        saved = max(0, raw_tokens - sent_tokens)
+        metrics.observe("prompt.request_tokens", sent_tokens, buckets=TOKEN_BUCKETS)
+        metrics.observe("prompt.request_tokens_saved", saved, buckets=TOKEN_BUCKETS)
+        logger.info(
+            f"[Prompt] sent≈{sent_tokens} tok over {iterations} call(s) | saved≈{saved} tok"
+        )
+
+
+def schema_tokens(tools: Optional[List[Dict]]) -> int:
+    """Estimated tokens of a tool schema rendered into the prompt."""
+    return estimate_tokens(json.dumps(tools, ensure_ascii=False)) if tools else 0
@@ -0,0 +1,100 @@
+"""
+Speculative tool pre-execution.
+
+While the first LLM call is still deciding, the most likely place is taken
+from the raw query with the in-memory PlaceIndex (names + aliases) and the
+likely ToolExecutor lookups start in the background. If the LLM then asks
+for the same tool with the same place (any spelling that resolves to the
+same SubProjectID), the (partially) finished result is reused; unused
+speculative work is cancelled when the request ends.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from rag.place_index import PlaceIndex, PlaceMatch
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPECULATIVE_TOOLS = "get_place_info,get_place_location"
+
+
+class Speculation:
+    """Speculative tool results for one request."""
+
+    def __init__(
+        self,
+        executor,
+        context: Dict[str, Any],
+        place: PlaceMatch,
+        tools: Iterable[str],
+        place_index: PlaceIndex,
+    ):
+        self.place_name = place.name
+        self._context = context
+        self._place_index = place_index
+        self._started_at = time.perf_counter()
+        self._finished_at: Dict[Tuple[str, int], float] = {}
+        self._tasks: Dict[Tuple[str, int], asyncio.Task] = {}
+
+        for tool_name in tools:
+            key = (tool_name, place.subproject_id)
+            self._tasks[key] = asyncio.ensure_future(
+                self._run(key, executor, tool_name, {"place_name": place.name}, context)
+            )
+        logger.info(f"🔮 Speculating {list(tools)}({place.name})")
+
+    async def _run(self, key, executor, tool_name, args, context):
+        try:
+            return await executor.execute(tool_name, args, context)
+        finally:
+            self._finished_at[key] = time.perf_counter()
+
+    def take(self, tool_name: str, args: Dict[str, Any]) -> Optional[asyncio.Task]:
+        """Return the speculative task matching this tool call, or None."""
+        if set(args) - {"place_name"}:
+            return None
+        match = self._place_index.resolve(
+            args.get("place_name", ""), self._context["region_id"], self._context["project_id"]
+        )
+        if match is None:
+            return None
+        key = (tool_name, match.subproject_id)
+        task = self._tasks.pop(key, None)
+        if task is None:
+            return None
+
+        # Latency saved = work already done when the LLM asked for the tool
+        now = time.perf_counter()
+        saved = self._finished_at.get(key, now) - self._started_at
+        metrics.inc("speculation.hits", tool=tool_name)
+        metrics.observe("speculation.saved_ms", saved * 1000, tool=tool_name)
+        logger.info(f"🔮 Speculation hit: {tool_name} (saved ≈{saved * 1000:.0f}ms)")
+        return task
+
+    def finish(self):
+        """Cancel speculative work the LLM never asked for."""
+        for (tool_name, _), task in self._tasks.items():
+            metrics.inc("speculation.misses", tool=tool_name)
+            if not task.done():
+                task.cancel()
+        self._tasks.clear()
+
+
+class Speculator:
+    """Start speculative lookups for a request when a place is recognized."""
+
+    def __init__(self, executor, place_index: PlaceIndex, tools: Iterable[str] = None):
+        self.executor = executor
+        self.place_index = place_index
+        self.tools = list(tools or os.getenv("SPECULATIVE_TOOLS", DEFAULT_SPECULATIVE_TOOLS).split(","))
+
+    def start(self, query: str, context: Dict[str, Any]) -> Optional[Speculation]:
+        place = self.place_index.find_in_text(query, context["region_id"], context["project_id"])
+        if place is None:
+            metrics.inc("speculation.no_place")
+            return None
+        return Speculation(self.executor, context, place, self.tools, self.place_index)
@@ -2,13 +2,18 @@
 TravelAgent: LLM-driven agent with function calling.
 Replaces SemanticRouter + QueryStore pipeline.
 """
-import json
+import asyncio
 import logging
 import os
-from typing import Any, Dict, List, Optional
-
-from langchain_community.chat_models import ChatOllama
+from typing import Any, AsyncIterator, Dict, List, Optional
 
+from agents.chitchat import ChitchatClassifier, ChitchatMatch
+from agents.prompt_builder import PromptBuilder, schema_tokens
+from agents.speculation import Speculation
+from services.llm_client import LLMResponse, OllamaClient, get_ollama_client
+from services.deadline import DeadlineExceeded
+from services.llm_scheduler import LLMBusyError
+from services.tracing import tracer
 from tools.definitions import TRAVEL_TOOLS
 from tools.executor import ToolExecutor
 
@@ -39,6 +44,34 @@ CÁC TOOL CÓ SẴN:
 - Kết thúc bằng câu hỏi gợi ý nếu phù hợp
 """
 
+ERROR_RESPONSE = "Xin lỗi, đã có lỗi xảy ra khi xử lý yêu cầu của bạn. Vui lòng thử lại."
+NO_ANSWER_RESPONSE = "Xin lỗi, tôi không thể tìm được thông tin phù hợp. Bạn có thể thử hỏi cụ thể hơn không ạ?"
+TIMEOUT_RESPONSE = "Xin lỗi, yêu cầu của bạn xử lý quá lâu. Bạn vui lòng thử lại hoặc hỏi cụ thể hơn nhé."
+PARTIAL_HEADER = "Xin lỗi, mình chưa kịp tổng hợp đầy đủ. Đây là thông tin đã tìm được:"
+
+
+def build_partial_answer(gathered: List[tuple]) -> str:
+    """Answer assembled from tool results already gathered when the deadline hit."""
+    lines = []
+    for _, result in gathered:
+        if not result.get("found"):
+            continue
+        if "introduction" in result:
+            lines.append(f"📍 {result['name']}: {result['introduction'][:400]}")
+        elif "location" in result:
+            lines.append(f"📍 {result['name']}: {result['location']}")
+        elif "attractions" in result:
+            names = ", ".join(a["name"] for a in result["attractions"])
+            lines.append(f"🎯 {result['place']}: {names}")
+        elif "media" in result:
+            urls = "\n".join(f"- {m['attraction']}: {m['url']}" for m in result["media"])
+            lines.append(f"🎬 {result['name']}:\n{urls}")
+        elif "places" in result:
+            lines.append("🔎 " + ", ".join(p["name"] for p in result["places"]))
+    if not lines:
+        return TIMEOUT_RESPONSE
+    return "\n".join([PARTIAL_HEADER, *lines])
+
 
 class TravelAgent:
     """LLM Agent với function calling cho travel chatbot."""
@@ -47,135 +80,324 @@ class TravelAgent:
         self,
         executor: ToolExecutor,
         model_name: str = None,
-        max_iterations: int = 3
+        max_iterations: int = 3,
+        llm_client: Optional[OllamaClient] = None,
+        chitchat: Optional[ChitchatClassifier] = None,
     ):
         """
         Args:
             executor: ToolExecutor instance for tool execution
             model_name: Ollama model name (default from env)
             max_iterations: Max tool call iterations
+            llm_client: Shared async Ollama client (default: process-wide pool)
+            chitchat: Small-talk classifier (default: compiled patterns only)
         """
         self.executor = executor
         self.max_iterations = max_iterations
         self.tools = TRAVEL_TOOLS
         
         # Get model from env or default
-        model = model_name or os.getenv("OLLAMA_MODEL", "qwen2.5:7b")
+        self.model = model_name or os.getenv("OLLAMA_MODEL", "qwen2.5:7b")
+        self.temperature = 0.2
         
-        self.llm = ChatOllama(
-            model=model,
-            temperature=0.2,
-            base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
-        )
+        # Async client over a shared keep-alive pool (never blocks the event loop)
+        self.llm = llm_client or get_ollama_client()
+        
+        # Token-budgeted prompt assembly (compact tool results, trim history)
+        self.prompt_builder = PromptBuilder(static_overhead=schema_tokens(self.tools))
+        
+        # Multilingual small talk answered without the LLM
+        self.chitchat = chitchat or ChitchatClassifier()
         
-        logger.info(f"TravelAgent initialized with model: {model}")
+        logger.info(f"TravelAgent initialized with model: {self.model}")
 
     async def run(
         self,
         query: str,
         context: Dict[str, Any],
-        chat_history: Optional[List[Dict]] = None
+        chat_history: Optional[List[Dict]] = None,
+        planned_call: Optional[Dict[str, Any]] = None,
+        speculation: Optional[Speculation] = None,
+        language: Optional[str] = None,
     ) -> str:
         """
         Main agent loop.
         
         Args:
             query: User question
-            context: {region_id, project_id, user_location}
+            context: {region_id, project_id, user_location, deadline}
+                (deadline: optional services.deadline.Deadline for the whole request)
             chat_history: Previous messages for context
+            planned_call: Tool call chosen by the fast path ({name, args});
+                skips LLM tool selection, only one LLM call for synthesis
+            speculation: Speculative tool results started before the LLM call
+            language: Client language hint (small-talk reply language)
             
         Returns:
             Final response string
         """
-        # Check for chitchat first (no tool needed)
-        if self._is_chitchat(query):
-            return await self._handle_chitchat(query)
+        final_response = ""
+        async for event in self.run_stream(
+            query, context, chat_history, planned_call, speculation, language
+        ):
+            if event["event"] == "final":
+                final_response = event["data"]
+        return final_response
+
+    async def run_stream(
+        self,
+        query: str,
+        context: Dict[str, Any],
+        chat_history: Optional[List[Dict]] = None,
+        planned_call: Optional[Dict[str, Any]] = None,
+        speculation: Optional[Speculation] = None,
+        language: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Agent loop dạng streaming.
         
-        messages = [
-            {"role": "system", "content": SYSTEM_PROMPT}
-        ]
+        Yields events:
+            {"event": "tool_start", "data": {"tool", "args"}}
+            {"event": "tool_end", "data": {"tool", "found"}}
+            {"event": "token", "data": "<text chunk>"}
+            {"event": "reset", "data": None}  (discard tokens streamed so far:
+                they were a tool-calling turn's preamble or a failed attempt)
+            {"event": "deadline", "data": {"partial": bool}}  (request deadline passed)
+            {"event": "final", "data": "<full response>"}
         
-        # Add chat history (last 3 turns = 6 messages)
-        if chat_history:
-            messages.extend(chat_history[-6:])
+        When context["deadline"] passes, the running LLM call / tools are
+        cancelled and the final answer is built from tool results so far.
+        """
+        # Check for chitchat first (no tool, no LLM)
+        chitchat = await self._match_chitchat(query, language, context, planned=bool(planned_call))
+        if chitchat is not None:
+            reply = chitchat.reply
+            yield {"event": "token", "data": reply}
+            yield {"event": "final", "data": reply}
+            return
         
-        messages.append({"role": "user", "content": query})
+        messages = self._build_messages(query, chat_history)
+        history_count = len(messages) - 2
         
-        for iteration in range(self.max_iterations):
-            logger.debug(f"Agent iteration {iteration + 1}/{self.max_iterations}")
+        # Prompt-size telemetry: tokens sent vs. what the uncompacted prompt would be
+        stats = {"raw_tokens": 0, "sent_tokens": 0, "tool_savings": 0, "calls": 0}
+        
+        deadline = context.get("deadline")
+        gathered: List[tuple] = []  # (tool_name, result) for a partial answer
+        
+        tools = self.tools
+        max_iterations = self.max_iterations
+        if planned_call:
+            # Fast path: tool already chosen → execute it (first iteration), then one synthesis call
+            planned_call = {"id": "call_0", "args": {}, **planned_call}
+            messages.append(LLMResponse(content="", tool_calls=[planned_call]).as_message())
+            tools = None
+            max_iterations = 1
+        
+        for iteration in range(max_iterations):
+            logger.debug(f"Agent iteration {iteration + 1}/{max_iterations}")
+            streamed = False  # tokens of this turn already sent to the client
+            content_parts = []
+            raw_tool_calls = []
             
-            try:
-                # Call LLM with tools
-                response = self.llm.invoke(
-                    messages,
-                    tools=self.tools,
-                    tool_choice="auto"
-                )
+            with tracer.span("agent.iteration", iteration=iteration + 1, region=context.get("region_id")) as span:
+                try:
+                    if planned_call:
+                        # Inside the guard: deadline / tool errors degrade like any other turn
+                        async for event in self._execute_tool_calls(
+                            [planned_call], messages, context, stats, gathered=gathered
+                        ):
+                            yield event
+                        planned_call = None
+                    
+                    # Fit the conversation into the token budget
+                    prompt, tokens_before, tokens_after = self.prompt_builder.fit(
+                        messages, history_count
+                    )
+                    span.set_attribute("prompt_tokens", tokens_after)
+                    stats["raw_tokens"] += tokens_before + stats["tool_savings"]
+                    stats["sent_tokens"] += tokens_after
+                    stats["calls"] += 1
+                
+                    # Call LLM with tools (async stream, shared connection pool)
+                    stream = self.llm.chat_stream(
+                        prompt,
+                        tools=tools,
+                        model=self.model,
+                        temperature=self.temperature,
+                    )
+                    if deadline is not None:
+                        deadline.check("llm")
+                        stream = deadline.iterate(stream, "llm")
+                    async for chunk in stream:
+                        message = chunk.get("message") or {}
+                        if message.get("content"):
+                            content_parts.append(message["content"])
+                            streamed = True
+                            yield {"event": "token", "data": message["content"]}
+                        raw_tool_calls.extend(message.get("tool_calls") or [])
                 
-                # Check for tool calls
-                if hasattr(response, 'tool_calls') and response.tool_calls:
-                    for tool_call in response.tool_calls:
-                        tool_name = tool_call.get("name")
-                        tool_args = tool_call.get("args", {})
-                        
-                        logger.info(f"🔧 Tool call: {tool_name}({tool_args})")
-                        
-                        # Execute tool
-                        result = await self.executor.execute(
-                            tool_name, tool_args, context
-                        )
-                        
-                        # Add tool result to messages
-                        messages.append({
-                            "role": "assistant",
-                            "content": None,
-                            "tool_calls": [tool_call]
-                        })
-                        messages.append({
-                            "role": "tool",
-                            "tool_call_id": tool_call.get("id", tool_name),
-                            "content": json.dumps(result, ensure_ascii=False)
-                        })
-                else:
-                    # No tool calls = final answer
-                    final_response = response.content.strip()
-                    logger.info(f"✅ Final response: {final_response[:100]}...")
-                    return final_response
+                    response = self.llm.parse_response({
+                        "message": {
+                            "content": "".join(content_parts),
+                            "tool_calls": raw_tool_calls,
+                        }
+                    })
+                
+                    # Check for tool calls
+                    span.set_attribute("tool_calls", len(response.tool_calls))
+                    if response.tool_calls:
+                        if streamed:
+                            # Text before the tool calls was not the answer
+                            yield {"event": "reset", "data": None}
+                        messages.append(response.as_message())
+                        async for event in self._execute_tool_calls(
+                            response.tool_calls, messages, context, stats, speculation, gathered
+                        ):
+                            yield event
+                    else:
+                        # No tool calls = final answer
+                        final_response = response.content
+                        logger.info(f"✅ Final response: {final_response[:100]}...")
+                        self._record_prompt_stats(stats)
+                        yield {"event": "final", "data": final_response}
+                        return
                     
-            except Exception as e:
-                logger.error(f"Agent error in iteration {iteration + 1}: {e}")
-                if iteration == self.max_iterations - 1:
-                    return f"Xin lỗi, đã có lỗi xảy ra khi xử lý yêu cầu của bạn. Vui lòng thử lại."
+                except LLMBusyError:
+                    # Shed load: let the API answer "busy" instead of a fake answer
+                    self._record_prompt_stats(stats)
+                    raise
+                except DeadlineExceeded as e:
+                    # Out of time: answer with what we have instead of working on
+                    logger.warning(f"⏱️ {e} (iteration {iteration + 1}, {len(gathered)} tool results)")
+                    span.set_attribute("deadline_exceeded", True)
+                    self._record_prompt_stats(stats)
+                    if content_parts and not raw_tool_calls:
+                        partial = "".join(content_parts).rstrip() + "…"
+                    else:
+                        partial = build_partial_answer(gathered)
+                        if streamed:
+                            yield {"event": "reset", "data": None}
+                    yield {"event": "deadline", "data": {"partial": partial != TIMEOUT_RESPONSE}}
+                    yield {"event": "final", "data": partial}
+                    return
+                except Exception as e:
+                    logger.error(f"Agent error in iteration {iteration + 1}: {e}")
+                    span.record_error(e)
+                    if streamed:
+                        # Client already shows part of this attempt: no retry on top of it
+                        self._record_prompt_stats(stats)
+                        yield {"event": "reset", "data": None}
+                        yield {"event": "final", "data": ERROR_RESPONSE}
+                        return
+                    if iteration == max_iterations - 1:
+                        self._record_prompt_stats(stats)
+                        yield {"event": "final", "data": ERROR_RESPONSE}
+                        return
         
         # Max iterations reached, try to synthesize from what we have
-        return "Xin lỗi, tôi không thể tìm được thông tin phù hợp. Bạn có thể thử hỏi cụ thể hơn không ạ?"
-
-    def _is_chitchat(self, query: str) -> bool:
-        """Quick check for chitchat queries that don't need tools."""
-        chitchat_keywords = [
-            "xin chào", "chào bạn", "hello", "hi ", "hey",
-            "cảm ơn", "thanks", "thank you", "cám ơn",
-            "tạm biệt", "bye", "goodbye",
-            "bạn khỏe không", "bạn là ai", "tên bạn là gì",
-        ]
-        query_lower = query.lower().strip()
-        return any(kw in query_lower for kw in chitchat_keywords)
+        self._record_prompt_stats(stats)
+        yield {"event": "final", "data": NO_ANSWER_RESPONSE}
+
+    def _record_prompt_stats(self, stats: Dict[str, int]):
+        if stats["calls"]:
+            self.prompt_builder.record_request(
+                stats["raw_tokens"], stats["sent_tokens"], stats["calls"]
+            )
 
-    async def _handle_chitchat(self, query: str) -> str:
-        """Handle chitchat without using tools."""
-        query_lower = query.lower()
+    def _build_messages(
+        self, query: str, chat_history: Optional[List[Dict]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Build the conversation with a cache-friendly layout.
         
-        if any(kw in query_lower for kw in ["xin chào", "chào", "hello", "hi"]):
-            return "Xin chào bạn! 👋 Mình là T-Bot, hướng dẫn viên du lịch AI. Bạn muốn tìm hiểu về địa điểm nào không ạ?"
+        The static prefix (SYSTEM_PROMPT + tool schema, both byte-identical on
+        every call) always comes first so Ollama can reuse its KV cache; the
+        history is reduced to role/content so extra fields (timestamps) never
+        change the serialized prompt.
+        """
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT}
+        ]
         
-        if any(kw in query_lower for kw in ["cảm ơn", "thanks", "cám ơn"]):
-            return "Dạ không có chi ạ! 😊 Bạn cần hỗ trợ gì thêm không nhé?"
+        # Add chat history (last 3 turns = 6 messages)
+        if chat_history:
+            messages.extend(
+                {"role": m["role"], "content": m["content"]}
+                for m in chat_history[-6:]
+                if m.get("role") in ("user", "assistant")
+            )
         
-        if any(kw in query_lower for kw in ["tạm biệt", "bye"]):
-            return "Tạm biệt bạn! Chúc bạn có chuyến đi vui vẻ nhé! 🌟"
+        messages.append({"role": "user", "content": query})
+        return messages
+
+    async def warmup(self) -> bool:
+        """Load the model and prefill the static prompt prefix (system prompt + tools)."""
+        return await self.llm.warmup(
+            messages=self._build_messages("xin chào"),
+            tools=self.tools,
+            model=self.model,
+        )
+
+    async def _execute_tool_calls(
+        self,
+        tool_calls: List[Dict[str, Any]],
+        messages: List[Dict[str, Any]],
+        context: Dict[str, Any],
+        stats: Dict[str, int],
+        speculation: Optional[Speculation] = None,
+        gathered: Optional[List[tuple]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Execute one turn of tool calls, append compacted results to messages, yield tool events."""
+        for tool_call in tool_calls:
+            logger.info(f"🔧 Tool call: {tool_call['name']}({tool_call['args']})")
+            yield {"event": "tool_start", "data": {"tool": tool_call["name"], "args": tool_call["args"]}}
+        
+        # Reuse speculative results the LLM actually asked for
+        prefetched = None
+        if speculation is not None:
+            prefetched = [speculation.take(tc["name"], tc["args"]) for tc in tool_calls]
         
-        if "bạn là ai" in query_lower or "tên bạn" in query_lower:
-            return "Mình là T-Bot, trợ lý du lịch AI của bạn. Mình có thể giúp bạn tìm thông tin về các địa điểm du lịch, video, hướng dẫn đường đi và nhiều thứ khác nữa! 🗺️"
+        # Execute independent tools of this turn concurrently
+        results = await self.executor.execute_many(tool_calls, context, prefetched=prefetched)
         
-        # Default chitchat response
-        return "Mình là T-Bot, sẵn sàng hỗ trợ bạn về các địa điểm du lịch. Bạn muốn tìm hiểu gì ạ?"
+        # Add tool results to messages (original call order)
+        for tool_call, result in zip(tool_calls, results):
+            yield {"event": "tool_end", "data": {"tool": tool_call["name"], "found": bool(result.get("found"))}}
+            if gathered is not None:
+                gathered.append((tool_call["name"], result))
+            content, raw_tokens, compact_tokens = self.prompt_builder.compact_tool_result(result)
+            stats["tool_savings"] += raw_tokens - compact_tokens
+            messages.append({
+                "role": "tool",
+                "tool_name": tool_call["name"],
+                "content": content
+            })
+
+    async def _match_chitchat(
+        self, query: str, language: Optional[str], context: Dict[str, Any], planned: bool = False
+    ) -> Optional[ChitchatMatch]:
+        """
+        Small talk → canned reply (compiled patterns; embedding fallback off the loop).
+
+        No embedding fallback when the fast path already planned a tool or the
+        query names a known place: that is a travel question, not small talk.
+        """
+        match = self.chitchat.match(query, language)
+        if (
+            match is None
+            and not planned
+            and self.chitchat.should_fallback(query)
+            and not self._mentions_place(query, context)
+        ):
+            try:
+                match = await asyncio.to_thread(self.chitchat.match_semantic, query, language)
+            except Exception as e:
+                logger.warning(f"Chitchat semantic fallback failed: {e}")
+        return match
+
+    def _mentions_place(self, query: str, context: Dict[str, Any]) -> bool:
+        place_index = self.executor.place_index
+        return place_index is not None and place_index.find_in_text(
+            query, context.get("region_id", 0), context.get("project_id", 1)
+        ) is not None
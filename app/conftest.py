@@ -0,0 +1,7 @@
+# conftest.py
+"""Cho phép chạy pytest từ root repo: module của app được import như khi chạy main.py."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,34 @@
+"""
+Build materialized place cards: SQL Server → local SQLite (services/place_cards.py).
+Usage: python jobs/build_place_cards.py [--region REGION_ID]
+"""
+import argparse
+import logging
+import os
+import sys
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db import get_db_manager
+from services.place_cards import rebuild_regions
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def build(region_id: int = None):
+    """Rebuild cards of one region (or all 4)."""
+    db_manager = get_db_manager()
+    regions = [region_id] if region_id is not None else list(db_manager.DB_MAP)
+    built = rebuild_regions(db_manager, regions)
+    logger.info(f"Place cards built: {built}")
+    return 0 if len(built) == len(regions) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build place cards SQL → SQLite")
+    parser.add_argument("--region", type=int, help="Specific region ID (0-3)")
+    args = parser.parse_args()
+
+    sys.exit(build(args.region))
@@ -0,0 +1,34 @@
+"""
+Export catalog tables: SQL Server → local read-only SQLite snapshot (services/catalog_snapshot.py).
+Usage: python jobs/export_catalog_snapshot.py [--region REGION_ID]
+"""
+import argparse
+import logging
+import os
+import sys
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db import get_db_manager
+from services.catalog_snapshot import export_regions
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def export(region_id: int = None):
+    """Export one region (or all 4) and swap the snapshot files."""
+    db_manager = get_db_manager()
+    regions = [region_id] if region_id is not None else list(db_manager.DB_MAP)
+    exported = export_regions(db_manager, regions)
+    logger.info(f"Catalog snapshot exported: {exported}")
+    return 0 if len(exported) == len(regions) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export catalog SQL → SQLite snapshot")
+    parser.add_argument("--region", type=int, help="Specific region ID (0-3)")
+    args = parser.parse_args()
+
+    sys.exit(export(args.region))
@@ -12,8 +12,10 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sentence_transformers import SentenceTransformer
-from database.db import MultiDBManager
+from database.db import get_db_manager
 from rag.vector_store import TravelVectorStore
+from services.place_cards import rebuild_regions
+from services.sync_events import publish_region_synced
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger(__name__)
@@ -24,15 +26,21 @@ async def sync_all():
     logger.info("Starting full vector sync...")
 
     embedder = SentenceTransformer("intfloat/multilingual-e5-small")
-    db_manager = MultiDBManager()
+    db_manager = get_db_manager()
     store = TravelVectorStore(
         embedder=embedder,
         host=os.getenv("QDRANT_HOST", "localhost"),
         port=int(os.getenv("QDRANT_PORT", "6333")),
     )
 
-    count = await store.index_from_database(db_manager)
+    count, failed = await store.index_from_database(db_manager)
+    synced = [region_id for region_id in db_manager.DB_MAP if region_id not in failed]
+    rebuild_regions(db_manager, synced)
+    for region_id in synced:
+        publish_region_synced(region_id)
     stats = store.get_stats()
+    if failed:
+        logger.warning(f"Sync partial: regions {failed} failed and were not published")
     logger.info(f"Sync complete: {count} docs indexed | {stats}")
     return count
 
@@ -42,7 +50,7 @@ async def sync_region(region_id: int):
     logger.info(f"Syncing region {region_id}...")
 
     embedder = SentenceTransformer("intfloat/multilingual-e5-small")
-    db_manager = MultiDBManager()
+    db_manager = get_db_manager()
     store = TravelVectorStore(
         embedder=embedder,
         host=os.getenv("QDRANT_HOST", "localhost"),
@@ -50,6 +58,8 @@ async def sync_region(region_id: int):
     )
 
     count = await store.index_region(db_manager, region_id)
+    rebuild_regions(db_manager, [region_id])
+    publish_region_synced(region_id)
     logger.info(f"Region {region_id} sync complete: {count} docs")
     return count
 
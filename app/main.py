@@ -1,5 +1,7 @@
 # ===== 1. Standard library imports =====
+import asyncio
 import io
+import json
 import os
 import uuid
 from datetime import datetime, timedelta
@@ -8,27 +10,34 @@ from os import getenv
 from typing import List, Optional
 
 
-from database.db import MultiDBManager
-from deep_translator import GoogleTranslator
+from database.db import get_db_manager
 
 # ===== 2. Third-party imports =====
 from fastapi import Body, Depends, FastAPI, File, Form, HTTPException, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer
 from services.chat_manager import ChatManager
+from services.deadline import Deadline
 from services.storage import GCStorage
 from google import genai
 from google.genai.types import GenerateContentConfig, ImageConfig, Modality, Part
-from langdetect import detect
 from PIL import Image
 from fastapi.staticfiles import StaticFiles
 
 # ===== 3. Local project imports =====
-from pipeline import GraphOrchestrator
+from pipeline import BUSY_RESPONSE, GraphOrchestrator
 from pydantic import BaseModel
 from security.middleware import jwt_middleware
+from services.llm_client import get_ollama_client
+from services.llm_scheduler import LLMBusyError
+from services.metrics import metrics
+from services.language import get_language_detector
+from services.tracing import tracer
+from services.translation import get_translation_service
 from tasks.sync_tasks import sync_all_regions, sync_single_region
+from tools.bulk import PlaceBulkLoader
 
 security = HTTPBearer()
 app = FastAPI(
@@ -73,9 +82,36 @@ def custom_openapi():
 
 app.openapi = custom_openapi
 # --- deps ---
-bot = GraphOrchestrator()
-db_manager = MultiDBManager()
+db_manager = get_db_manager()  # same pools as the pipeline
 chat_sessions = ChatManager(db_manager=db_manager, session_timeout=1800)
+bot = GraphOrchestrator(chat_manager=chat_sessions)  # follow-ups read these sessions' history
+bulk_loader = PlaceBulkLoader(bot.executor)
+
+
+@app.on_event("startup")
+async def warmup_llm():
+    """Warm-up model Ollama + giữ model resident khi idle."""
+    await bot.warmup()
+    if db_manager.warmup_connections:
+        await asyncio.to_thread(db_manager.warm_up)
+    app.state.llm_keep_alive = asyncio.create_task(get_ollama_client().keep_alive_loop())
+
+
+@app.on_event("shutdown")
+async def close_llm_client():
+    """Đóng connection pool Ollama dùng chung."""
+    keep_alive_task = getattr(app.state, "llm_keep_alive", None)
+    if keep_alive_task:
+        keep_alive_task.cancel()
+    await get_ollama_client().aclose()
+    db_manager.close()
+
+# Seconds clients should wait before retrying when the LLM queue is full
+BUSY_RETRY_AFTER = getenv("LLM_BUSY_RETRY_AFTER", "5")
+
+# Bulk place data: max places per request / above this many the response is streamed
+BULK_MAX_PLACES = int(getenv("BULK_MAX_PLACES", "5000"))
+BULK_STREAM_THRESHOLD = int(getenv("BULK_STREAM_THRESHOLD", "50"))
 
 # --- GCS (for image generation only) ---
 GCS_image = "guidepassasia_image_generation"
@@ -86,12 +122,32 @@ class TextRequest(BaseModel):
     text: str
 
 
+class BulkTranslateRequest(BaseModel):
+    texts: List[str]
+    target_lang: str = "en"
+    source_lang: str = "auto"
+
+
 class ChatRequest(BaseModel):
     text: str
     user_geography: str
     project_id: int
     region_id: int
     session_id: str = None
+    language: Optional[str] = None  # Optional client language hint (vi, en, ko...)
+    timeout_ms: Optional[int] = None  # Client's own timeout; server stops work before it
+
+
+class PlaceRef(BaseModel):
+    region_id: int
+    project_id: int
+    place: Optional[str] = None  # Place name (resolved like the chatbot tools)
+    subproject_id: Optional[int] = None
+
+
+class BulkPlacesRequest(BaseModel):
+    places: List[PlaceRef]
+    timeout_ms: Optional[int] = None
 
 
 class ImageGenRequest(BaseModel):
@@ -136,10 +192,10 @@ async def text_to_speech(req: TTSRequest):
     if len(text) > 5000:
         raise HTTPException(400, "Text too long (max 5000 chars)")
     
-    # Map langcode to Chatterbox language_id
-    language_id = req.langcode.lower()
-    if language_id not in LANGUAGE_MAP:
-        language_id = "en"  # Default to English if unsupported
+    # Map langcode to Chatterbox language_id (detect from text if missing/unsupported)
+    language_id = get_language_detector().detect(
+        text, hint=req.langcode, supported=LANGUAGE_MAP, default="en"
+    )
     
     # Submit to Celery queue with custom ID
     task = generate_tts.apply_async(
@@ -193,12 +249,56 @@ async def text_translate(req: TextRequest, target_lang: str = "en"):
     if len(text) > 5000:
         return {"error": "Text must be under 5000 characters"}
     try:
-        translated = GoogleTranslator(source="auto", target=target_lang).translate(text)
+        translated = await get_translation_service().translate(text, target_lang)
         return {"translated_text": translated}
     except Exception as e:
         return {"error": f"translation_failed: {e}"}
 
 
+@app.post("/api/text-translate/bulk")
+async def text_translate_bulk(req: BulkTranslateRequest):
+    """Translate many strings in one call (cached, duplicates translated once)."""
+    if not req.texts:
+        return {"error": "texts cannot be empty"}
+    if len(req.texts) > 200:
+        return {"error": "At most 200 texts per request"}
+    if any(len(t) > 5000 for t in req.texts):
+        return {"error": "Each text must be under 5000 characters"}
+    try:
+        translated = await get_translation_service().translate_many(
+            [t.strip() for t in req.texts], req.target_lang, req.source_lang
+        )
+        return {"translated_texts": translated}
+    except Exception as e:
+        return {"error": f"translation_failed: {e}"}
+
+
+# ---------- METRICS ----------
+@app.get("/api/metrics")
+async def get_metrics():
+    """In-process counters / histograms (fast path, caches, latency...)."""
+    return metrics.snapshot()
+
+
+@app.get("/api/db/pools")
+async def get_db_pools():
+    """Connection pool state per region (size, checked out, overflow, queued SQL)."""
+    return db_manager.pool_stats()
+
+
+@app.get("/api/traces")
+async def get_traces(limit: int = 20, format: str = "summary"):
+    """
+    Recent request traces (per-stage spans).
+
+    Args:
+        format: "summary" (compact JSON) or "otlp" (OTLP/JSON, OpenTelemetry-compatible)
+    """
+    if format == "otlp":
+        return tracer.to_otlp(tracer.recent(limit))
+    return tracer.summarize(limit)
+
+
 # ---------- VECTOR SYNC ----------
 @app.post("/api/sync-vectors")
 async def trigger_vector_sync(region_id: Optional[int] = None):
@@ -221,13 +321,23 @@ async def chatbot_response(req: ChatRequest):
         session_id = session.session_id
 
     # V2: TravelAgent with function calling (async)
-    result = await bot.run(
-        session_id=session_id,
-        user_question=req.text,
-        user_location=req.user_geography,
-        project_id=req.project_id,
-        region_id=req.region_id,
-    )
+    try:
+        result = await bot.run(
+            session_id=session_id,
+            user_question=req.text,
+            user_location=req.user_geography,
+            project_id=req.project_id,
+            region_id=req.region_id,
+            language=req.language,
+            deadline=Deadline.for_request(req.timeout_ms),
+        )
+    except LLMBusyError:
+        # Shed load fast instead of queueing behind a saturated LLM
+        return JSONResponse(
+            status_code=503,
+            content={"Message": BUSY_RESPONSE, "location": None, "audio": None, "session_id": session_id},
+            headers={"Retry-After": BUSY_RETRY_AFTER},
+        )
 
     # Save to session history
     response_text = result.get("Message", "") if isinstance(result, dict) else str(result)
@@ -237,6 +347,96 @@ async def chatbot_response(req: ChatRequest):
     return result
 
 
+@app.post("/api/chatbot-response/stream")
+async def chatbot_response_stream(req: ChatRequest, format: str = "sse"):
+    """
+    Streaming variant of /api/chatbot-response.
+
+    Emits agent events (tool_start, tool_end), answer tokens as Ollama
+    produces them, then a final "done" event carrying the same payload
+    as the non-streaming endpoint. A "reset" event tells the client to
+    drop the tokens received so far (tool-call preamble, failed attempt).
+
+    Args:
+        format: "sse" (text/event-stream) or "ndjson" (chunked JSON lines)
+    """
+    session_id = req.session_id
+    session = chat_sessions.get_session(session_id) if session_id else None
+
+    if not session:
+        session = chat_sessions.create_session(req.region_id, session_id=session_id)
+        session_id = session.session_id
+
+    use_sse = format != "ndjson"
+
+    def encode(event: dict) -> str:
+        data = json.dumps(event["data"], ensure_ascii=False)
+        if use_sse:
+            return f"event: {event['event']}\ndata: {data}\n\n"
+        return json.dumps(event, ensure_ascii=False) + "\n"
+
+    async def event_stream():
+        busy = False
+        async for event in bot.run_stream(
+            session_id=session_id,
+            user_question=req.text,
+            user_location=req.user_geography,
+            project_id=req.project_id,
+            region_id=req.region_id,
+            language=req.language,
+            deadline=Deadline.for_request(req.timeout_ms),
+        ):
+            if event["event"] == "busy":
+                busy = True
+                event = {"event": "busy", "data": {"retry_after": int(BUSY_RETRY_AFTER)}}
+            elif event["event"] == "done" and not busy:
+                session.add_message("user", req.text)
+                session.add_message("assistant", event["data"].get("Message", ""))
+            yield encode(event)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ---------- BULK PLACE DATA ----------
+@app.post("/api/places/bulk")
+async def places_bulk(req: BulkPlacesRequest, format: Optional[str] = None):
+    """
+    Info, location, attractions and media of many places in one call (POI screens).
+
+    Places are loaded with set-based SQL per region (IN lists), not one
+    query per place.
+
+    Args:
+        format: "json" (ordered {"results": [...]}) or "ndjson" (one line per
+            place with its "index", in completion order). Default: ndjson when
+            more than BULK_STREAM_THRESHOLD places.
+    """
+    if len(req.places) > BULK_MAX_PLACES:
+        raise HTTPException(413, f"Too many places (max {BULK_MAX_PLACES})")
+
+    refs = [p.dict() for p in req.places]
+    deadline = Deadline.for_request(req.timeout_ms)
+    stream = format == "ndjson" or (format is None and len(refs) > BULK_STREAM_THRESHOLD)
+
+    if not stream:
+        results = await bulk_loader.load_all(refs, deadline)
+        return {"results": results, "count": len(results)}
+
+    async def lines():
+        async for index, result in bulk_loader.load(refs, deadline):
+            yield json.dumps({"index": index, **result}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/api/generate-image")
 def generate_image(req: ImageGenRequest):
     """
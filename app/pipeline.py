@@ -6,17 +6,43 @@ Flow:
 2. ToolExecutor → SQL query / Qdrant vector search → result
 3. LLM synthesizes response
 """
+import asyncio
 import logging
 import os
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict, List, Optional
 
-from database.db import MultiDBManager
-from agents.travel_agent import TravelAgent
+from database.db import get_db_manager
+from agents.travel_agent import (
+    ERROR_RESPONSE,
+    NO_ANSWER_RESPONSE,
+    TIMEOUT_RESPONSE,
+    TravelAgent,
+)
 from tools.executor import ToolExecutor
+from services.answer_cache import AnswerCache, normalize_query
 from services.chat_manager import ChatManager
+from services.deadline import Deadline
+from services.language import get_language_detector
+from services.llm_scheduler import LLMBusyError
+from services.single_flight import SingleFlight
+from services.sync_events import get_region_versions
+from services.tool_cache import ToolResultCache
+from services.tracing import TracedEmbedder, tracer
 
 logger = logging.getLogger(__name__)
 
+PIPELINE_ERROR_RESPONSE = "Xin lỗi, đã có lỗi xảy ra. Vui lòng thử lại."
+BUSY_RESPONSE = "Xin lỗi, hệ thống đang quá tải. Bạn vui lòng thử lại sau ít giây nhé."
+
+# Fallback answers are never cached
+UNCACHEABLE_RESPONSES = {
+    ERROR_RESPONSE,
+    NO_ANSWER_RESPONSE,
+    PIPELINE_ERROR_RESPONSE,
+    BUSY_RESPONSE,
+    TIMEOUT_RESPONSE,
+}
+
 
 class GraphOrchestrator:
     """
@@ -24,37 +50,89 @@ class GraphOrchestrator:
     Replaces SemanticRouter + QueryStore + Reranker pipeline.
     """
 
-    def __init__(self):
+    def __init__(self, chat_manager: Optional[ChatManager] = None):
+        """
+        Args:
+            chat_manager: Session store of the API (main.chat_sessions). Must be the
+                same instance the endpoints write turns to: a question is only
+                answer-cached / coalesced when its session has no prior turns.
+        """
         # Database
-        self.db_manager = MultiDBManager()
+        self.db_manager = get_db_manager()
+
+        # Embedder shared by vector store and answer cache
+        self.embedder = self._init_embedder()
 
         # Vector store (graceful fallback if Qdrant not available)
-        vector_store = self._init_vector_store()
+        vector_store = self._init_vector_store(self.embedder)
+
+        # Local read-only copy of the catalog tables (used while fresh)
+        self.snapshot = self._init_snapshot()
+
+        # Place name → SubProjectID (in memory, refreshed on region sync)
+        self.place_index = self._init_place_index()
 
-        # ToolExecutor with optional vector search
+        # ToolExecutor with optional vector search, materialized place cards
+        # and read-through result cache
         self.executor = ToolExecutor(
             db_manager=self.db_manager,
             vector_store=vector_store,
+            place_index=self.place_index,
+            cache=ToolResultCache(),
+            cards=self._init_place_cards(),
+            snapshot=self.snapshot,
         )
 
-        # TravelAgent (LLM + function calling)
-        self.agent = TravelAgent(executor=self.executor)
+        # TravelAgent (LLM + function calling, small talk answered locally)
+        self.agent = TravelAgent(
+            executor=self.executor,
+            chitchat=self._init_chitchat(self.embedder),
+        )
+
+        # Chat session manager (shared with the API so follow-ups see their history)
+        self.chat_manager = chat_manager or ChatManager(db_manager=self.db_manager)
+
+        # Follow-up pronouns → last place of the session (rules only, before the agent)
+        self.reflection = self._init_reflection()
+
+        # Answer cache (exact + semantic, invalidated by region sync)
+        self.answer_cache = AnswerCache(embedder=self.embedder)
 
-        # Chat session manager
-        self.chat_manager = ChatManager(db_manager=self.db_manager)
+        # Language ID (client hint > script > words > langdetect > session)
+        self.language_detector = get_language_detector()
+
+        # Coalesce identical concurrent questions into one agent run
+        self.inflight = SingleFlight(name="chat.inflight")
+
+        # Fast path: deterministic tool dispatch for high-confidence questions
+        self.fast_path = self._init_fast_path(self.embedder)
+
+        # Speculative tool pre-execution (optional)
+        self.speculator = self._init_speculator()
 
         logger.info(
             f"GraphOrchestrator V2 initialized | "
-            f"vector_store={'✅' if vector_store else '❌ (SQL only)'}"
+            f"vector_store={'✅' if vector_store else '❌ (SQL only)'} | "
+            f"fast_path={'✅' if self.fast_path else '❌'}"
         )
 
-    def _init_vector_store(self):
-        """Initialize TravelVectorStore, return None if Qdrant unavailable."""
+    def _init_embedder(self):
+        """Load multilingual-e5-small, return None if unavailable."""
         try:
             from sentence_transformers import SentenceTransformer
+
+            return TracedEmbedder(SentenceTransformer("intfloat/multilingual-e5-small"))
+        except Exception as e:
+            logger.warning(f"Embedder unavailable: {e}")
+            return None
+
+    def _init_vector_store(self, embedder):
+        """Initialize TravelVectorStore, return None if Qdrant unavailable."""
+        if embedder is None:
+            return None
+        try:
             from rag.vector_store import TravelVectorStore
 
-            embedder = SentenceTransformer("intfloat/multilingual-e5-small")
             store = TravelVectorStore(
                 embedder=embedder,
                 host=os.getenv("QDRANT_HOST", "localhost"),
@@ -66,6 +144,96 @@ class GraphOrchestrator:
             logger.warning(f"TravelVectorStore unavailable: {e} — running SQL only")
             return None
 
+    def _init_snapshot(self):
+        """CatalogSnapshot (exported by jobs/export_catalog_snapshot.py), None if disabled."""
+        if os.getenv("CATALOG_SNAPSHOT_ENABLED", "true").lower() != "true":
+            return None
+        from services.catalog_snapshot import CatalogSnapshot
+
+        return CatalogSnapshot()
+
+    def _init_place_index(self):
+        """Load PlaceIndex for every region, return None if disabled."""
+        if os.getenv("PLACE_INDEX_ENABLED", "true").lower() != "true":
+            return None
+        from rag.place_index import PlaceIndex
+
+        return PlaceIndex(db_manager=self.db_manager).load().watch(get_region_versions())
+
+    def _init_place_cards(self):
+        """PlaceCardStore (built by jobs/build_place_cards.py), None if disabled."""
+        if self.place_index is None or os.getenv("PLACE_CARDS_ENABLED", "true").lower() != "true":
+            return None
+        from services.place_cards import PlaceCardStore
+
+        return PlaceCardStore()
+
+    def _init_reflection(self):
+        """Rule-based Reflection over PlaceIndex, None if disabled or no index."""
+        if self.place_index is None or os.getenv("REFLECTION_RULES_ENABLED", "true").lower() != "true":
+            return None
+        from utils.Reflection import Reflection
+
+        return Reflection(llm=None, place_index=self.place_index)
+
+    def _init_chitchat(self, embedder):
+        """ChitchatClassifier with SemanticRouter fallback when the embedder is available."""
+        from agents.chitchat import ChitchatClassifier
+
+        router = None
+        if embedder is not None and os.getenv("CHITCHAT_SEMANTIC_FALLBACK", "true").lower() == "true":
+            try:
+                from agents.SemanticRouter import SemanticRouter
+
+                router = SemanticRouter(embedder)
+            except Exception as e:
+                logger.warning(f"SemanticRouter unavailable: {e} — chitchat patterns only")
+        return ChitchatClassifier(router=router)
+
+    def _init_fast_path(self, embedder):
+        """Initialize FastPathRouter, return None if disabled or unavailable."""
+        if embedder is None or os.getenv("FAST_PATH_ENABLED", "true").lower() != "true":
+            return None
+        try:
+            from agents.fast_path import FastPathRouter
+            from rag.location import LocationStore, NERService
+            from rag.query_store import QueryStore
+
+            ner_service = None
+            if os.getenv("FAST_PATH_USE_NER", "false").lower() == "true":
+                ner_service = NERService(device=os.getenv("NER_DEVICE", "cpu"))
+
+            location_store = LocationStore(
+                ner_service=ner_service,
+                embedder=embedder,
+                db_manager=self.db_manager,
+                snapshot=self.snapshot,
+            )
+            location_store.preload()
+            return FastPathRouter(QueryStore(embedder), location_store)
+        except Exception as e:
+            logger.warning(f"FastPathRouter unavailable: {e} — full agent loop only")
+            return None
+
+    def _init_speculator(self):
+        """Initialize Speculator, return None if disabled or unavailable."""
+        if os.getenv("SPECULATIVE_TOOLS_ENABLED", "false").lower() != "true":
+            return None
+        if self.place_index is None:
+            logger.warning("Speculator needs PLACE_INDEX_ENABLED=true")
+            return None
+        try:
+            from agents.speculation import Speculator
+
+            return Speculator(self.executor, self.place_index)
+        except Exception as e:
+            logger.warning(f"Speculator unavailable: {e}")
+            return None
+
+    async def warmup(self):
+        """Warm the Ollama model so the first request after startup is not cold."""
+        await self.agent.warmup()
+
     async def run(
         self,
         session_id: str,
@@ -73,6 +241,8 @@ class GraphOrchestrator:
         user_location: str,
         project_id: int,
         region_id: int = 0,
+        language: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
     ) -> Dict[str, Any]:
         """
         Main entry point.
@@ -83,35 +253,269 @@ class GraphOrchestrator:
             user_location: User's GPS coordinates
             project_id: Project filter
             region_id: Database region (0-3)
+            language: Client language hint (else detected; part of the answer cache key)
+            deadline: Request deadline (default REQUEST_DEADLINE_SECONDS); past it the
+                agent stops and answers from tool results gathered so far
 
         Returns:
             {"Message": "...", "location": ..., "audio": ..., "session_id": ...}
+
+        Raises:
+            LLMBusyError: LLM queue full — caller should answer busy (503)
         """
-        context = {
-            "region_id": region_id,
-            "project_id": project_id,
-            "user_location": user_location,
-        }
+        with tracer.span("pipeline.run", region=region_id, project=project_id) as span:
+            context = self._build_context(region_id, project_id, user_location, deadline)
+            chat_history = self._get_history(session_id)
+            language = self.language_detector.detect(
+                user_question, hint=language, session_id=session_id, default=None
+            )
 
-        # Get chat history for context
-        session = self.chat_manager.get_session(session_id)
-        chat_history = None
-        if session:
-            chat_history = session.get_history(limit=6)
+            logger.info(f"[Pipeline] Query: {user_question[:80]}... | region={region_id}")
+            query = self._resolve_follow_up(session_id, user_question, chat_history, context)
+
+            # Answer cache + coalescing only for standalone questions (session without
+            # prior turns): a follow-up's answer depends on its own session's history
+            standalone = not chat_history
+            if standalone:
+                cached = await self.answer_cache.get(region_id, project_id, language, user_question)
+                span.set_attribute("cache", "hit" if cached is not None else "miss")
+                if cached is not None:
+                    return self._build_result(cached, session_id)
+
+            if not standalone:
+                response_text = await self._answer(query, context, chat_history, language)
+            else:
+                # Concurrent duplicates (group tours) await one shared execution
+                key = self._inflight_key(region_id, project_id, user_question, language)
+                span.set_attribute("coalesced", self.inflight.in_flight(key))
+                response_text = await self.inflight.do(
+                    key, lambda: self._answer(user_question, context, None, language)
+                )
+
+            span.set_attribute("deadline_exceeded", context["deadline"].expired)
+            return self._build_result(response_text, session_id)
 
-        logger.info(f"[Pipeline] Query: {user_question[:80]}... | region={region_id}")
+    async def _answer(
+        self,
+        user_question: str,
+        context: Dict[str, Any],
+        chat_history: Optional[List[Dict]],
+        language: Optional[str],
+    ) -> str:
+        """Fast path / TravelAgent run + answer cache write. Returns response text."""
+        region_id, project_id = context["region_id"], context["project_id"]
+        planned_call, speculation = await self._prepare(user_question, context)
 
-        # Run TravelAgent (LLM function calling loop)
+        # Run TravelAgent (LLM function calling loop, or synthesis only on fast path)
         try:
             response_text = await self.agent.run(
                 query=user_question,
                 context=context,
                 chat_history=chat_history,
+                planned_call=planned_call,
+                speculation=speculation,
+                language=language,
             )
+        except LLMBusyError:
+            raise
         except Exception as e:
             logger.error(f"[Pipeline] Agent error: {e}", exc_info=True)
-            response_text = "Xin lỗi, đã có lỗi xảy ra. Vui lòng thử lại."
+            response_text = PIPELINE_ERROR_RESPONSE
+        finally:
+            if speculation is not None:
+                speculation.finish()
+
+        # Partial answers (deadline passed) are never cached
+        if self._cacheable(chat_history, response_text, context):
+            await self.answer_cache.set(region_id, project_id, language, user_question, response_text)
+
+        return response_text
+
+    async def run_stream(
+        self,
+        session_id: str,
+        user_question: str,
+        user_location: str,
+        project_id: int,
+        region_id: int = 0,
+        language: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of run().
+
+        Yields agent events (tool_start, tool_end, token, reset) and finally
+        {"event": "done", "data": <same dict as run()>}. When the LLM queue
+        is full a {"event": "busy"} event precedes a done with BUSY_RESPONSE;
+        when the deadline passes a {"event": "deadline"} event precedes a
+        done with the partial answer.
+        """
+        with tracer.span("pipeline.run_stream", region=region_id, project=project_id) as span:
+            context = self._build_context(region_id, project_id, user_location, deadline)
+            chat_history = self._get_history(session_id)
+            language = self.language_detector.detect(
+                user_question, hint=language, session_id=session_id, default=None
+            )
+
+            logger.info(f"[Pipeline] Stream query: {user_question[:80]}... | region={region_id}")
+            query = self._resolve_follow_up(session_id, user_question, chat_history, context)
+
+            standalone = not chat_history
+            if standalone:
+                cached = await self.answer_cache.get(region_id, project_id, language, user_question)
+                span.set_attribute("cache", "hit" if cached is not None else "miss")
+                if cached is not None:
+                    yield {"event": "token", "data": cached}
+                    yield {"event": "done", "data": self._build_result(cached, session_id)}
+                    return
+
+                # Same question already running: join it instead of starting another
+                key = self._inflight_key(region_id, project_id, user_question, language)
+                if self.inflight.in_flight(key):
+                    span.set_attribute("coalesced", True)
+                    try:
+                        shared = await self.inflight.do(
+                            key, lambda: self._answer(user_question, context, None, language)
+                        )
+                    except LLMBusyError:
+                        yield {"event": "busy", "data": None}
+                        yield {"event": "done", "data": self._build_result(BUSY_RESPONSE, session_id)}
+                        return
+                    yield {"event": "token", "data": shared}
+                    yield {"event": "done", "data": self._build_result(shared, session_id)}
+                    return
+
+            planned_call, speculation = await self._prepare(query, context)
+
+            response_text = ""
+            try:
+                async for event in self.agent.run_stream(
+                    query=query,
+                    context=context,
+                    chat_history=chat_history,
+                    planned_call=planned_call,
+                    speculation=speculation,
+                    language=language,
+                ):
+                    if event["event"] == "final":
+                        response_text = event["data"]
+                    else:
+                        yield event
+            except LLMBusyError:
+                yield {"event": "busy", "data": None}
+                response_text = BUSY_RESPONSE
+            except Exception as e:
+                logger.error(f"[Pipeline] Agent stream error: {e}", exc_info=True)
+                response_text = PIPELINE_ERROR_RESPONSE
+            finally:
+                if speculation is not None:
+                    speculation.finish()
+
+            span.set_attribute("deadline_exceeded", context["deadline"].expired)
+            if self._cacheable(chat_history, response_text, context):
+                await self.answer_cache.set(region_id, project_id, language, user_question, response_text)
+
+            yield {"event": "done", "data": self._build_result(response_text, session_id)}
+
+    # =========================================================================
+    # HELPERS
+    # =========================================================================
+
+    async def _prepare(self, query: str, context: Dict[str, Any]):
+        """Fast-path plan + speculation, skipped for small talk. Returns (planned_call, speculation)."""
+        if self.agent.chitchat.match(query) is not None:
+            return None, None
+        planned_call = await self._plan_fast_path(
+            query, context["region_id"], context["project_id"], context["deadline"]
+        )
+        return planned_call, self._start_speculation(query, context, planned_call)
+
+    async def _plan_fast_path(
+        self, query: str, region_id: int, project_id: int, deadline: Deadline
+    ) -> Optional[Dict[str, Any]]:
+        """Fast-path tool decision (embedding work runs off the event loop)."""
+        if self.fast_path is None:
+            return None
+        try:
+            with tracer.span("fast_path.route", region=region_id) as span:
+                planned = await deadline.run(
+                    asyncio.to_thread(self.fast_path.route, query, region_id, project_id),
+                    "fast_path",
+                )
+                span.set_attribute("tool", planned["name"] if planned else None)
+                return planned
+        except Exception as e:
+            logger.warning(f"[Pipeline] Fast path failed: {e}")
+            return None
+
+    def _start_speculation(self, query: str, context: Dict[str, Any], planned_call):
+        """Start likely tool lookups in parallel with the first LLM call."""
+        if self.speculator is None or planned_call is not None:
+            return None
+        try:
+            return self.speculator.start(query, context)
+        except Exception as e:
+            logger.warning(f"[Pipeline] Speculation failed: {e}")
+            return None
+
+    def _resolve_follow_up(
+        self,
+        session_id: str,
+        user_question: str,
+        chat_history: Optional[List[Dict]],
+        context: Dict[str, Any],
+    ) -> str:
+        """Question with follow-up pronouns replaced by the session's last place (else unchanged)."""
+        if self.reflection is None:
+            return user_question
+        try:
+            self.chat_manager.set_ctx(session_id, "region_id", context["region_id"])
+            self.chat_manager.set_ctx(session_id, "project_id", context["project_id"])
+            return self.reflection.rewrite_follow_up(
+                self.chat_manager, session_id, user_question, has_history=bool(chat_history)
+            )
+        except Exception as e:
+            logger.warning(f"[Pipeline] Reflection failed: {e}")
+            return user_question
+
+    @staticmethod
+    def _inflight_key(
+        region_id: int, project_id: int, user_question: str, language: Optional[str]
+    ) -> tuple:
+        return (region_id, project_id, normalize_query(user_question), language or "auto")
+
+    def _build_context(
+        self,
+        region_id: int,
+        project_id: int,
+        user_location: str,
+        deadline: Optional[Deadline] = None,
+    ) -> Dict[str, Any]:
+        return {
+            "region_id": region_id,
+            "project_id": project_id,
+            "user_location": user_location,
+            "deadline": deadline or Deadline.for_request(),
+        }
+
+    @staticmethod
+    def _cacheable(
+        chat_history: Optional[List[Dict]], response_text: str, context: Dict[str, Any]
+    ) -> bool:
+        return (
+            not chat_history
+            and response_text not in UNCACHEABLE_RESPONSES
+            and not context["deadline"].expired
+        )
+
+    def _get_history(self, session_id: str) -> Optional[List[Dict]]:
+        """Get chat history for context."""
+        session = self.chat_manager.get_session(session_id)
+        if session:
+            return session.get_history(limit=6)
+        return None
 
+    def _build_result(self, response_text: str, session_id: str) -> Dict[str, Any]:
         return {
             "Message": response_text,
             "location": None,
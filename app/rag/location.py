@@ -48,23 +48,32 @@ class NERService:
 class LocationStore:
     """In-memory store for location embeddings with semantic matching."""
 
-    def __init__(self, ner_service: NERService, embedder, db_manager):
+    def __init__(self, ner_service: Optional[NERService], embedder, db_manager, snapshot=None):
         self.ner_service = ner_service
         self.embedder = embedder
         self.db_manager = db_manager
+        self.snapshot = snapshot  # CatalogSnapshot, read instead of SQL Server when fresh
         self._store: Dict = {}
 
         logger.info("LocationStore initialized")
 
     def extract_ner(self, text: str) -> List[str]:
-        """Extract location entities from text using NER."""
+        """Extract location entities from text using NER (empty if NER disabled)."""
+        if self.ner_service is None:
+            return []
         return self.ner_service.extract_locations(text)
 
     def preload(self) -> None:
-        """Preload all locations from database into memory."""
-        for region_id, cfg in self.db_manager.DB_MAP.items():
-            engine = self.db_manager.get_engine(region_id)
-            prefix = cfg["prefix"]
+        """
+        Preload all locations from database (or fresh local snapshot) into memory.
+
+        Regions are read concurrently; a region that fails is skipped.
+        """
+
+        def fetch(region_id: int):
+            source, prefix = self.db_manager, self.db_manager.DB_MAP[region_id]["prefix"]
+            if self.snapshot is not None and self.snapshot.is_fresh(region_id):
+                source, prefix = self.snapshot, self.snapshot.PREFIX
 
             sql = f"""
             SELECT ProjectID, SubProjectName
@@ -72,9 +81,10 @@ class LocationStore:
             WHERE SubProjectName IS NOT NULL
             """
 
-            with engine.connect() as conn:
-                rows = conn.execute(text(sql)).fetchall()
+            with source.connect(region_id) as conn:
+                return conn.execute(text(sql)).fetchall()
 
+        for region_id, rows in sorted(self.db_manager.fan_out_blocking(fetch).items()):
             for r in rows:
                 key = (int(region_id), int(r.ProjectID))
                 self._store.setdefault(key, {"names": [], "embeddings": None})
@@ -0,0 +1,20 @@
+"""
+Text normalization helpers for place-name matching.
+Accent-insensitive folding that also handles Vietnamese "đ".
+"""
+import re
+import unicodedata
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def strip_accents(text: str) -> str:
+    """'Hồ Gươm' → 'Ho Guom' (giữ nguyên hoa/thường)."""
+    text = (text or "").replace("đ", "d").replace("Đ", "D")
+    decomposed = unicodedata.normalize("NFD", text)
+    return "".join(c for c in decomposed if unicodedata.category(c) != "Mn")
+
+
+def fold_text(text: str) -> str:
+    """Lowercase, bỏ dấu, chỉ giữ chữ/số, gộp khoảng trắng: 'Hồ  Gươm!' → 'ho guom'."""
+    return _NON_ALNUM.sub(" ", strip_accents(text).lower()).strip()
@@ -0,0 +1,282 @@
+"""
+PlaceIndex: tra tên địa điểm → SubProjectID trong bộ nhớ, không cần LIKE '%...%'.
+
+- Một index cho mỗi (region_id, project_id), nạp từ SubProjects
+- Chuẩn hóa tiếng Việt không dấu ("Ho Guom" = "Hồ Gươm", đ → d, y ≈ i)
+- Thứ tự: trùng khớp (tên / alias) → chứa nhau (ưu tiên tên ngắn nhất, đủ dài
+  so với tên) → fuzzy trigram
+- Alias: tách từ tên ("Văn Miếu - Quốc Tử Giám" → "Văn Miếu", "Quốc Tử Giám";
+  "Chùa Hương (Hà Nội)" → "Chùa Hương", phần trong ngoặc không phải alias)
+  và từ rag/place_aliases.json; alias trùng giữa nhiều địa điểm bị bỏ
+- Refresh theo từng region khi vector sync xong (RegionVersions.subscribe)
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from rag.normalize import fold_text
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+ALIASES_PATH = os.path.join(os.path.dirname(__file__), "place_aliases.json")
+
+# Resolve latency is in microseconds
+MICROSECOND_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 5000, 10000)
+
+# "Văn Miếu - Quốc Tử Giám" → extra aliases
+_NAME_PARTS = re.compile(r"\s+[-–—/|]\s+")
+
+# "Chùa Hương (Hà Nội)": qualifier (city, province...) — never an alias on its own
+_QUALIFIER = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+
+
+def _fuzzy_key(folded: str) -> str:
+    """Spelling variants Vietnamese treats as equal (Mỹ/Mĩ, quy/qui)."""
+    return folded.replace("y", "i")
+
+
+def _trigrams(folded: str) -> frozenset:
+    padded = f"  {_fuzzy_key(folded)} "
+    return frozenset(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+@dataclass(frozen=True)
+class PlaceMatch:
+    """Kết quả resolve một tên địa điểm."""
+    subproject_id: int
+    name: str
+    score: float
+    method: str  # exact | alias | substring | fuzzy
+
+
+@dataclass(frozen=True)
+class _Entry:
+    subproject_id: int
+    name: str
+    folded: str
+    trigrams: frozenset
+
+
+class _ProjectIndex:
+    """Index của một (region, project)."""
+
+    def __init__(self, rows: Iterable[Tuple[int, str]], aliases: Dict[str, List[str]]):
+        self.entries: List[_Entry] = []
+        self.keys: Dict[str, Tuple[_Entry, str]] = {}  # folded name/alias → (entry, method)
+        self.postings: Dict[str, List[_Entry]] = {}
+
+        for subproject_id, name in rows:
+            folded = fold_text(name)
+            if not folded:
+                continue
+            entry = _Entry(int(subproject_id), name, folded, _trigrams(folded))
+            self.entries.append(entry)
+            self.keys.setdefault(folded, (entry, "exact"))
+            for gram in entry.trigrams:
+                self.postings.setdefault(gram, []).append(entry)
+
+        # An alias claimed by several places ("Đền Hùng" of two provinces) resolves to
+        # none of them (no substring / fuzzy guess either)
+        claims: Dict[str, set] = {}
+        for entry in self.entries:
+            for alias in self._aliases_of(entry, aliases):
+                claims.setdefault(alias, set()).add(entry)
+        self.ambiguous = set()
+        for alias, claimants in claims.items():
+            if len(claimants) == 1:
+                self.keys.setdefault(alias, (next(iter(claimants)), "alias"))
+            elif alias not in self.keys:
+                self.ambiguous.add(alias)
+
+        # Longest keys first so "chua mot cot" wins over "chua" in free text
+        self.by_length = sorted(self.keys.items(), key=lambda item: len(item[0]), reverse=True)
+
+    @staticmethod
+    def _aliases_of(entry: _Entry, aliases: Dict[str, List[str]]) -> set:
+        head = _QUALIFIER.sub(" ", entry.name)
+        found = [fold_text(head)]
+        found.extend(fold_text(part) for part in _NAME_PARTS.split(head))
+        found.extend(fold_text(a) for a in aliases.get(entry.folded, ()))
+        return {a for a in found if a and a != entry.folded and len(a) >= 3}
+
+    def resolve(self, folded: str, min_score: float, min_substring: float) -> Optional[PlaceMatch]:
+        hit = self.keys.get(folded)
+        if hit is not None:
+            entry, method = hit
+            return PlaceMatch(entry.subproject_id, entry.name, 1.0, method)
+        if folded in self.ambiguous:
+            return None
+
+        # LIKE '%name%' semantics, but deterministic: the closest (shortest) name wins;
+        # a query that covers too little of the name ("ho" in "ho guom") is not a match
+        padded = f" {folded} "
+        containing = [e for e in self.entries if padded in f" {e.folded} "]
+        if containing:
+            entry = min(containing, key=lambda e: len(e.folded))
+            score = round(len(folded) / len(entry.folded), 3)
+            if score >= min_substring:
+                return PlaceMatch(entry.subproject_id, entry.name, score, "substring")
+
+        # Typos / missing words: trigram Dice coefficient
+        grams = _trigrams(folded)
+        common: Dict[_Entry, int] = {}
+        for gram in grams:
+            for entry in self.postings.get(gram, ()):
+                common[entry] = common.get(entry, 0) + 1
+        best, best_score = None, 0.0
+        for entry, shared in common.items():
+            score = 2 * shared / (len(grams) + len(entry.trigrams))
+            if score > best_score:
+                best, best_score = entry, score
+        if best is not None and best_score >= min_score:
+            return PlaceMatch(best.subproject_id, best.name, round(best_score, 3), "fuzzy")
+        return None
+
+    def find_in_text(self, folded_text: str) -> Optional[PlaceMatch]:
+        padded = f" {folded_text} "
+        for key, (entry, method) in self.by_length:
+            if f" {key} " in padded:
+                return PlaceMatch(entry.subproject_id, entry.name, 1.0, method)
+        return None
+
+
+class PlaceIndex:
+    """In-memory place-name resolution for every (region_id, project_id)."""
+
+    def __init__(
+        self,
+        db_manager=None,
+        aliases: Dict[str, List[str]] = None,
+        min_score: float = None,
+        min_substring: float = None,
+    ):
+        """
+        Args:
+            db_manager: MultiDBManager (nguồn SubProjects)
+            aliases: {tên chuẩn: [alias, ...]} (default rag/place_aliases.json)
+            min_score: Ngưỡng Dice trigram cho fuzzy match (PLACE_INDEX_MIN_SCORE)
+            min_substring: Tỉ lệ độ dài tối thiểu query / tên cho substring match
+                (PLACE_INDEX_MIN_SUBSTRING)
+        """
+        self.db_manager = db_manager
+        self.min_score = min_score or float(os.getenv("PLACE_INDEX_MIN_SCORE", "0.55"))
+        self.min_substring = min_substring or float(os.getenv("PLACE_INDEX_MIN_SUBSTRING", "0.5"))
+        raw_aliases = aliases if aliases is not None else self._load_aliases()
+        self.aliases = {fold_text(k): list(v) for k, v in raw_aliases.items()}
+        self._projects: Dict[Tuple[int, int], _ProjectIndex] = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _load_aliases() -> Dict[str, List[str]]:
+        try:
+            with open(ALIASES_PATH, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def load(self, region_ids: Iterable[int] = None) -> "PlaceIndex":
+        """Nạp (hoặc nạp lại) SubProjects của các region (default: tất cả), song song."""
+        # Region lỗi được fan_out_blocking log và bỏ qua
+        self.db_manager.fan_out_blocking(self.refresh_region, region_ids)
+        return self
+
+    def refresh_region(self, region_id: int):
+        """Rebuild index của một region rồi thay thế nguyên khối (reader không bị chặn)."""
+        start = time.perf_counter()
+        prefix = self.db_manager.DB_MAP[region_id]["prefix"]
+        sql = f"""
+        SELECT SubProjectID, ProjectID, SubProjectName
+        FROM {prefix}.SubProjects
+        WHERE SubProjectName IS NOT NULL
+        """
+        with self.db_manager.connect(region_id) as conn:
+            rows = conn.execute(text(sql)).fetchall()
+
+        grouped: Dict[int, List[Tuple[int, str]]] = {}
+        for r in rows:
+            grouped.setdefault(int(r.ProjectID), []).append((r.SubProjectID, r.SubProjectName))
+        self.replace_region(region_id, grouped)
+        logger.info(
+            f"[PlaceIndex] Region {region_id}: {len(rows)} places / {len(grouped)} projects "
+            f"in {(time.perf_counter() - start) * 1000:.0f}ms"
+        )
+
+    def replace_region(self, region_id: int, projects: Dict[int, Iterable[Tuple[int, str]]]):
+        """Thay index của region bằng {project_id: [(SubProjectID, SubProjectName), ...]}."""
+        built = {
+            (int(region_id), int(project_id)): _ProjectIndex(rows, self.aliases)
+            for project_id, rows in projects.items()
+        }
+        with self._lock:
+            merged = {k: v for k, v in self._projects.items() if k[0] != int(region_id)}
+            merged.update(built)
+            self._projects = merged
+        metrics.set_gauge(
+            "place_index.places", sum(len(p.entries) for p in built.values()), region=region_id
+        )
+
+    def watch(self, versions):
+        """Refresh region tương ứng mỗi khi RegionVersions báo region vừa sync."""
+        versions.subscribe(self._on_region_synced)
+        return self
+
+    def _on_region_synced(self, region_id: int):
+        with self._lock:
+            if region_id in self._refreshing:
+                return
+            self._refreshing.add(region_id)
+
+        def run():
+            try:
+                self.refresh_region(region_id)
+            except Exception as e:
+                logger.error(f"[PlaceIndex] Region {region_id} refresh failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(region_id)
+
+        threading.Thread(target=run, name=f"place-index-{region_id}", daemon=True).start()
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def covers(self, region_id: int, project_id: int) -> bool:
+        """True nếu index có dữ liệu cho (region, project) — khi đó miss là miss thật."""
+        return (int(region_id), int(project_id)) in self._projects
+
+    def resolve(self, name: str, region_id: int, project_id: int) -> Optional[PlaceMatch]:
+        """Tên địa điểm (từ LLM / người dùng) → PlaceMatch, None nếu không có."""
+        start = time.perf_counter()
+        project = self._projects.get((int(region_id), int(project_id)))
+        folded = fold_text(name)
+        match = project.resolve(folded, self.min_score, self.min_substring) if project and folded else None
+        metrics.observe(
+            "place_index.resolve_us", (time.perf_counter() - start) * 1e6, buckets=MICROSECOND_BUCKETS
+        )
+        metrics.inc("place_index.resolve", outcome=match.method if match else "miss")
+        return match
+
+    def find_in_text(self, query: str, region_id: int, project_id: int) -> Optional[PlaceMatch]:
+        """Địa điểm (tên hoặc alias) được nhắc tới trong một câu hỏi tự do."""
+        project = self._projects.get((int(region_id), int(project_id)))
+        if project is None:
+            return None
+        return project.find_in_text(fold_text(query))
+
+    def names(self, region_id: int, project_id: int) -> List[str]:
+        project = self._projects.get((int(region_id), int(project_id)))
+        return [e.name for e in project.entries] if project else []
@@ -2,13 +2,16 @@
 TravelVectorStore: Qdrant-based vector search for travel knowledge.
 Indexed from SubProjects table across all regions.
 """
+import asyncio
 import logging
 import os
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from qdrant_client import QdrantClient, models
 from sentence_transformers import SentenceTransformer
 
+from services.tracing import tracer
+
 logger = logging.getLogger(__name__)
 
 
@@ -54,20 +57,19 @@ class TravelVectorStore:
     # Indexing
     # ------------------------------------------------------------------
 
-    async def index_from_database(self, db_manager) -> int:
+    async def index_from_database(self, db_manager) -> Tuple[int, List[int]]:
         """
         Sync ALL regions from SQL Server → Qdrant.
 
         Returns:
-            Number of documents indexed.
+            (number of documents indexed, region ids that failed and were not indexed)
         """
         from sqlalchemy import text as sql_text
 
         points = []
 
-        for region_id, cfg in db_manager.DB_MAP.items():
-            engine = db_manager.get_engine(region_id)
-            prefix = cfg["prefix"]
+        def fetch(region_id: int):
+            prefix = db_manager.DB_MAP[region_id]["prefix"]
 
             sql = f"""
             SELECT SubProjectID, SubProjectName, Introduction, ProjectID
@@ -75,9 +77,13 @@ class TravelVectorStore:
             WHERE Introduction IS NOT NULL
             """
 
-            with engine.connect() as conn:
-                rows = conn.execute(sql_text(sql)).fetchall()
+            with db_manager.connect(region_id) as conn:
+                return conn.execute(sql_text(sql)).fetchall()
 
+        # All regions read concurrently (wall time ≈ slowest region)
+        fetched = await asyncio.to_thread(db_manager.fan_out_blocking, fetch)
+        failed = [region_id for region_id in db_manager.DB_MAP if region_id not in fetched]
+        for region_id, rows in sorted(fetched.items()):
             for row in rows:
                 text_content = f"{row.SubProjectName}. {row.Introduction}"
 
@@ -113,8 +119,10 @@ class TravelVectorStore:
                 points=batch,
             )
 
+        if failed:
+            logger.warning(f"Regions not indexed: {failed}")
         logger.info(f"Indexed {len(points)} documents to Qdrant")
-        return len(points)
+        return len(points), failed
 
     async def index_region(self, db_manager, region_id: int) -> int:
         """Sync a single region to Qdrant."""
@@ -124,7 +132,6 @@ class TravelVectorStore:
         if not cfg:
             raise ValueError(f"Invalid region_id: {region_id}")
 
-        engine = db_manager.get_engine(region_id)
         prefix = cfg["prefix"]
 
         sql = f"""
@@ -133,7 +140,7 @@ class TravelVectorStore:
         WHERE Introduction IS NOT NULL
         """
 
-        with engine.connect() as conn:
+        with db_manager.connect(region_id) as conn:
             rows = conn.execute(sql_text(sql)).fetchall()
 
         points = []
@@ -196,6 +203,20 @@ class TravelVectorStore:
         Returns:
             List of {name, text, score, region_id, project_id}
         """
+        with tracer.span(
+            "vector.search", region=region_id, project=project_id, top_k=top_k
+        ) as span:
+            results = self._search(query, region_id, project_id, top_k)
+            span.set_attribute("hits", len(results))
+            return results
+
+    def _search(
+        self,
+        query: str,
+        region_id: Optional[int],
+        project_id: Optional[int],
+        top_k: int,
+    ) -> List[Dict]:
         q_embedding = self.embedder.encode(
             f"query: {query}",
             normalize_embeddings=True,
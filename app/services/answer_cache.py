@@ -0,0 +1,199 @@
+"""
+AnswerCache: cache câu trả lời phía trước GraphOrchestrator.run.
+
+Key = (region_id, project_id, language, normalized query, region version).
+- Exact match: in-process LRU/TTL → Redis tier (optional)
+- Semantic match: cosine similarity (multilingual-e5-small) giữa các câu hỏi
+  đã cache trong cùng (region, project, language)
+Khi vector sync của một region hoàn tất, version của region đổi → cache cũ
+của region đó không còn được dùng.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import threading
+import unicodedata
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from services.cache import RedisTier, TTLCache
+from services.sync_events import RegionVersions, get_region_versions
+
+logger = logging.getLogger(__name__)
+
+_TRAILING_PUNCT = re.compile(r"[\s?!.,;:…。？！、]+$")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """Chuẩn hóa câu hỏi: NFC, lowercase, gộp khoảng trắng, bỏ dấu câu cuối."""
+    text = unicodedata.normalize("NFC", text or "").lower().strip()
+    text = _SPACES.sub(" ", text)
+    return _TRAILING_PUNCT.sub("", text)
+
+
+class AnswerCache:
+    """Exact + semantic answer cache theo (region, project, language)."""
+
+    def __init__(
+        self,
+        embedder=None,
+        ttl: float = None,
+        max_entries: int = None,
+        similarity_threshold: float = None,
+        redis_tier: Optional[RedisTier] = None,
+        versions: Optional[RegionVersions] = None,
+    ):
+        """
+        Args:
+            embedder: SentenceTransformer (None = chỉ exact match)
+            ttl: Thời gian sống của câu trả lời (giây)
+            max_entries: Số entry tối đa của tầng in-process
+            similarity_threshold: Ngưỡng cosine để coi 2 câu hỏi là một
+            redis_tier: Tầng Redis (default namespace "tbot:answer")
+            versions: RegionVersions dùng để invalidate theo sync
+        """
+        self.enabled = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+        self.embedder = embedder
+        self.ttl = ttl or float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+        self.max_entries = max_entries or int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "2000"))
+        self.similarity_threshold = similarity_threshold or float(
+            os.getenv("ANSWER_CACHE_SIM_THRESHOLD", "0.97")
+        )
+        self.max_vectors_per_bucket = 256
+
+        self._local = TTLCache(max_entries=self.max_entries, ttl=self.ttl)
+        self._redis = redis_tier or RedisTier("tbot:answer")
+        self._versions = versions or get_region_versions()
+
+        # (region, project, language) → {"version", "queries", "vectors"}
+        self._buckets: Dict[Tuple, Dict] = {}
+        self._embeddings = TTLCache(max_entries=256, ttl=60)
+        self._lock = threading.Lock()
+
+        logger.info(
+            f"AnswerCache ready | enabled={self.enabled} ttl={self.ttl}s "
+            f"semantic={'on' if embedder is not None else 'off'} "
+            f"threshold={self.similarity_threshold}"
+        )
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def get(
+        self, region_id: int, project_id: int, language: str, query: str
+    ) -> Optional[str]:
+        """Trả về câu trả lời đã cache hoặc None."""
+        if not self.enabled:
+            return None
+
+        norm = normalize_query(query)
+        bucket = (region_id, project_id, language or "auto")
+        version = await self._versions.current_async(region_id)
+
+        answer = await self._lookup(self._key(bucket, version, norm))
+        if answer is not None:
+            logger.info(f"[AnswerCache] exact hit | {norm[:60]}")
+            return answer
+
+        if self.embedder is None or not self._has_vectors(bucket, version):
+            return None
+
+        q_vec = await asyncio.to_thread(self._embed, norm)
+        match, score = self._best_match(bucket, version, q_vec)
+        if match is None:
+            return None
+
+        answer = await self._lookup(self._key(bucket, version, match))
+        if answer is not None:
+            logger.info(f"[AnswerCache] semantic hit ({score:.3f}) | {norm[:60]} ≈ {match[:60]}")
+        return answer
+
+    async def set(
+        self, region_id: int, project_id: int, language: str, query: str, answer: str
+    ):
+        """Lưu câu trả lời vào cache (in-process + Redis)."""
+        if not self.enabled or not answer:
+            return
+
+        norm = normalize_query(query)
+        bucket = (region_id, project_id, language or "auto")
+        version = await self._versions.current_async(region_id)
+        key = self._key(bucket, version, norm)
+
+        self._local.set(key, answer)
+        await asyncio.to_thread(self._redis.set, key, answer, self.ttl)
+
+        if self.embedder is not None:
+            q_vec = await asyncio.to_thread(self._embed, norm)
+            self._add_vector(bucket, version, norm, q_vec)
+
+    def invalidate_region(self, region_id: int):
+        """Invalidate toàn bộ câu trả lời của một region (bump version)."""
+        self._versions.bump(region_id)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _key(bucket: Tuple, version: str, norm: str) -> str:
+        region_id, project_id, language = bucket
+        digest = hashlib.sha1(norm.encode("utf-8")).hexdigest()
+        return f"{region_id}:{project_id}:{language}:v{version}:{digest}"
+
+    async def _lookup(self, key: str) -> Optional[str]:
+        answer = self._local.get(key)
+        if answer is not None:
+            return answer
+        answer = await asyncio.to_thread(self._redis.get, key)
+        if answer is not None:
+            self._local.set(key, answer)
+        return answer
+
+    def _embed(self, norm: str) -> np.ndarray:
+        vec = self._embeddings.get(norm)
+        if vec is None:
+            vec = self.embedder.encode(f"query: {norm}", normalize_embeddings=True)
+            self._embeddings.set(norm, vec)
+        return vec
+
+    def _has_vectors(self, bucket: Tuple, version: str) -> bool:
+        with self._lock:
+            data = self._buckets.get(bucket)
+            return bool(data and data["version"] == version and data["queries"])
+
+    def _add_vector(self, bucket: Tuple, version: str, norm: str, vec: np.ndarray):
+        with self._lock:
+            data = self._buckets.get(bucket)
+            if data is None or data["version"] != version:
+                data = {"version": version, "queries": [], "vectors": []}
+                self._buckets[bucket] = data
+            if norm in data["queries"]:
+                return
+            data["queries"].append(norm)
+            data["vectors"].append(vec)
+            if len(data["queries"]) > self.max_vectors_per_bucket:
+                data["queries"].pop(0)
+                data["vectors"].pop(0)
+            data.pop("matrix", None)
+
+    def _best_match(
+        self, bucket: Tuple, version: str, q_vec: np.ndarray
+    ) -> Tuple[Optional[str], float]:
+        with self._lock:
+            data = self._buckets.get(bucket)
+            if not data or data["version"] != version or not data["queries"]:
+                return None, 0.0
+            if "matrix" not in data:
+                data["matrix"] = np.vstack(data["vectors"])
+            scores = data["matrix"] @ q_vec
+            idx = int(scores.argmax())
+            score = float(scores[idx])
+            if score < self.similarity_threshold:
+                return None, score
+            return data["queries"][idx], score
@@ -0,0 +1,153 @@
+"""
+Cache primitives dùng chung:
+- TTLCache: in-process LRU + TTL (thread-safe)
+- RedisTier: tầng Redis optional (JSON), tự tắt nếu Redis không sẵn sàng
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """LRU cache có TTL cho từng entry, an toàn khi dùng từ nhiều thread."""
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 3600):
+        """
+        Args:
+            max_entries: Số entry tối đa trước khi evict LRU
+            ttl: Thời gian sống mặc định (giây)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.pop(key, _MISSING)
+            return default if item is _MISSING else item[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class RedisTier:
+    """
+    Tầng cache Redis (optional).
+
+    Dùng client đồng bộ với socket timeout ngắn: Redis nằm cùng mạng docker
+    nên mỗi lệnh chỉ tốn dưới 1ms. Khi Redis lỗi, tier tự tắt trong
+    `retry_after` giây thay vì làm chậm mọi request.
+    """
+
+    def __init__(self, namespace: str, url: str = None, retry_after: float = 30):
+        """
+        Args:
+            namespace: Prefix cho mọi key (vd. "tbot:answer")
+            url: Redis URL (default REDIS_URL; bỏ trống = tắt tier)
+            retry_after: Số giây chờ trước khi thử kết nối lại sau lỗi
+        """
+        self.namespace = namespace
+        self.url = url if url is not None else os.getenv("REDIS_URL", "")
+        self.retry_after = retry_after
+        self._client = None
+        self._disabled_until = 0.0
+
+        if self.url:
+            try:
+                import redis
+
+                self._client = redis.Redis.from_url(
+                    self.url, socket_timeout=0.25, socket_connect_timeout=0.25
+                )
+            except ImportError:
+                logger.warning("redis package not installed — Redis tier disabled")
+
+    @property
+    def available(self) -> bool:
+        return self._client is not None and time.monotonic() >= self._disabled_until
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _fail(self, op: str, e: Exception):
+        logger.warning(f"[RedisTier:{self.namespace}] {op} failed: {e} — disabled {self.retry_after}s")
+        self._disabled_until = time.monotonic() + self.retry_after
+
+    def get(self, key: str) -> Any:
+        if not self.available:
+            return None
+        try:
+            raw = self._client.get(self._key(key))
+            return json.loads(raw) if raw is not None else None
+        except Exception as e:
+            self._fail("get", e)
+            return None
+
+    def set(self, key: str, value: Any, ttl: float):
+        if not self.available:
+            return
+        try:
+            self._client.set(self._key(key), json.dumps(value, ensure_ascii=False), ex=max(1, int(ttl)))
+        except Exception as e:
+            self._fail("set", e)
+
+    def delete(self, key: str):
+        if not self.available:
+            return
+        try:
+            self._client.delete(self._key(key))
+        except Exception as e:
+            self._fail("delete", e)
+
+    def incr(self, key: str) -> Optional[int]:
+        if not self.available:
+            return None
+        try:
+            return int(self._client.incr(self._key(key)))
+        except Exception as e:
+            self._fail("incr", e)
+            return None
+
+    def get_int(self, key: str) -> Optional[int]:
+        if not self.available:
+            return None
+        try:
+            raw = self._client.get(self._key(key))
+            return int(raw) if raw is not None else 0
+        except Exception as e:
+            self._fail("get_int", e)
+            return None
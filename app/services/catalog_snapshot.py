@@ -0,0 +1,227 @@
+"""
+CatalogSnapshot: bản sao SQLite local (read-only) của dữ liệu catalog từng region.
+
+- Bảng: SubProjects, SubProjectAttractions, SubProjectAttractionMedia
+  (chỉ các cột tool / LocationStore dùng), kèm index theo khóa tra cứu
+- Export (jobs/export_catalog_snapshot.py hoặc Celery beat) ghi ra file tạm
+  rồi os.replace → reader luôn thấy trọn một bản, không bao giờ nửa chừng
+- Bản quá cũ (CATALOG_SNAPSHOT_MAX_AGE) → caller dùng lại SQL Server
+- Cùng API với MultiDBManager (fetchone / fetchall / connect) để
+  StatementRegistry và LocationStore dùng được cả hai nguồn
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import create_engine, text
+
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "storage", "catalog")
+
+# Table → exported columns (types are SQLite affinities)
+TABLES = {
+    "SubProjects": (
+        ("SubProjectID", "INTEGER"),
+        ("ProjectID", "INTEGER"),
+        ("SubProjectName", "TEXT"),
+        ("Introduction", "TEXT"),
+        ("Location", "TEXT"),
+    ),
+    "SubProjectAttractions": (
+        ("SubProjectAttractionID", "INTEGER"),
+        ("SubProjectID", "INTEGER"),
+        ("AttractionName", "TEXT"),
+        ("Introduction", "TEXT"),
+        ("SortOrder", "INTEGER"),
+    ),
+    "SubProjectAttractionMedia": (
+        ("SubProjectAttractionID", "INTEGER"),
+        ("MediaType", "TEXT"),
+        ("MediaURL", "TEXT"),
+    ),
+}
+
+_INDEXES = (
+    "CREATE UNIQUE INDEX ix_subprojects_id ON SubProjects (SubProjectID)",
+    "CREATE INDEX ix_subprojects_project ON SubProjects (ProjectID, SubProjectName)",
+    "CREATE INDEX ix_attractions_subproject ON SubProjectAttractions (SubProjectID, SortOrder)",
+    "CREATE INDEX ix_media_attraction ON SubProjectAttractionMedia (SubProjectAttractionID, MediaType)",
+)
+
+# Rows copied per round trip while exporting
+_BATCH = 2000
+
+# How often (seconds) readers check whether the file was swapped
+_CHECK_INTERVAL = 5.0
+
+
+class CatalogSnapshot:
+    """Per-region read-only SQLite snapshots of the catalog tables."""
+
+    # Schema of the snapshot tables (for StatementRegistry / raw SQL)
+    PREFIX = "main"
+
+    def __init__(self, directory: str = None, max_age: float = None):
+        """
+        Args:
+            directory: Thư mục chứa file snapshot (CATALOG_SNAPSHOT_DIR, default storage/catalog)
+            max_age: Tuổi tối đa (giây) của snapshot để còn được dùng (CATALOG_SNAPSHOT_MAX_AGE)
+        """
+        self.directory = directory or os.getenv("CATALOG_SNAPSHOT_DIR") or DEFAULT_DIR
+        self.max_age = max_age or float(os.getenv("CATALOG_SNAPSHOT_MAX_AGE", str(26 * 3600)))
+        # region_id → (file identity, engine, exported_at)
+        self._open: Dict[int, Tuple[Tuple[int, int], object, float]] = {}
+        self._checked: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def path(self, region_id: int) -> str:
+        return os.path.join(self.directory, f"catalog_region{int(region_id)}.sqlite")
+
+    # ------------------------------------------------------------------
+    # Read
+    # ------------------------------------------------------------------
+
+    def exported_at(self, region_id: int) -> Optional[float]:
+        """Thời điểm export của snapshot hiện tại (epoch), None nếu chưa có."""
+        current = self._current(int(region_id))
+        return current[2] if current else None
+
+    def is_fresh(self, region_id: int) -> bool:
+        exported_at = self.exported_at(region_id)
+        return exported_at is not None and time.time() - exported_at <= self.max_age
+
+    @contextmanager
+    def connect(self, region_id: int):
+        """Connection SQLAlchemy (read-only) tới snapshot của region."""
+        current = self._current(int(region_id))
+        if current is None:
+            raise FileNotFoundError(self.path(region_id))
+        with current[1].connect() as conn:
+            yield conn
+
+    async def fetchall(self, region_id: int, statement, params: dict = None, timeout: float = None):
+        """SELECT → list of rows (SQLite local: chạy thẳng, không qua thread pool)."""
+        with self.connect(region_id) as conn:
+            return conn.execute(statement, params or {}).fetchall()
+
+    async def fetchone(self, region_id: int, statement, params: dict = None, timeout: float = None):
+        """SELECT → first row or None."""
+        with self.connect(region_id) as conn:
+            return conn.execute(statement, params or {}).fetchone()
+
+    def _current(self, region_id: int):
+        now = time.monotonic()
+        with self._lock:
+            current = self._open.get(region_id)
+            if current is not None and now - self._checked.get(region_id, 0.0) < _CHECK_INTERVAL:
+                return current
+            self._checked[region_id] = now
+
+            path = self.path(region_id)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                self._close(region_id)
+                return None
+            identity = (st.st_ino, st.st_mtime_ns)
+            if current is not None and current[0] == identity:
+                return current
+
+            # New file (first open or swapped by an export): reopen
+            self._close(region_id)
+            engine = create_engine(f"sqlite:///file:{path}?mode=ro&uri=true")
+            try:
+                with engine.connect() as conn:
+                    exported_at = float(
+                        conn.execute(text("SELECT value FROM snapshot_meta WHERE key = 'exported_at'")).scalar()
+                    )
+            except Exception as e:
+                logger.warning(f"[CatalogSnapshot] Region {region_id} unreadable: {e}")
+                engine.dispose()
+                return None
+            current = (identity, engine, exported_at)
+            self._open[region_id] = current
+            metrics.set_gauge("catalog_snapshot.age_s", round(time.time() - exported_at), region=region_id)
+            return current
+
+    def _close(self, region_id: int):
+        current = self._open.pop(region_id, None)
+        if current is not None:
+            current[1].dispose()
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+
+    def export_region(self, db_manager, region_id: int) -> Dict[str, int]:
+        """
+        Export 3 bảng catalog của region từ SQL Server rồi swap file nguyên khối.
+
+        Returns: {table: số dòng}
+        """
+        start = time.perf_counter()
+        prefix = db_manager.DB_MAP[region_id]["prefix"]
+        final_path = self.path(region_id)
+        tmp_path = f"{final_path}.tmp-{os.getpid()}"
+        os.makedirs(self.directory, exist_ok=True)
+
+        counts: Dict[str, int] = {}
+        out = sqlite3.connect(tmp_path)
+        try:
+            out.execute("PRAGMA journal_mode=OFF")
+            out.execute("PRAGMA synchronous=OFF")
+            with db_manager.connect(region_id) as conn:
+                for table, columns in TABLES.items():
+                    names = ", ".join(c for c, _ in columns)
+                    out.execute(f"CREATE TABLE {table} ({', '.join(f'{c} {t}' for c, t in columns)})")
+                    insert = f"INSERT INTO {table} ({names}) VALUES ({', '.join('?' * len(columns))})"
+                    result = conn.execute(text(f"SELECT {names} FROM {prefix}.{table}"))
+                    counts[table] = 0
+                    while True:
+                        rows = result.fetchmany(_BATCH)
+                        if not rows:
+                            break
+                        out.executemany(insert, [tuple(r) for r in rows])
+                        counts[table] += len(rows)
+            for ddl in _INDEXES:
+                out.execute(ddl)
+            out.execute("CREATE TABLE snapshot_meta (key TEXT PRIMARY KEY, value TEXT)")
+            out.executemany(
+                "INSERT INTO snapshot_meta (key, value) VALUES (?, ?)",
+                [("exported_at", str(time.time())), ("region_id", str(region_id))]
+                + [(f"rows.{t}", str(n)) for t, n in counts.items()],
+            )
+            out.commit()
+            out.execute("ANALYZE")
+        except BaseException:
+            out.close()
+            os.remove(tmp_path)
+            raise
+        out.close()
+        os.replace(tmp_path, final_path)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        metrics.observe("catalog_snapshot.export_ms", elapsed_ms, region=region_id)
+        logger.info(f"[CatalogSnapshot] Region {region_id}: {counts} in {elapsed_ms:.0f}ms")
+        return counts
+
+
+def export_regions(db_manager, region_ids: Iterable[int] = None) -> Dict[int, Dict[str, int]]:
+    """
+    Best-effort export: lỗi của một region chỉ được log, snapshot cũ của
+    region đó hết hạn theo CATALOG_SNAPSHOT_MAX_AGE.
+
+    Returns: {region_id: {table: số dòng}} của các region export thành công.
+    """
+    snapshot = CatalogSnapshot()
+    # Regions export concurrently (separate files); a failed region is logged by fan_out_blocking
+    return db_manager.fan_out_blocking(
+        lambda region_id: snapshot.export_region(db_manager, region_id), region_ids
+    )
@@ -8,7 +8,7 @@ import time
 import uuid
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 
 @dataclass
@@ -27,6 +27,7 @@ class ChatSession:
     created_at: datetime = field(default_factory=datetime.utcnow)
     last_activity: datetime = field(default_factory=datetime.utcnow)
     messages: List[ChatMessage] = field(default_factory=list)
+    context: Dict[str, Any] = field(default_factory=dict)  # target_place, region_id, ...
 
     def add_message(self, role: str, content: str) -> ChatMessage:
         """Thêm tin nhắn vào phiên chat."""
@@ -116,6 +117,16 @@ class ChatManager:
                 return True
             return False
 
+    def set_ctx(self, session_id: str, key: str, value: Any):
+        """Lưu context của phiên (cùng API với SessionMemory, hết hạn cùng phiên)."""
+        session = self.get_session(session_id)
+        if session:
+            session.context[key] = value
+
+    def get_ctx(self, session_id: str, key: str, default=None):
+        session = self.get_session(session_id)
+        return session.context.get(key, default) if session else default
+
     def get_active_sessions_count(self) -> int:
         """Trả về số phiên đang hoạt động."""
         with self._lock:
@@ -0,0 +1,87 @@
+"""
+Deadline: thời hạn của một request, truyền từ API xuống agent / tool.
+
+- Tạo một lần ở main (REQUEST_DEADLINE_SECONDS hoặc timeout_ms của client)
+- Pipeline / TravelAgent / ToolExecutor dùng remaining() làm timeout cho
+  từng bước (LLM, SQL, vector) → hết giờ thì bước đang chạy bị cancel
+- Hết giờ: agent trả lời một phần từ kết quả tool đã có thay vì làm tiếp
+"""
+import asyncio
+import os
+import time
+from typing import AsyncIterator, Awaitable, Optional, TypeVar
+
+from services.metrics import metrics
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """Request deadline passed — stop working, answer with what we have."""
+
+
+class Deadline:
+    """Absolute point in time (monotonic) after which a request stops working."""
+
+    __slots__ = ("expires_at", "budget")
+
+    def __init__(self, budget: float):
+        """
+        Args:
+            budget: Thời gian cho phép (giây) tính từ bây giờ
+        """
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+
+    @classmethod
+    def for_request(cls, timeout_ms: Optional[int] = None) -> "Deadline":
+        """Deadline của một request: min(timeout client, REQUEST_DEADLINE_SECONDS)."""
+        budget = float(os.getenv("REQUEST_DEADLINE_SECONDS", "45"))
+        if timeout_ms:
+            budget = min(budget, timeout_ms / 1000)
+        return cls(budget)
+
+    def remaining(self) -> float:
+        """Số giây còn lại (>= 0)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        """Timeout cho một bước: phần còn lại, không vượt quá cap."""
+        remaining = self.remaining()
+        return remaining if cap is None else min(cap, remaining)
+
+    def check(self, stage: str):
+        """Raise DeadlineExceeded nếu đã hết giờ trước khi bắt đầu stage."""
+        if self.expired:
+            raise self._exceeded(stage)
+
+    async def run(self, awaitable: Awaitable[T], stage: str) -> T:
+        """Await trong thời gian còn lại; hết giờ → cancel awaitable, raise DeadlineExceeded."""
+        try:
+            return await asyncio.wait_for(awaitable, timeout=self.remaining())
+        except asyncio.TimeoutError:
+            raise self._exceeded(stage) from None
+
+    async def iterate(self, iterator: AsyncIterator[T], stage: str) -> AsyncIterator[T]:
+        """Lặp async iterator (LLM stream) tới deadline; hết giờ → đóng stream, raise."""
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(iterator.__anext__(), timeout=self.remaining())
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    raise self._exceeded(stage) from None
+                yield item
+        finally:
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    def _exceeded(self, stage: str) -> DeadlineExceeded:
+        metrics.inc("deadline.exceeded", stage=stage)
+        return DeadlineExceeded(f"deadline of {self.budget:.1f}s exceeded during {stage}")
@@ -0,0 +1,194 @@
+"""
+LanguageDetector: nhận diện ngôn ngữ nhanh, deterministic, chỉ dùng CPU.
+
+Thứ tự:
+1. Client hint (nếu hợp lệ)
+2. Chữ viết: Hangul → ko, Kana → ja, Hán → zh, Thái → th,
+   ký tự riêng của tiếng Việt → vi, ký tự riêng của tiếng Pháp → fr
+3. Từ chức năng phổ biến (en / fr / vi không dấu)
+4. langdetect (seed cố định) cho câu Latin đủ dài
+5. Ngôn ngữ gần nhất của session, rồi mặc định
+
+Kết quả chắc chắn được nhớ theo session để câu ngắn/mơ hồ sau đó
+("ok", "còn video?") không bị đoán lại.
+"""
+import logging
+import os
+import re
+from typing import Container, Optional
+
+from services.cache import TTLCache
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_LANGUAGES = ("vi", "en", "ko", "ja", "zh", "th", "fr")
+DEFAULT_LANGUAGE = "vi"
+
+_SCRIPTS = (
+    ("ko", re.compile(r"[가-힯ᄀ-ᇿ㄰-㆏]")),
+    ("ja", re.compile(r"[぀-ヿ]")),
+    ("zh", re.compile(r"[一-鿿]")),
+    ("th", re.compile(r"[฀-๿]")),
+)
+# Letters that only Vietnamese uses (shared ones like à, é, ô are excluded)
+_VI_CHARS = re.compile(
+    r"[ăđơưảãạẻẽẹỉĩịỏõọủũụỳỷỹỵấầẩẫậắằẳẵặếềểễệốồổỗộớờởỡợứừửữự]", re.IGNORECASE
+)
+_FR_CHARS = re.compile(r"[çœëïîû]", re.IGNORECASE)
+_WORDS = re.compile(r"[a-zà-ÿ']+")
+
+# Frequent function words (Vietnamese without diacritics included)
+_FUNCTION_WORDS = {
+    "en": {"the", "is", "are", "where", "what", "how", "which", "of", "to", "and", "in",
+           "can", "you", "there", "about", "me", "show", "tell", "this", "does"},
+    "fr": {"le", "la", "les", "est", "sont", "où", "quel", "quelle", "comment", "des",
+           "du", "et", "une", "un", "pour", "avec", "je", "vous", "qu'est", "c'est"},
+    "vi": {"o", "dau", "gi", "khong", "cho", "toi", "ban", "nao", "cua", "co", "nhung",
+           "duong", "di", "va", "minh", "xem", "gioi", "thieu", "may", "gio"},
+}
+
+_LANGDETECT_ALIASES = {"zh-cn": "zh", "zh-tw": "zh"}
+
+
+def script_language(text: str) -> Optional[str]:
+    """Ngôn ngữ suy ra từ chữ viết, None nếu chỉ có chữ Latin chung."""
+    for lang, pattern in _SCRIPTS:
+        if pattern.search(text):
+            return lang
+    if _VI_CHARS.search(text):
+        return "vi"
+    if _FR_CHARS.search(text):
+        return "fr"
+    return None
+
+
+def normalize_language(code: Optional[str]) -> Optional[str]:
+    """'en-US' → 'en', 'zh-TW' → 'zh', '' → None."""
+    if not code:
+        return None
+    code = code.strip().lower().replace("_", "-")
+    return _LANGDETECT_ALIASES.get(code, code.split("-")[0]) or None
+
+
+class LanguageDetector:
+    """Deterministic language ID with per-session memory."""
+
+    def __init__(
+        self,
+        min_statistical_chars: int = None,
+        min_confidence: float = None,
+        session_ttl: float = 1800,
+    ):
+        """
+        Args:
+            min_statistical_chars: Câu Latin ngắn hơn không dùng langdetect (LANGID_MIN_CHARS)
+            min_confidence: Xác suất tối thiểu của langdetect (LANGID_MIN_CONFIDENCE)
+            session_ttl: Thời gian nhớ ngôn ngữ của session (giây)
+        """
+        self.min_statistical_chars = min_statistical_chars or int(os.getenv("LANGID_MIN_CHARS", "20"))
+        self.min_confidence = min_confidence or float(os.getenv("LANGID_MIN_CONFIDENCE", "0.85"))
+        self._sessions = TTLCache(max_entries=10000, ttl=session_ttl)
+        self._texts = TTLCache(max_entries=5000, ttl=24 * 3600)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def identify(self, text: str, supported: Container[str] = SUPPORTED_LANGUAGES) -> Optional[str]:
+        """Ngôn ngữ của text nếu nhận diện chắc chắn, ngược lại None (không dùng session/hint)."""
+        if not text or not text.strip():
+            return None
+        cached = self._texts.get(text)
+        if cached is None:
+            lang, source = self._identify(text)
+            self._texts.set(text, (lang, source))
+        else:
+            lang, source = cached
+        metrics.inc("langid.decisions", source=source)
+        return lang if lang in supported else None
+
+    def detect(
+        self,
+        text: str,
+        hint: Optional[str] = None,
+        session_id: Optional[str] = None,
+        supported: Container[str] = SUPPORTED_LANGUAGES,
+        default: Optional[str] = DEFAULT_LANGUAGE,
+    ) -> Optional[str]:
+        """
+        Ngôn ngữ để trả lời / dịch / đọc TTS.
+
+        Args:
+            text: Nội dung người dùng
+            hint: Ngôn ngữ client gửi kèm (ưu tiên cao nhất)
+            session_id: Nhớ ngôn ngữ theo session cho câu mơ hồ
+            supported: Tập ngôn ngữ hợp lệ cho caller (vd. LANGUAGE_MAP của TTS)
+            default: Kết quả khi không đoán được (None = để caller tự quyết)
+        """
+        hint = normalize_language(hint)
+        if hint and hint in supported:
+            metrics.inc("langid.decisions", source="hint")
+            if session_id:
+                self._sessions.set(session_id, hint)
+            return hint
+
+        lang = self.identify(text, supported)
+        if lang is not None:
+            if session_id:
+                self._sessions.set(session_id, lang)
+            return lang
+
+        if session_id:
+            remembered = self._sessions.get(session_id)
+            if remembered in supported:
+                metrics.inc("langid.decisions", source="session")
+                return remembered
+        return default
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _identify(self, text: str):
+        lang = script_language(text)
+        if lang is not None:
+            return lang, "script"
+
+        words = _WORDS.findall(text.lower())
+        scores = {code: sum(w in vocab for w in words) for code, vocab in _FUNCTION_WORDS.items()}
+        best = max(scores, key=scores.get)
+        runner_up = max(v for k, v in scores.items() if k != best)
+        if scores[best] >= 2 and scores[best] > runner_up:
+            return best, "words"
+
+        if len(text.strip()) >= self.min_statistical_chars:
+            lang = self._statistical(text)
+            if lang is not None:
+                return lang, "statistical"
+        return None, "unknown"
+
+    def _statistical(self, text: str) -> Optional[str]:
+        try:
+            from langdetect import DetectorFactory, LangDetectException, detect_langs
+        except ImportError:
+            return None
+        DetectorFactory.seed = 0  # deterministic
+        try:
+            best = detect_langs(text)[0]
+        except LangDetectException:
+            return None
+        if best.prob < self.min_confidence:
+            return None
+        return normalize_language(best.lang)
+
+
+_shared_detector: Optional[LanguageDetector] = None
+
+
+def get_language_detector() -> LanguageDetector:
+    """Trả về LanguageDetector dùng chung cho toàn process."""
+    global _shared_detector
+    if _shared_detector is None:
+        _shared_detector = LanguageDetector()
+    return _shared_detector
@@ -0,0 +1,315 @@
+"""
+OllamaClient: async client cho Ollama /api/chat.
+Dùng chung một connection pool keep-alive cho toàn bộ agent; số request
+đồng thời tới Ollama do LLMScheduler (admission control + priority) quyết định.
+
+Model được warm-up lúc startup và giữ resident bằng keep_alive; thời gian
+prompt-eval / generation của mỗi lần gọi được ghi vào metrics.
+"""
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from services.llm_scheduler import LLMScheduler, Priority, get_llm_scheduler
+from services.metrics import metrics
+from services.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Token-count buckets cho prompt / generation
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+
+def _parse_keep_alive(value: str):
+    """"30m" giữ nguyên; "-1" / "3600" → số giây (Ollama hiểu số âm = giữ mãi)."""
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+@dataclass
+class LLMResponse:
+    """Kết quả một lần gọi /api/chat (đã chuẩn hóa tool_calls)."""
+    content: str
+    tool_calls: List[Dict[str, Any]] = field(default_factory=list)
+    raw: Dict[str, Any] = field(default_factory=dict)
+
+    def as_message(self) -> Dict[str, Any]:
+        """Assistant message để append lại vào hội thoại (đúng format Ollama)."""
+        message = {"role": "assistant", "content": self.content}
+        if self.tool_calls:
+            message["tool_calls"] = [
+                {"function": {"name": tc["name"], "arguments": tc["args"]}}
+                for tc in self.tool_calls
+            ]
+        return message
+
+
+class OllamaClient:
+    """Async HTTP client cho Ollama với connection pool dùng chung."""
+
+    def __init__(
+        self,
+        base_url: str = None,
+        model: str = None,
+        max_concurrency: int = None,
+        max_connections: int = None,
+        timeout: float = None,
+        scheduler: LLMScheduler = None,
+    ):
+        """
+        Args:
+            base_url: Ollama URL (default OLLAMA_BASE_URL)
+            model: Model mặc định (default OLLAMA_MODEL)
+            max_concurrency: Số request đồng thời tối đa tới Ollama
+            max_connections: Kích thước connection pool HTTP
+            timeout: Read timeout (giây) cho một lần generate
+            scheduler: LLMScheduler (default: scheduler dùng chung của process)
+        """
+        self.base_url = base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+        self.model = model or os.getenv("OLLAMA_MODEL", "qwen2.5:7b")
+        self.max_connections = max_connections or int(os.getenv("OLLAMA_MAX_CONNECTIONS", "20"))
+        self.timeout = timeout or float(os.getenv("OLLAMA_TIMEOUT", "120"))
+        self.keep_alive = _parse_keep_alive(os.getenv("OLLAMA_KEEP_ALIVE", "30m"))
+        self.keep_alive_interval = float(os.getenv("OLLAMA_KEEPALIVE_INTERVAL", "600"))
+        self.num_ctx = int(os.getenv("OLLAMA_NUM_CTX") or 0) or None
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self.scheduler = scheduler or (
+            LLMScheduler(max_concurrency=max_concurrency) if max_concurrency else get_llm_scheduler()
+        )
+        self.max_concurrency = self.scheduler.max_concurrency
+
+        logger.info(
+            f"OllamaClient ready | url={self.base_url} model={self.model} "
+            f"concurrency={self.max_concurrency} pool={self.max_connections} "
+            f"keep_alive={self.keep_alive}"
+        )
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Tạo httpx.AsyncClient lazily (phải nằm trong event loop đang chạy)."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=300,
+                ),
+            )
+        return self._client
+
+    async def chat(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict]] = None,
+        model: str = None,
+        temperature: float = 0.2,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> LLMResponse:
+        """
+        Gọi /api/chat (non-streaming).
+
+        Args:
+            messages: Hội thoại theo format Ollama
+            tools: Tool schema (optional)
+            model: Override model mặc định
+            temperature: Sampling temperature
+            priority: Lớp ưu tiên trong hàng đợi LLM
+
+        Returns:
+            LLMResponse với content và tool_calls đã chuẩn hóa
+
+        Raises:
+            LLMBusyError: Hàng đợi LLM đầy
+        """
+        payload = self._payload(messages, tools, model, temperature, stream=False)
+
+        with tracer.span("llm.chat", model=payload["model"], stream=False):
+            async with self.scheduler.slot(priority):
+                resp = await self._get_client().post("/api/chat", json=payload)
+            resp.raise_for_status()
+            data = resp.json()
+            self._record_timings(data)
+            return self.parse_response(data)
+
+    async def chat_stream(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict]] = None,
+        model: str = None,
+        temperature: float = 0.2,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Gọi /api/chat với stream=True, yield từng chunk JSON của Ollama.
+
+        Chunk cuối có done=True và chứa metadata (eval_count, durations...).
+        """
+        payload = self._payload(messages, tools, model, temperature, stream=True)
+
+        with tracer.span("llm.chat", model=payload["model"], stream=True):
+            async with self.scheduler.slot(priority):
+                async with self._get_client().stream("POST", "/api/chat", json=payload) as resp:
+                    resp.raise_for_status()
+                    async for line in resp.aiter_lines():
+                        if line.strip():
+                            chunk = json.loads(line)
+                            if chunk.get("done"):
+                                self._record_timings(chunk)
+                            yield chunk
+
+    async def warmup(
+        self,
+        messages: Optional[List[Dict[str, Any]]] = None,
+        tools: Optional[List[Dict]] = None,
+        model: str = None,
+    ) -> bool:
+        """
+        Load model vào GPU và prefill prompt prefix tĩnh (system prompt + tools)
+        để request đầu tiên không phải trả cold-start.
+
+        Returns:
+            True nếu warm-up thành công
+        """
+        payload = self._payload(
+            messages or [{"role": "user", "content": "ping"}],
+            tools, model, temperature=0.0, stream=False,
+        )
+        payload["options"]["num_predict"] = 1
+        try:
+            async with self.scheduler.slot(Priority.BACKGROUND):
+                resp = await self._get_client().post("/api/chat", json=payload)
+            resp.raise_for_status()
+            data = resp.json()
+            self._record_timings(data, kind="warmup")
+            logger.info(
+                f"🔥 Ollama warm-up done: {payload['model']} | "
+                f"load={data.get('load_duration', 0) / 1e6:.0f}ms "
+                f"prompt_eval={data.get('prompt_eval_duration', 0) / 1e6:.0f}ms"
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"Ollama warm-up failed: {e}")
+            return False
+
+    async def keep_alive_loop(self, model: str = None):
+        """Background task: định kỳ ping Ollama để model không bị unload khi idle."""
+        if self.keep_alive_interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(self.keep_alive_interval)
+            try:
+                async with self.scheduler.slot(Priority.BACKGROUND):
+                    resp = await self._get_client().post(
+                        "/api/generate",
+                        json={"model": model or self.model, "keep_alive": self.keep_alive},
+                    )
+                resp.raise_for_status()
+                logger.debug(f"Ollama keep-alive ping OK ({model or self.model})")
+            except Exception as e:
+                logger.warning(f"Ollama keep-alive ping failed: {e}")
+
+    def _payload(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict]],
+        model: Optional[str],
+        temperature: float,
+        stream: bool,
+    ) -> Dict[str, Any]:
+        """
+        Build /api/chat payload.
+
+        Options giữ cố định giữa các lần gọi (đổi num_ctx sẽ làm Ollama
+        reload model và mất KV cache của prompt prefix).
+        """
+        options = {"temperature": temperature}
+        if self.num_ctx:
+            options["num_ctx"] = self.num_ctx
+        payload = {
+            "model": model or self.model,
+            "messages": messages,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": options,
+        }
+        if tools:
+            payload["tools"] = tools
+        return payload
+
+    @staticmethod
+    def _record_timings(data: Dict[str, Any], kind: str = "chat"):
+        """Ghi prompt-eval vs generation time từ metadata của Ollama (ns → ms)."""
+        prompt_ms = data.get("prompt_eval_duration", 0) / 1e6
+        eval_ms = data.get("eval_duration", 0) / 1e6
+        load_ms = data.get("load_duration", 0) / 1e6
+        prompt_tokens = data.get("prompt_eval_count", 0)
+        eval_tokens = data.get("eval_count", 0)
+
+        metrics.observe("llm.prompt_eval_ms", prompt_ms, kind=kind)
+        metrics.observe("llm.eval_ms", eval_ms, kind=kind)
+        metrics.observe("llm.load_ms", load_ms, kind=kind)
+        metrics.observe("llm.prompt_tokens", prompt_tokens, buckets=TOKEN_BUCKETS, kind=kind)
+        metrics.observe("llm.eval_tokens", eval_tokens, buckets=TOKEN_BUCKETS, kind=kind)
+        if load_ms > 1000:
+            metrics.inc("llm.cold_loads", kind=kind)
+        tracer.current_span().set_attributes(
+            prompt_tokens=prompt_tokens,
+            eval_tokens=eval_tokens,
+            prompt_eval_ms=round(prompt_ms, 1),
+            eval_ms=round(eval_ms, 1),
+        )
+
+        logger.info(
+            f"[LLM] prompt_eval={prompt_ms:.0f}ms ({prompt_tokens} tok) | "
+            f"eval={eval_ms:.0f}ms ({eval_tokens} tok) | load={load_ms:.0f}ms"
+        )
+
+    @staticmethod
+    def parse_response(data: Dict[str, Any]) -> LLMResponse:
+        """Chuẩn hóa response Ollama → LLMResponse."""
+        message = data.get("message") or {}
+        tool_calls = []
+        for i, tc in enumerate(message.get("tool_calls") or []):
+            fn = tc.get("function", {})
+            args = fn.get("arguments") or {}
+            if isinstance(args, str):
+                try:
+                    args = json.loads(args)
+                except json.JSONDecodeError:
+                    args = {}
+            tool_calls.append({
+                "id": tc.get("id") or f"call_{i}",
+                "name": fn.get("name"),
+                "args": args,
+            })
+        return LLMResponse(
+            content=(message.get("content") or "").strip(),
+            tool_calls=tool_calls,
+            raw=data,
+        )
+
+    async def aclose(self):
+        """Đóng connection pool (gọi khi shutdown app)."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+
+_shared_client: Optional[OllamaClient] = None
+
+
+def get_ollama_client() -> OllamaClient:
+    """Trả về OllamaClient dùng chung cho toàn process."""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = OllamaClient()
+    return _shared_client
@@ -0,0 +1,215 @@
+"""
+LLMScheduler: admission control + priority queue cho mọi lời gọi LLM.
+
+- Giới hạn số generation đồng thời tới Ollama
+- Hàng đợi có giới hạn độ sâu; hết chỗ → LLMBusyError ngay (shed load)
+- Ưu tiên: INTERACTIVE (chat) được phục vụ trước BACKGROUND (warm-up, job)
+- Dùng được từ cả code async (TravelAgent) lẫn sync (BaseAgent, Reflection)
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from enum import IntEnum
+from typing import Callable, List, Optional
+
+from services.metrics import metrics
+from services.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+
+class LLMBusyError(Exception):
+    """LLM queue is full (or queue wait timed out) — caller should answer 'busy'."""
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "wake", "granted", "cancelled")
+
+    def __init__(self, priority: int, seq: int, wake: Callable[[], None]):
+        self.priority = priority
+        self.seq = seq
+        self.wake = wake
+        self.granted = False
+        self.cancelled = False
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class LLMScheduler:
+    """Bounded-concurrency scheduler with priority classes and load shedding."""
+
+    def __init__(
+        self,
+        max_concurrency: int = None,
+        max_queue: int = None,
+        queue_timeout: float = None,
+    ):
+        """
+        Args:
+            max_concurrency: Generation đồng thời tối đa (OLLAMA_MAX_CONCURRENCY)
+            max_queue: Số request chờ tối đa (LLM_MAX_QUEUE)
+            queue_timeout: Thời gian chờ tối đa trong hàng đợi (LLM_QUEUE_TIMEOUT)
+        """
+        self.max_concurrency = max_concurrency or int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("LLM_MAX_QUEUE", "32"))
+        self.queue_timeout = queue_timeout or float(os.getenv("LLM_QUEUE_TIMEOUT", "30"))
+
+        self._active = 0
+        self._queued = 0
+        self._heap: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+        logger.info(
+            f"LLMScheduler ready | concurrency={self.max_concurrency} "
+            f"queue={self.max_queue} timeout={self.queue_timeout}s"
+        )
+
+    # ------------------------------------------------------------------
+    # Async API
+    # ------------------------------------------------------------------
+
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        waiter = self._enqueue(priority, wake)
+        if waiter is None:
+            return
+
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            self._reject(priority, "timeout")
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        self._record_wait(priority, start)
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = Priority.INTERACTIVE):
+        """`async with scheduler.slot(): ...` — giữ một slot LLM."""
+        with tracer.span("llm.queue", priority=priority.name.lower()):
+            await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    # ------------------------------------------------------------------
+    # Sync API (legacy agents chạy ngoài event loop)
+    # ------------------------------------------------------------------
+
+    def acquire_sync(self, priority: Priority = Priority.INTERACTIVE):
+        event = threading.Event()
+        waiter = self._enqueue(priority, event.set)
+        if waiter is None:
+            return
+
+        start = time.perf_counter()
+        if not event.wait(self.queue_timeout):
+            self._abandon(waiter)
+            self._reject(priority, "timeout")
+        self._record_wait(priority, start)
+
+    @contextmanager
+    def slot_sync(self, priority: Priority = Priority.INTERACTIVE):
+        """`with scheduler.slot_sync(): ...` — giữ một slot LLM."""
+        with tracer.span("llm.queue", priority=priority.name.lower()):
+            self.acquire_sync(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    # ------------------------------------------------------------------
+    # Core
+    # ------------------------------------------------------------------
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+            while self._heap:
+                waiter = heapq.heappop(self._heap)
+                if waiter.cancelled:
+                    continue
+                self._queued -= 1
+                self._active += 1
+                waiter.granted = True
+                waiter.wake()
+                break
+            self._publish_gauges()
+
+    def _enqueue(self, priority: Priority, wake: Callable[[], None]) -> Optional[_Waiter]:
+        """Admit immediately (returns None) or queue a waiter; raise when full."""
+        with self._lock:
+            if self._active < self.max_concurrency and self._queued == 0:
+                self._active += 1
+                self._publish_gauges()
+                metrics.observe("llm.queue_wait_ms", 0, priority=priority.name.lower())
+                return None
+            if self._queued >= self.max_queue:
+                self._publish_gauges()
+                full = True
+            else:
+                full = False
+                waiter = _Waiter(int(priority), next(self._seq), wake)
+                heapq.heappush(self._heap, waiter)
+                self._queued += 1
+                self._publish_gauges()
+        if full:
+            self._reject(priority, "queue_full")
+        return waiter
+
+    def _abandon(self, waiter: _Waiter):
+        """Waiter gave up (timeout/cancel): drop it, or hand back a slot already granted."""
+        with self._lock:
+            if not waiter.granted:
+                waiter.cancelled = True
+                self._queued -= 1
+                self._publish_gauges()
+                return
+        self.release()
+
+    def _reject(self, priority: Priority, reason: str):
+        metrics.inc("llm.rejected", priority=priority.name.lower(), reason=reason)
+        logger.warning(f"[LLMScheduler] Rejected {priority.name} request: {reason}")
+        raise LLMBusyError(reason)
+
+    def _record_wait(self, priority: Priority, start: float):
+        metrics.observe(
+            "llm.queue_wait_ms", (time.perf_counter() - start) * 1000, priority=priority.name.lower()
+        )
+
+    def _publish_gauges(self):
+        metrics.set_gauge("llm.active", self._active)
+        metrics.set_gauge("llm.queue_depth", self._queued)
+
+
+_shared_scheduler: Optional[LLMScheduler] = None
+_shared_lock = threading.Lock()
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Trả về LLMScheduler dùng chung cho toàn process."""
+    global _shared_scheduler
+    with _shared_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = LLMScheduler()
+    return _shared_scheduler
@@ -0,0 +1,240 @@
+"""
+PlaceCardStore: "place card" dựng sẵn cho mỗi SubProject, lưu trong SQLite local.
+
+Một card = giới thiệu + vị trí + danh sách điểm tham quan (theo SortOrder)
++ media, nên mọi tool về một địa điểm chỉ cần một lookup theo khóa chính
+thay vì 1-4 round trip tới SQL Server.
+
+- Build theo region (jobs/build_place_cards.py hoặc sau vector sync):
+  3 câu SQL set-based → ghi lại toàn bộ region trong một transaction
+  (reader thấy bản cũ cho tới khi commit)
+- Card quá cũ (PLACE_CARDS_MAX_AGE) → tool dùng live SQL như trước
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "storage", "catalog", "place_cards.sqlite"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cards (
+    region_id INTEGER NOT NULL,
+    project_id INTEGER NOT NULL,
+    subproject_id INTEGER NOT NULL,
+    card TEXT NOT NULL,
+    PRIMARY KEY (region_id, project_id, subproject_id)
+);
+CREATE TABLE IF NOT EXISTS builds (
+    region_id INTEGER PRIMARY KEY,
+    built_at REAL NOT NULL,
+    cards INTEGER NOT NULL
+);
+"""
+
+
+class PlaceCardStore:
+    """Local SQLite store of denormalized place cards."""
+
+    def __init__(self, path: str = None, max_age: float = None):
+        """
+        Args:
+            path: File SQLite (PLACE_CARDS_PATH, default storage/catalog/place_cards.sqlite)
+            max_age: Tuổi tối đa (giây) của bản build để còn được dùng (PLACE_CARDS_MAX_AGE)
+        """
+        self.path = path or os.getenv("PLACE_CARDS_PATH") or DEFAULT_PATH
+        self.max_age = max_age or float(os.getenv("PLACE_CARDS_MAX_AGE", str(26 * 3600)))
+        self._local = threading.local()
+        self._builds: Dict[int, float] = {}
+        self._builds_checked = 0.0
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Read
+    # ------------------------------------------------------------------
+
+    def get(self, region_id: int, project_id: int, subproject_id: int) -> Optional[Dict[str, Any]]:
+        """Card của SubProject nếu có và bản build của region còn mới, ngược lại None."""
+        if not self.is_fresh(region_id):
+            metrics.inc("place_cards.lookups", outcome="stale")
+            return None
+        start = time.perf_counter()
+        row = self._conn().execute(
+            "SELECT card FROM cards WHERE region_id = ? AND project_id = ? AND subproject_id = ?",
+            (int(region_id), int(project_id), int(subproject_id)),
+        ).fetchone()
+        metrics.observe("place_cards.lookup_ms", (time.perf_counter() - start) * 1000)
+        metrics.inc("place_cards.lookups", outcome="hit" if row else "miss")
+        return json.loads(row[0]) if row else None
+
+    def is_fresh(self, region_id: int) -> bool:
+        built_at = self._built_at(int(region_id))
+        return built_at is not None and time.time() - built_at <= self.max_age
+
+    def _built_at(self, region_id: int) -> Optional[float]:
+        # Build info is re-read at most every 30s (another process may rebuild)
+        now = time.monotonic()
+        with self._lock:
+            if now - self._builds_checked >= 30:
+                self._builds_checked = now
+                try:
+                    rows = self._conn().execute("SELECT region_id, built_at FROM builds").fetchall()
+                    self._builds = {int(r): float(t) for r, t in rows}
+                except sqlite3.Error:
+                    self._builds = {}
+            return self._builds.get(region_id)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Build
+    # ------------------------------------------------------------------
+
+    def build_region(self, db_manager, region_id: int) -> int:
+        """Dựng lại card của cả region từ SQL Server. Returns: số card."""
+        start = time.perf_counter()
+        prefix = db_manager.DB_MAP[region_id]["prefix"]
+
+        with db_manager.connect(region_id) as conn:
+            places = conn.execute(text(f"""
+                SELECT SubProjectID, ProjectID, SubProjectName, Introduction, Location
+                FROM {prefix}.SubProjects
+                WHERE SubProjectName IS NOT NULL
+            """)).fetchall()
+            attractions = conn.execute(text(f"""
+                SELECT SubProjectAttractionID, SubProjectID, AttractionName, Introduction, SortOrder
+                FROM {prefix}.SubProjectAttractions
+                ORDER BY SubProjectID, SortOrder
+            """)).fetchall()
+            media = conn.execute(text(f"""
+                SELECT a.SubProjectID, a.AttractionName, am.MediaType, am.MediaURL
+                FROM {prefix}.SubProjectAttractions a
+                JOIN {prefix}.SubProjectAttractionMedia am
+                    ON a.SubProjectAttractionID = am.SubProjectAttractionID
+                ORDER BY a.SubProjectID, a.SortOrder
+            """)).fetchall()
+
+        cards = build_cards(places, attractions, media)
+        self.replace_region(region_id, cards)
+        logger.info(
+            f"[PlaceCards] Region {region_id}: {len(cards)} cards "
+            f"in {(time.perf_counter() - start) * 1000:.0f}ms"
+        )
+        return len(cards)
+
+    def replace_region(self, region_id: int, cards: List[Dict[str, Any]]):
+        """Thay toàn bộ card của region trong một transaction."""
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM cards WHERE region_id = ?", (int(region_id),))
+            conn.executemany(
+                "INSERT INTO cards (region_id, project_id, subproject_id, card) VALUES (?, ?, ?, ?)",
+                [
+                    (int(region_id), c["project_id"], c["subproject_id"], json.dumps(c, ensure_ascii=False))
+                    for c in cards
+                ],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO builds (region_id, built_at, cards) VALUES (?, ?, ?)",
+                (int(region_id), time.time(), len(cards)),
+            )
+        with self._lock:
+            self._builds_checked = 0.0
+
+
+def rebuild_regions(db_manager, region_ids: Iterable[int] = None) -> Dict[int, int]:
+    """
+    Best-effort rebuild (sau vector sync): lỗi của một region chỉ được log,
+    card cũ của region đó hết hạn theo PLACE_CARDS_MAX_AGE.
+
+    Returns: {region_id: số card} của các region build thành công.
+    """
+    store = PlaceCardStore()
+    # Regions build concurrently; a failed region is logged by fan_out_blocking
+    return db_manager.fan_out_blocking(lambda region_id: store.build_region(db_manager, region_id), region_ids)
+
+
+def build_cards(places, attractions, media) -> List[Dict[str, Any]]:
+    """Gộp rows SubProjects / SubProjectAttractions / media thành card theo SubProjectID."""
+    cards: Dict[int, Dict[str, Any]] = {}
+    for p in places:
+        cards[int(p.SubProjectID)] = {
+            "subproject_id": int(p.SubProjectID),
+            "project_id": int(p.ProjectID),
+            "name": p.SubProjectName,
+            "introduction": p.Introduction,
+            "location": p.Location,
+            "attractions": [],
+            "media": [],
+        }
+    for a in attractions:
+        card = cards.get(int(a.SubProjectID))
+        if card is not None:
+            card["attractions"].append({"name": a.AttractionName, "introduction": a.Introduction})
+    for m in media:
+        card = cards.get(int(m.SubProjectID))
+        if card is not None:
+            card["media"].append({"attraction": m.AttractionName, "type": m.MediaType, "url": m.MediaURL})
+    return list(cards.values())
+
+
+def card_tool_result(tool_name: str, card: Dict[str, Any], args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Kết quả tool (cùng format với live SQL) lấy từ card.
+
+    None khi card không có điểm tham quan (caller chuyển sang vector search).
+    """
+    if tool_name == "get_place_info":
+        return {
+            "found": True,
+            "name": card["name"],
+            "introduction": card["introduction"] or "Không có thông tin",
+            "source": "place_card",
+        }
+    if tool_name == "get_place_location":
+        return {
+            "found": True,
+            "name": card["name"],
+            "location": card["location"] or "Không có thông tin địa chỉ",
+            "source": "place_card",
+        }
+    if tool_name == "get_place_media":
+        media_type = args.get("media_type", "video")
+        media = [m for m in card["media"] if media_type == "all" or m["type"] == media_type][:5]
+        if not media:
+            return {"found": False, "message": f"Không tìm thấy media của {card['name']}"}
+        return {"found": True, "name": card["name"], "media": media, "count": len(media), "source": "place_card"}
+    if tool_name == "get_attractions":
+        attractions = [
+            {"name": a["name"], "description": (a["introduction"] or "")[:200]}
+            for a in card["attractions"][: int(args.get("limit", 5))]
+        ]
+        if not attractions:
+            return None
+        return {
+            "found": True,
+            "place": card["name"],
+            "attractions": attractions,
+            "count": len(attractions),
+            "source": "place_card",
+        }
+    return None
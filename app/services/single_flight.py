@@ -0,0 +1,77 @@
+"""
+SingleFlight: gộp các lời gọi async trùng key đang chạy đồng thời.
+
+Request đầu tiên (leader) khởi chạy một task dùng chung; các request trùng
+key sau đó chỉ await kết quả của task đó. Khi một waiter bị cancel (client
+disconnect), task dùng chung vẫn chạy tiếp cho các waiter còn lại và chỉ bị
+cancel khi không còn ai chờ.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """In-flight request coalescing theo key."""
+
+    def __init__(self, name: str = "singleflight"):
+        """
+        Args:
+            name: Prefix cho metrics (vd. "chat.inflight")
+        """
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        """True nếu đang có lời gọi cho key này."""
+        return key in self._calls
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Chạy fn() một lần cho mọi caller đồng thời có cùng key.
+
+        Args:
+            key: Khóa coalescing
+            fn: Coroutine factory, chỉ được gọi bởi leader
+
+        Returns:
+            Kết quả (hoặc exception) của lần chạy dùng chung
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            metrics.inc(f"{self.name}.leaders")
+        else:
+            metrics.inc(f"{self.name}.coalesced")
+            logger.info(f"[{self.name}] Coalesced duplicate request ({call.waiters} waiting)")
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            call.waiters -= 1
+            if not call.task.done() and call.waiters == 0:
+                # Nobody is waiting anymore: stop the shared work and make sure
+                # new callers start fresh instead of joining a cancelled task
+                self._forget(key, call)
+                call.task.cancel()
+                metrics.inc(f"{self.name}.cancelled")
+            raise
+
+    def _forget(self, key: Hashable, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
@@ -0,0 +1,110 @@
+"""
+Region sync events: version dữ liệu của từng region.
+
+Celery worker tăng version của region sau khi sync xong (qua Redis).
+API process đọc version (poll Redis, có memo) và dùng nó trong cache key,
+nên cache/index của region đó tự invalidate mà không cần restart.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from services.cache import RedisTier
+
+logger = logging.getLogger(__name__)
+
+
+class RegionVersions:
+    """Theo dõi version dữ liệu theo region (local + Redis)."""
+
+    def __init__(self, poll_interval: float = None, redis_tier: Optional[RedisTier] = None):
+        """
+        Args:
+            poll_interval: Số giây giữa 2 lần đọc version từ Redis
+            redis_tier: RedisTier dùng chung (default namespace "tbot:sync")
+        """
+        self.poll_interval = (
+            poll_interval if poll_interval is not None
+            else float(os.getenv("SYNC_VERSION_POLL_SECONDS", "5"))
+        )
+        self._redis = redis_tier or RedisTier("tbot:sync")
+        self._remote: Dict[int, Tuple[int, float]] = {}
+        self._local: Dict[int, int] = {}
+        self._listeners: List[Callable[[int], None]] = []
+        self._lock = threading.Lock()
+
+    def current(self, region_id: int) -> str:
+        """Version hiện tại của region (đổi giá trị sau mỗi lần sync)."""
+        now = time.monotonic()
+        changed = False
+        with self._lock:
+            entry = self._remote.get(region_id)
+            if entry is None or now - entry[1] >= self.poll_interval:
+                prev = entry[0] if entry else None
+                remote = self._redis.get_int(f"region:{region_id}")
+                value = remote if remote is not None else (prev or 0)
+                self._remote[region_id] = (value, now)
+                changed = prev is not None and value != prev
+            else:
+                value = entry[0]
+            version = f"{value}.{self._local.get(region_id, 0)}"
+
+        if changed:
+            logger.info(f"[Sync] Region {region_id} data changed → v{version}")
+            self._notify(region_id)
+        return version
+
+    async def current_async(self, region_id: int) -> str:
+        """
+        current() cho code chạy trên event loop.
+
+        Version còn trong memo được trả ngay; khi cần đọc lại Redis (socket
+        blocking, có thể chờ tới socket timeout) thì đọc trong thread pool.
+        """
+        entry = self._remote.get(region_id)
+        if entry is not None and time.monotonic() - entry[1] < self.poll_interval:
+            return f"{entry[0]}.{self._local.get(region_id, 0)}"
+        return await asyncio.to_thread(self.current, region_id)
+
+    def bump(self, region_id: int):
+        """Đánh dấu region vừa sync xong (local + Redis)."""
+        with self._lock:
+            self._local[region_id] = self._local.get(region_id, 0) + 1
+        self._redis.incr(f"region:{region_id}")
+        self._notify(region_id)
+
+    def subscribe(self, callback: Callable[[int], None]):
+        """Đăng ký callback(region_id) khi phát hiện region thay đổi."""
+        self._listeners.append(callback)
+
+    def _notify(self, region_id: int):
+        for callback in list(self._listeners):
+            try:
+                callback(region_id)
+            except Exception as e:
+                logger.error(f"[Sync] Listener failed for region {region_id}: {e}")
+
+
+_shared_versions: Optional[RegionVersions] = None
+
+
+def get_region_versions() -> RegionVersions:
+    """Trả về RegionVersions dùng chung cho toàn process."""
+    global _shared_versions
+    if _shared_versions is None:
+        _shared_versions = RegionVersions()
+    return _shared_versions
+
+
+def publish_region_synced(region_id: int):
+    """
+    Gọi sau khi sync xong một region (từ Celery task hoặc job).
+
+    Version mới làm AnswerCache và ToolResultCache bỏ entry cũ của region;
+    listener (PlaceIndex) được báo để nạp lại.
+    """
+    get_region_versions().bump(region_id)
+    logger.info(f"[Sync] Published sync event for region {region_id}")
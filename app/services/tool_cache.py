@@ -0,0 +1,134 @@
+"""
+ToolResultCache: read-through cache cho kết quả ToolExecutor.
+
+Key = (tool, region_id, project_id, region version, place, args).
+- Place là SubProjectID đã resolve (PlaceIndex) nên "Ho Guom" / "Hồ Gươm"
+  dùng chung một entry
+- Tầng 1: LRU in-process; tầng 2: Redis (dùng chung giữa các worker)
+- found=False được cache ngắn hơn (TOOL_CACHE_MISS_TTL)
+- Request trùng key đang chạy được gộp (SingleFlight) → không stampede DB
+Sync xong một region (publish_region_synced) → version đổi → cache cũ của
+region đó không còn được dùng.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from services.cache import RedisTier, TTLCache
+from services.metrics import metrics
+from services.single_flight import SingleFlight
+from services.sync_events import RegionVersions, get_region_versions
+
+logger = logging.getLogger(__name__)
+
+
+class ToolResultCache:
+    """Two-tier, version-invalidated cache for tool results."""
+
+    def __init__(
+        self,
+        ttl: float = None,
+        miss_ttl: float = None,
+        max_entries: int = None,
+        redis_tier: Optional[RedisTier] = None,
+        versions: Optional[RegionVersions] = None,
+    ):
+        """
+        Args:
+            ttl: Thời gian sống của kết quả tìm thấy (TOOL_CACHE_TTL, giây)
+            miss_ttl: Thời gian sống của kết quả found=False (TOOL_CACHE_MISS_TTL)
+            max_entries: Kích thước LRU in-process (TOOL_CACHE_MAX_ENTRIES)
+            redis_tier: Tầng Redis (default namespace "tbot:tool")
+            versions: RegionVersions dùng để invalidate theo sync
+        """
+        self.enabled = os.getenv("TOOL_CACHE_ENABLED", "true").lower() == "true"
+        self.ttl = ttl or float(os.getenv("TOOL_CACHE_TTL", str(6 * 3600)))
+        self.miss_ttl = miss_ttl or float(os.getenv("TOOL_CACHE_MISS_TTL", "300"))
+        self._local = TTLCache(
+            max_entries=max_entries or int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "5000")),
+            ttl=self.ttl,
+        )
+        self._redis = redis_tier or RedisTier("tbot:tool")
+        self._versions = versions or get_region_versions()
+        self._inflight = SingleFlight(name="tool_cache.inflight")
+        self._hits = 0
+        self._lookups = 0
+        self._lock = threading.Lock()
+
+        logger.info(f"ToolResultCache ready | enabled={self.enabled} ttl={self.ttl}s miss_ttl={self.miss_ttl}s")
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def key(self, tool: str, region_id: int, project_id: int, place: str, args: Dict[str, Any]) -> str:
+        version = await self._versions.current_async(region_id)
+        digest = hashlib.sha1(
+            json.dumps(args, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+        ).hexdigest()[:16]
+        return f"{tool}:{region_id}:{project_id}:v{version}:{place}:{digest}"
+
+    async def get_or_load(
+        self, tool: str, key: str, loader: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Kết quả đã cache, hoặc loader() (một lần cho mọi request trùng key).
+
+        Kết quả có "error" không được cache.
+        """
+        if not self.enabled:
+            return await loader()
+
+        entry = self._local.get(key)
+        if entry is not None:
+            return self._hit(tool, "memory", entry)
+
+        coalesced = self._inflight.in_flight(key)
+        entry, tier = await self._inflight.do(key, lambda: self._load(key, loader))
+        if coalesced:
+            tier = "coalesced"
+        if tier == "miss":
+            self._record(tool, "miss", hit=False)
+            return entry["result"]
+        return self._hit(tool, tier, entry)
+
+    def invalidate_region(self, region_id: int):
+        """Invalidate toàn bộ kết quả tool của một region (bump version)."""
+        self._versions.bump(region_id)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    async def _load(self, key: str, loader):
+        entry = await asyncio.to_thread(self._redis.get, key)
+        if entry is not None:
+            self._local.set(key, entry)
+            return entry, "redis"
+
+        start = time.perf_counter()
+        result = await loader()
+        entry = {"result": result, "cost_ms": round((time.perf_counter() - start) * 1000, 3)}
+        if "error" not in result:
+            ttl = self.ttl if result.get("found") else self.miss_ttl
+            self._local.set(key, entry, ttl)
+            await asyncio.to_thread(self._redis.set, key, entry, ttl)
+        return entry, "miss"
+
+    def _hit(self, tool: str, tier: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        self._record(tool, tier, hit=True)
+        metrics.inc("tool_cache.saved_ms", entry.get("cost_ms", 0), tool=tool)
+        return entry["result"]
+
+    def _record(self, tool: str, outcome: str, hit: bool):
+        metrics.inc("tool_cache.requests", tool=tool, outcome=outcome)
+        with self._lock:
+            self._lookups += 1
+            self._hits += int(hit)
+            ratio = self._hits / self._lookups
+        metrics.set_gauge("tool_cache.hit_ratio", round(ratio, 4))
@@ -0,0 +1,302 @@
+"""
+Tracing: span theo từng stage của một request (pipeline, agent, LLM, tool,
+SQL, vector search, embedding).
+
+- tracer.span(name, **attrs): context manager; quan hệ cha/con đi theo
+  contextvars nên tự nối qua asyncio task và asyncio.to_thread
+- Thời lượng mỗi span → histogram "span.duration_ms{span=...}" trong metrics
+- Trace hoàn chỉnh được giữ trong ring buffer (GET /api/traces) và có thể
+  xuất dạng OTLP/JSON, đẩy tới OpenTelemetry collector (TRACING_OTLP_ENDPOINT)
+"""
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Attributes promoted to histogram labels (low cardinality only)
+HISTOGRAM_LABELS = ("tool", "region")
+
+_OTLP_STATUS = {"ok": 1, "error": 2}
+
+
+class Span:
+    """One timed stage of a request."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+                 "attributes", "status", "message", "_t0")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = {k: v for k, v in attributes.items() if v is not None}
+        self.status = "ok"
+        self.message = ""
+        self._t0 = time.perf_counter_ns()
+
+    def set_attribute(self, key: str, value: Any):
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def record_error(self, exc: BaseException):
+        self.status = "error"
+        self.message = str(exc)[:200]
+        self.attributes["error.type"] = type(exc).__name__
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else self.start_ns + time.perf_counter_ns() - self._t0
+        return (end - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": dict(self.attributes),
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": _OTLP_STATUS[self.status], "message": self.message},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """Returned when tracing is disabled."""
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, **attributes):
+        pass
+
+    def record_error(self, exc):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: ContextVar[Optional[Span]] = ContextVar("tbot_current_span", default=None)
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+class Tracer:
+    """Span recorder with an in-memory trace buffer and optional OTLP push."""
+
+    def __init__(
+        self,
+        enabled: bool = None,
+        buffer_size: int = None,
+        otlp_endpoint: str = None,
+        service_name: str = None,
+    ):
+        """
+        Args:
+            enabled: Bật/tắt tracing (TRACING_ENABLED)
+            buffer_size: Số trace gần nhất giữ trong bộ nhớ (TRACING_BUFFER_SIZE)
+            otlp_endpoint: OTLP/HTTP traces URL, vd. http://otel-collector:4318/v1/traces
+                (TRACING_OTLP_ENDPOINT, rỗng = không đẩy)
+            service_name: resource service.name (TRACING_SERVICE_NAME)
+        """
+        self.enabled = (
+            enabled if enabled is not None
+            else os.getenv("TRACING_ENABLED", "true").lower() == "true"
+        )
+        self.buffer_size = buffer_size or int(os.getenv("TRACING_BUFFER_SIZE", "200"))
+        self.otlp_endpoint = otlp_endpoint or os.getenv("TRACING_OTLP_ENDPOINT", "")
+        self.service_name = service_name or os.getenv("TRACING_SERVICE_NAME", "tbot-api")
+
+        self._open: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._recent: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._export_queue: Optional[queue.Queue] = None
+        if self.enabled and self.otlp_endpoint:
+            self._start_exporter()
+
+    # ------------------------------------------------------------------
+    # Span API
+    # ------------------------------------------------------------------
+
+    def start_span(self, name: str, **attributes) -> Span:
+        """Start a child of the current span without making it current (callback-style APIs)."""
+        parent = _current_span.get()
+        trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        return Span(name, trace_id, parent.span_id if parent else None, attributes)
+
+    def end_span(self, span: Span):
+        if span.end_ns is not None:
+            return
+        span.end_ns = span.start_ns + time.perf_counter_ns() - span._t0
+
+        labels = {k: span.attributes[k] for k in HISTOGRAM_LABELS if k in span.attributes}
+        metrics.observe("span.duration_ms", span.duration_ms, span=span.name, **labels)
+
+        finished = None
+        with self._lock:
+            late = self._recent.get(span.trace_id)
+            if late is not None:
+                # Background work (e.g. cancelled speculation) ending after its request
+                late.append(span)
+                return
+            spans = self._open.setdefault(span.trace_id, [])
+            spans.append(span)
+            if span.parent_id is None:
+                finished = self._open.pop(span.trace_id)
+                self._recent[span.trace_id] = finished
+                while len(self._recent) > self.buffer_size:
+                    self._recent.popitem(last=False)
+            while len(self._open) > self.buffer_size * 5:
+                self._open.popitem(last=False)
+
+        if finished is not None and self._export_queue is not None:
+            try:
+                self._export_queue.put_nowait(finished)
+            except queue.Full:
+                metrics.inc("tracing.export_dropped")
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        """`with tracer.span("tool.execute", tool=...) as span:` — timed, nested span."""
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+        span = self.start_span(name, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except GeneratorExit:
+            raise
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # Async generator resumed in another context (client disconnect)
+                pass
+            self.end_span(span)
+
+    def current_span(self):
+        """Span đang active (hoặc no-op span)."""
+        return _current_span.get() or _NOOP_SPAN
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+
+    def recent(self, limit: int = 20) -> List[List[Span]]:
+        """Trace hoàn chỉnh gần nhất (mới nhất trước)."""
+        with self._lock:
+            traces = list(self._recent.values())[-limit:]
+        return list(reversed(traces))
+
+    def summarize(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Trace gần nhất dạng JSON gọn (root + các span con)."""
+        out = []
+        for spans in self.recent(limit):
+            root = next((s for s in spans if s.parent_id is None), spans[-1])
+            out.append({
+                "trace_id": root.trace_id,
+                "name": root.name,
+                "duration_ms": round(root.duration_ms, 3),
+                "status": root.status,
+                "spans": [s.to_dict() for s in sorted(spans, key=lambda s: s.start_ns)],
+            })
+        return out
+
+    def to_otlp(self, traces: List[List[Span]]) -> Dict[str, Any]:
+        """OTLP/JSON ExportTraceServiceRequest."""
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": "tbot"},
+                    "spans": [s.to_otlp() for spans in traces for s in spans],
+                }],
+            }]
+        }
+
+    def _start_exporter(self):
+        self._export_queue = queue.Queue(maxsize=1000)
+        threading.Thread(target=self._export_loop, daemon=True, name="otlp-exporter").start()
+        logger.info(f"Tracing: exporting OTLP/JSON to {self.otlp_endpoint}")
+
+    def _export_loop(self):
+        import httpx
+
+        client = httpx.Client(timeout=5.0)
+        while True:
+            batch = [self._export_queue.get()]
+            # Small batches: whatever else finished in the meantime
+            while len(batch) < 50:
+                try:
+                    batch.append(self._export_queue.get(timeout=1.0))
+                except queue.Empty:
+                    break
+            try:
+                resp = client.post(self.otlp_endpoint, json=self.to_otlp(batch))
+                resp.raise_for_status()
+                metrics.inc("tracing.exported", len(batch))
+            except Exception as e:
+                metrics.inc("tracing.export_errors")
+                logger.warning(f"Tracing: OTLP export failed: {e}")
+
+
+class TracedEmbedder:
+    """SentenceTransformer proxy: mỗi encode() là một span "embed.encode"."""
+
+    def __init__(self, model):
+        self._model = model
+
+    def encode(self, sentences, *args, **kwargs):
+        batch = 1 if isinstance(sentences, str) else len(sentences)
+        with tracer.span("embed.encode", batch=batch):
+            return self._model.encode(sentences, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+# Tracer dùng chung cho toàn process
+tracer = Tracer()
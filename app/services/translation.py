@@ -0,0 +1,162 @@
+"""
+TranslationService: Google Translate với cache theo nội dung.
+
+- Key = (source, target, sha256(text)) → cùng một câu chỉ dịch một lần
+- Tầng 1: LRU in-process; tầng 2: Redis (appendonly, sống qua restart)
+- Gọi GoogleTranslator trong thread pool, không block event loop
+- Request trùng đang chạy đồng thời được gộp (SingleFlight)
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from typing import List, Optional
+
+from deep_translator import GoogleTranslator
+
+from services.cache import RedisTier, TTLCache
+from services.language import get_language_detector
+from services.metrics import metrics
+from services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Our language codes → Google Translate codes
+GOOGLE_CODES = {
+    "zh": "zh-CN",
+    "zh-cn": "zh-CN",
+    "zh-tw": "zh-TW",
+}
+
+
+def google_code(lang: str) -> str:
+    lang = (lang or "auto").lower()
+    return GOOGLE_CODES.get(lang, lang)
+
+
+class TranslationService:
+    """Cached, non-blocking translation."""
+
+    def __init__(
+        self,
+        max_entries: int = None,
+        ttl: float = None,
+        redis_tier: Optional[RedisTier] = None,
+        max_concurrency: int = None,
+    ):
+        """
+        Args:
+            max_entries: Kích thước LRU in-process (TRANSLATION_CACHE_MAX_ENTRIES)
+            ttl: Thời gian sống của bản dịch (TRANSLATION_CACHE_TTL, giây)
+            redis_tier: Tầng persistent (default RedisTier("tbot:translate"))
+            max_concurrency: Số request Google Translate đồng thời khi dịch bulk
+                (TRANSLATION_MAX_CONCURRENCY)
+        """
+        self.ttl = ttl or float(os.getenv("TRANSLATION_CACHE_TTL", str(30 * 24 * 3600)))
+        self.max_concurrency = max_concurrency or int(os.getenv("TRANSLATION_MAX_CONCURRENCY", "8"))
+        self._memory = TTLCache(
+            max_entries=max_entries or int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "5000")),
+            ttl=self.ttl,
+        )
+        self._redis = redis_tier or RedisTier("tbot:translate")
+        self._inflight = SingleFlight(name="translate.inflight")
+
+    @staticmethod
+    def cache_key(source: str, target: str, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{source}:{target}:{digest}"
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def translate(self, text: str, target: str, source: str = "auto") -> str:
+        """
+        Dịch text sang target (async, cache + coalescing).
+
+        Raises:
+            Exception: Lỗi từ Google Translate (không cache lỗi)
+        """
+        if not text or not text.strip():
+            return text
+        source, target = self._resolve(text, source, target)
+        if source == target:
+            metrics.inc("translate.skipped")
+            return text
+
+        key = self.cache_key(source, target, text)
+        cached = self._memory.get(key)
+        if cached is not None:
+            metrics.inc("translate.cache", tier="memory")
+            return cached
+
+        return await self._inflight.do(
+            key, lambda: asyncio.to_thread(self._fetch, key, text, source, target)
+        )
+
+    async def translate_many(self, texts: List[str], target: str, source: str = "auto") -> List[str]:
+        """Dịch nhiều chuỗi một lần (trùng lặp chỉ dịch một lần), giữ nguyên thứ tự."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        unique = list(dict.fromkeys(texts))
+
+        async def one(text: str) -> str:
+            async with semaphore:
+                return await self.translate(text, target, source)
+
+        translated = dict(zip(unique, await asyncio.gather(*(one(t) for t in unique))))
+        return [translated[t] for t in texts]
+
+    def translate_sync(self, text: str, target: str, source: str = "auto") -> str:
+        """Bản đồng bộ cho code legacy chạy ngoài event loop (AnswerAgent)."""
+        if not text or not text.strip():
+            return text
+        source, target = self._resolve(text, source, target)
+        if source == target:
+            metrics.inc("translate.skipped")
+            return text
+
+        key = self.cache_key(source, target, text)
+        cached = self._memory.get(key)
+        if cached is not None:
+            metrics.inc("translate.cache", tier="memory")
+            return cached
+        return self._fetch(key, text, source, target)
+
+    # ------------------------------------------------------------------
+    # Internals (blocking, run in a worker thread)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _resolve(text: str, source: str, target: str):
+        """Google codes; "auto" source resolved locally so same-language text skips the round trip."""
+        if (source or "auto") == "auto":
+            source = get_language_detector().identify(text) or "auto"
+        return google_code(source), google_code(target)
+
+    def _fetch(self, key: str, text: str, source: str, target: str) -> str:
+        cached = self._redis.get(key)
+        if cached is not None:
+            metrics.inc("translate.cache", tier="redis")
+            self._memory.set(key, cached)
+            return cached
+
+        metrics.inc("translate.cache", tier="miss")
+        start = time.perf_counter()
+        translated = GoogleTranslator(source=source, target=target).translate(text) or text
+        metrics.observe("translate.upstream_ms", (time.perf_counter() - start) * 1000)
+
+        self._memory.set(key, translated)
+        self._redis.set(key, translated, self.ttl)
+        return translated
+
+
+_shared_service: Optional[TranslationService] = None
+
+
+def get_translation_service() -> TranslationService:
+    """Trả về TranslationService dùng chung cho toàn process."""
+    global _shared_service
+    if _shared_service is None:
+        _shared_service = TranslationService()
+    return _shared_service
@@ -42,4 +42,8 @@ celery_app.conf.beat_schedule = {
         "task": "tasks.sync_tasks.sync_all_regions",
         "schedule": 86400.0,  # Every 24 hours
     },
+    "export-catalog-snapshot": {
+        "task": "tasks.sync_tasks.export_catalog_snapshot",
+        "schedule": float(os.getenv("CATALOG_SNAPSHOT_INTERVAL", "21600")),  # Every 6 hours
+    },
 }
@@ -21,7 +21,7 @@ def sync_all_regions(self):
     
     try:
         # Lazy imports to avoid circular dependencies
-        from database.db import MultiDBManager
+        from database.db import get_db_manager
         from sentence_transformers import SentenceTransformer
         
         # Check if Qdrant is configured
@@ -33,13 +33,29 @@ def sync_all_regions(self):
             from rag.vector_store import TravelVectorStore
             
             embedder = SentenceTransformer("intfloat/multilingual-e5-small")
-            db_manager = MultiDBManager()
+            db_manager = get_db_manager()
             store = TravelVectorStore(embedder=embedder, host=qdrant_host)
             
-            count = asyncio.run(store.index_from_database(db_manager))
+            count, failed = asyncio.run(store.index_from_database(db_manager))
+            synced = [region_id for region_id in db_manager.DB_MAP if region_id not in failed]
             
-            logger.info(f"Vector sync complete: {count} documents indexed")
-            return {"indexed": count, "task_id": self.request.id, "status": "success"}
+            # Rebuild place cards before invalidating, so tools pick up the new cards
+            from services.place_cards import rebuild_regions
+            rebuild_regions(db_manager, synced)
+            
+            # Invalidate answer + tool result caches (and refresh place index) of every synced region
+            from services.sync_events import publish_region_synced
+            for region_id in synced:
+                publish_region_synced(region_id)
+            
+            status = "partial" if failed else "success"
+            logger.info(f"Vector sync {status}: {count} documents indexed, failed regions {failed}")
+            return {
+                "indexed": count,
+                "failed_regions": failed,
+                "task_id": self.request.id,
+                "status": status,
+            }
             
         except ImportError:
             logger.warning("TravelVectorStore not yet implemented (Phase 2)")
@@ -58,7 +74,7 @@ def sync_single_region(self, region_id: int):
     logger.info(f"Syncing region {region_id}...")
     
     try:
-        from database.db import MultiDBManager
+        from database.db import get_db_manager
         from sentence_transformers import SentenceTransformer
         
         import os
@@ -68,11 +84,18 @@ def sync_single_region(self, region_id: int):
             from rag.vector_store import TravelVectorStore
             
             embedder = SentenceTransformer("intfloat/multilingual-e5-small")
-            db_manager = MultiDBManager()
+            db_manager = get_db_manager()
             store = TravelVectorStore(embedder=embedder, host=qdrant_host)
             
             count = asyncio.run(store.index_region(db_manager, region_id))
             
+            from services.place_cards import rebuild_regions
+            rebuild_regions(db_manager, [region_id])
+            
+            # Invalidate answer + tool result caches (and refresh place index) of this region
+            from services.sync_events import publish_region_synced
+            publish_region_synced(region_id)
+            
             return {"region_id": region_id, "indexed": count, "status": "success"}
             
         except ImportError:
@@ -81,3 +104,23 @@ def sync_single_region(self, region_id: int):
     except Exception as e:
         logger.error(f"Region sync failed: {e}")
         return {"status": "error", "message": str(e)}
+
+
+@celery_app.task(bind=True)
+def export_catalog_snapshot(self):
+    """
+    Export catalog tables of every region to the local SQLite snapshot.
+    Called periodically by Celery Beat (CATALOG_SNAPSHOT_INTERVAL).
+    """
+    try:
+        from database.db import get_db_manager
+        from services.catalog_snapshot import export_regions
+
+        db_manager = get_db_manager()
+        exported = export_regions(db_manager)
+        status = "success" if len(exported) == len(db_manager.DB_MAP) else "partial"
+        return {"exported": exported, "status": status}
+
+    except Exception as e:
+        logger.error(f"Catalog snapshot export failed: {e}")
+        return {"status": "error", "message": str(e)}
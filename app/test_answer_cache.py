@@ -0,0 +1,65 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from services.answer_cache import AnswerCache, normalize_query
+from services.cache import RedisTier
+from services.sync_events import RegionVersions
+
+
+class _Embedder:
+    """Stand-in for e5: fixed unit vectors per normalized query."""
+
+    VECTORS = {
+        "query: hồ gươm ở đâu": [1.0, 0.0],
+        "query: hồ gươm nằm ở đâu": [0.99, 0.141],
+        "query: chùa hương ở đâu": [0.0, 1.0],
+    }
+
+    def encode(self, text, normalize_embeddings=True):
+        return np.array(self.VECTORS[text])
+
+
+def _cache(embedder=None):
+    cache = AnswerCache(
+        embedder=embedder,
+        similarity_threshold=0.97,
+        redis_tier=RedisTier("test:answer", url=""),
+        versions=RegionVersions(redis_tier=RedisTier("test:sync", url="")),
+    )
+    cache.enabled = True
+    return cache
+
+
+@pytest.mark.parametrize("raw", ["Hồ Gươm ở đâu?", "  hồ   gươm ở đâu ?!", "HỒ GƯƠM Ở ĐÂU…"])
+def test_normalize_query(raw):
+    assert normalize_query(raw) == "hồ gươm ở đâu"
+
+
+def test_answers_are_scoped_by_region_project_and_language():
+    cache = _cache()
+
+    async def scenario():
+        await cache.set(1, 1, "vi", "Hồ Gươm ở đâu?", "Hoàn Kiếm")
+        return [
+            await cache.get(1, 1, "vi", "hồ gươm ở đâu"),
+            await cache.get(1, 2, "vi", "hồ gươm ở đâu"),
+            await cache.get(1, 1, "en", "hồ gươm ở đâu"),
+            await cache.get(2, 1, "vi", "hồ gươm ở đâu"),
+        ]
+
+    assert asyncio.run(scenario()) == ["Hoàn Kiếm", None, None, None]
+
+
+def test_semantic_match_needs_the_threshold():
+    cache = _cache(_Embedder())
+
+    async def scenario():
+        await cache.set(1, 1, "vi", "Hồ Gươm ở đâu", "Hoàn Kiếm")
+        return (
+            await cache.get(1, 1, "vi", "Hồ Gươm nằm ở đâu?"),
+            await cache.get(1, 1, "vi", "Chùa Hương ở đâu?"),
+        )
+
+    assert asyncio.run(scenario()) == ("Hoàn Kiếm", None)
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from agents.chitchat import ChitchatClassifier
+from agents.travel_agent import TravelAgent
+
+
+class _Router:
+    """SemanticRouter stand-in that records every encode it would have paid for."""
+
+    def __init__(self):
+        self.calls = []
+
+    def classify(self, text):
+        self.calls.append(text)
+        return {"chitchat_score": 0.9, "rag_score": 0.1}
+
+
+class _PlaceIndex:
+    def __init__(self, names):
+        self.names = names
+
+    def find_in_text(self, query, region_id, project_id):
+        return next((n for n in self.names if n.lower() in query.lower()), None)
+
+
+class _Executor:
+    def __init__(self, place_index=None):
+        self.place_index = place_index
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return ChitchatClassifier()
+
+
+@pytest.mark.parametrize("text, category", [
+    ("chào", "greeting"),
+    ("Xin chào bạn!", "greeting"),
+    ("chao ban", "greeting"),
+    ("cảm ơn nhiều nhé", "thanks"),
+    ("cam on", "thanks"),
+    ("Ça va ?", "greeting"),
+    ("ca va", "greeting"),
+    ("thank you so much", "thanks"),
+    ("안녕하세요", "greeting"),
+    ("ありがとうございます", "thanks"),
+    ("สวัสดีครับ", "greeting"),
+    ("谢谢你", "thanks"),
+])
+def test_phrases_match(classifier, text, category):
+    match = classifier.match(text)
+    assert match is not None and match.category == category
+
+
+@pytest.mark.parametrize("text", ["Cháo", "cháo gà", "cam ơn", "hi, Hồ Gươm ở đâu?"])
+def test_other_accents_and_questions_do_not_match(classifier, text):
+    assert classifier.match(text) is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("bạn thế nào rồi", True),
+    ("kể chuyện cười đi", True),
+    ("Hồ Gươm ở đâu?", False),
+    ("ho guom o dau", False),
+    ("mấy giờ mở cửa", False),
+    ("where is it?", False),
+    ("故宫在哪里", False),
+    ("một câu hỏi rất dài về lịch sử của nơi này", False),
+])
+def test_fallback_only_for_short_non_questions(text, expected):
+    assert ChitchatClassifier(router=_Router()).should_fallback(text) is expected
+
+
+def _agent(router, place_index=None):
+    agent = TravelAgent.__new__(TravelAgent)
+    agent.chitchat = ChitchatClassifier(router=router)
+    agent.executor = _Executor(place_index)
+    return agent
+
+
+def test_place_or_planned_call_skips_the_embedding_fallback():
+    router = _Router()
+    agent = _agent(router, _PlaceIndex(["Văn Miếu"]))
+    context = {"region_id": 1, "project_id": 1}
+
+    assert asyncio.run(agent._match_chitchat("Văn Miếu thì sao", None, context)) is None
+    assert asyncio.run(agent._match_chitchat("kể chuyện cười đi", None, context, planned=True)) is None
+    assert router.calls == []
+
+    match = asyncio.run(agent._match_chitchat("kể chuyện cười đi", "vi", context))
+    assert match is not None and match.source == "semantic"
+    assert router.calls == ["kể chuyện cười đi"]
@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+import pytest
+
+from services.deadline import Deadline, DeadlineExceeded
+
+
+def test_for_request_takes_the_smaller_budget(monkeypatch):
+    monkeypatch.setenv("REQUEST_DEADLINE_SECONDS", "45")
+    assert Deadline.for_request().budget == 45
+    assert Deadline.for_request(timeout_ms=2000).budget == 2
+    assert Deadline.for_request(timeout_ms=90000).budget == 45
+
+
+def test_timeout_is_capped_and_never_negative():
+    deadline = Deadline(10)
+    assert deadline.timeout(cap=3) == 3
+    assert 9 < deadline.timeout() <= 10
+
+    expired = Deadline(0)
+    assert expired.expired
+    assert expired.timeout(cap=3) == 0.0
+    with pytest.raises(DeadlineExceeded, match="during llm"):
+        expired.check("llm")
+
+
+def test_run_cancels_the_awaitable_when_time_is_up():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def scenario():
+        await Deadline(0.02).run(slow(), "tool")
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded, match="during tool"):
+        asyncio.run(scenario())
+    assert time.monotonic() - start < 1
+    assert cancelled == [True]
+
+
+def test_iterate_stops_a_stream_and_closes_it():
+    closed = []
+
+    async def stream():
+        try:
+            yield "first"
+            await asyncio.sleep(10)
+            yield "never"
+        finally:
+            closed.append(True)
+
+    async def scenario():
+        seen = []
+        with pytest.raises(DeadlineExceeded):
+            async for chunk in Deadline(0.05).iterate(stream(), "llm"):
+                seen.append(chunk)
+        return seen
+
+    assert asyncio.run(scenario()) == ["first"]
+    assert closed == [True]
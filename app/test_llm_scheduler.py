@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from services.llm_scheduler import LLMBusyError, LLMScheduler, Priority
+
+
+def test_full_queue_sheds_immediately():
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=1, queue_timeout=5)
+
+    async def scenario():
+        await scheduler.acquire()                              # running
+        queued = asyncio.ensure_future(scheduler.acquire())    # waiting
+        await asyncio.sleep(0)
+        with pytest.raises(LLMBusyError, match="queue_full"):
+            await scheduler.acquire()
+        scheduler.release()
+        await queued
+        scheduler.release()
+
+    asyncio.run(scenario())
+    assert scheduler._active == 0 and scheduler._queued == 0
+
+
+def test_queue_timeout_raises_busy_and_frees_the_place():
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=1, queue_timeout=0.05)
+
+    async def scenario():
+        await scheduler.acquire()
+        with pytest.raises(LLMBusyError, match="timeout"):
+            await scheduler.acquire()
+        assert scheduler._queued == 0
+        scheduler.release()
+
+    asyncio.run(scenario())
+    assert scheduler._active == 0
+
+
+def test_interactive_requests_go_before_background():
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=8, queue_timeout=5)
+    order = []
+
+    async def call(name, priority):
+        async with scheduler.slot(priority):
+            order.append(name)
+
+    async def scenario():
+        await scheduler.acquire()
+        tasks = [
+            asyncio.ensure_future(call("warmup", Priority.BACKGROUND)),
+            asyncio.ensure_future(call("chat-1", Priority.INTERACTIVE)),
+            asyncio.ensure_future(call("chat-2", Priority.INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+        scheduler.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert order == ["chat-1", "chat-2", "warmup"]
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=4, queue_timeout=5)
+
+    async def scenario():
+        await scheduler.acquire()
+        waiter = asyncio.ensure_future(scheduler.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        scheduler.release()
+
+    asyncio.run(scenario())
+    assert scheduler._active == 0 and scheduler._queued == 0
+
+
+def test_sync_slot_shares_the_same_limit():
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=0, queue_timeout=5)
+
+    with scheduler.slot_sync(Priority.BACKGROUND):
+        with pytest.raises(LLMBusyError):
+            scheduler.acquire_sync()
+    assert scheduler._active == 0
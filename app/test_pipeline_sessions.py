@@ -0,0 +1,126 @@
+# test_pipeline_sessions.py
+"""Answer cache / coalescing của GraphOrchestrator chỉ áp dụng cho câu hỏi độc lập."""
+
+import asyncio
+
+from pipeline import GraphOrchestrator
+from rag.place_index import PlaceIndex
+from services.answer_cache import AnswerCache
+from services.cache import RedisTier
+from services.chat_manager import ChatManager
+from services.single_flight import SingleFlight
+from services.sync_events import RegionVersions
+from utils.Reflection import Reflection
+
+
+class _NoChitchat:
+    def match(self, query):
+        return None
+
+
+class _FakeAgent:
+    """Trả lời "nó ở đâu?" bằng địa điểm của câu hỏi trước trong history."""
+
+    def __init__(self):
+        self.chitchat = _NoChitchat()
+        self.calls = []
+
+    async def run(self, query, context, chat_history=None, **kwargs):
+        self.calls.append((query, chat_history))
+        place = chat_history[-2]["content"] if chat_history else query
+        return f"Vị trí của {place}"
+
+    async def run_stream(self, query, context, chat_history=None, **kwargs):
+        yield {"event": "final", "data": await self.run(query, context, chat_history)}
+
+
+class _Detector:
+    def detect(self, text, hint=None, session_id=None, default=None):
+        return hint or "vi"
+
+
+def _orchestrator(sessions: ChatManager) -> GraphOrchestrator:
+    bot = GraphOrchestrator.__new__(GraphOrchestrator)
+    bot.chat_manager = sessions
+    bot.agent = _FakeAgent()
+    bot.answer_cache = AnswerCache(redis_tier=RedisTier("test:answer", url=""), versions=RegionVersions(redis_tier=RedisTier("test:sync", url="")))
+    bot.answer_cache.enabled = True
+    bot.language_detector = _Detector()
+    bot.inflight = SingleFlight(name="test.inflight")
+    bot.fast_path = None
+    bot.speculator = None
+    bot.reflection = None
+    return bot
+
+
+def _session_after(sessions: ChatManager, session_id: str, question: str, answer: str):
+    session = sessions.create_session(0, session_id=session_id)
+    session.add_message("user", question)
+    session.add_message("assistant", answer)
+
+
+async def _ask(bot, session_id, question):
+    result = await bot.run(session_id, question, None, project_id=1, region_id=0)
+    return result["Message"]
+
+
+async def _ask_stream(bot, session_id, question):
+    async for event in bot.run_stream(session_id, question, None, project_id=1, region_id=0):
+        if event["event"] == "done":
+            return event["data"]["Message"]
+
+
+def test_follow_ups_of_different_sessions_are_not_shared():
+    sessions = ChatManager()
+    _session_after(sessions, "a", "Hồ Gươm", "Hồ Gươm là ...")
+    _session_after(sessions, "b", "Chùa Hương", "Chùa Hương là ...")
+    bot = _orchestrator(sessions)
+
+    for ask in (_ask, _ask_stream):
+        answer_a = asyncio.run(ask(bot, "a", "nó ở đâu?"))
+        answer_b = asyncio.run(ask(bot, "b", "nó ở đâu?"))
+        assert answer_a == "Vị trí của Hồ Gươm"
+        assert answer_b == "Vị trí của Chùa Hương"
+
+
+def test_concurrent_follow_ups_are_not_coalesced():
+    sessions = ChatManager()
+    _session_after(sessions, "a", "Hồ Gươm", "...")
+    _session_after(sessions, "b", "Chùa Hương", "...")
+    bot = _orchestrator(sessions)
+
+    async def both():
+        return await asyncio.gather(_ask(bot, "a", "nó ở đâu?"), _ask(bot, "b", "nó ở đâu?"))
+
+    assert asyncio.run(both()) == ["Vị trí của Hồ Gươm", "Vị trí của Chùa Hương"]
+    assert len(bot.agent.calls) == 2
+
+
+def test_standalone_questions_are_cached_and_coalesced():
+    sessions = ChatManager()
+    bot = _orchestrator(sessions)
+
+    async def concurrent():
+        return await asyncio.gather(_ask(bot, "a", "Hồ Gươm ở đâu?"), _ask(bot, "b", "Hồ Gươm ở đâu?"))
+
+    assert asyncio.run(concurrent()) == ["Vị trí của Hồ Gươm ở đâu?"] * 2
+    assert len(bot.agent.calls) == 1
+
+    assert asyncio.run(_ask(bot, "c", "hồ gươm ở đâu")) == "Vị trí của Hồ Gươm ở đâu?"
+    assert len(bot.agent.calls) == 1
+
+
+def test_follow_up_pronoun_is_resolved_before_the_agent():
+    sessions = ChatManager()
+    index = PlaceIndex(aliases={})
+    index.replace_region(0, {1: [(1, "Hồ Gươm"), (2, "Chùa Hương")]})
+    bot = _orchestrator(sessions)
+    bot.reflection = Reflection(llm=None, place_index=index)
+
+    session = sessions.create_session(0, session_id="a")
+    asyncio.run(_ask(bot, "a", "Chùa Hương có gì?"))
+    session.add_message("user", "Chùa Hương có gì?")
+    session.add_message("assistant", "...")
+
+    asyncio.run(_ask(bot, "a", "Nó ở đâu?"))
+    assert bot.agent.calls[-1][0] == "Chùa Hương ở đâu?"
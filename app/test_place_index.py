@@ -0,0 +1,74 @@
+# test_place_index.py
+"""PlaceIndex: tên / alias / substring / fuzzy → SubProjectID."""
+
+import pytest
+
+from rag.place_index import PlaceIndex
+
+PLACES = [
+    (1, "Chùa Một Cột"),
+    (2, "Chùa Hương (Hà Nội)"),
+    (3, "Hồ Gươm"),
+    (4, "Văn Miếu - Quốc Tử Giám"),
+    (5, "Nhà hát Lớn (Hà Nội)"),
+    (6, "Đền Hùng (Phú Thọ)"),
+    (7, "Đền Hùng (TP.HCM)"),
+]
+
+
+@pytest.fixture
+def index():
+    idx = PlaceIndex(aliases={"Hồ Gươm": ["Hồ Hoàn Kiếm"]}, min_score=0.55, min_substring=0.5)
+    idx.replace_region(0, {1: PLACES})
+    return idx
+
+
+def _id(index, name):
+    match = index.resolve(name, 0, 1)
+    return match.subproject_id if match else None
+
+
+def test_exact_is_accent_and_case_insensitive(index):
+    match = index.resolve("ho guom", 0, 1)
+    assert (match.subproject_id, match.method, match.score) == (3, "exact", 1.0)
+    assert _id(index, "HỒ GƯƠM!") == 3
+
+
+def test_aliases_from_name_parts_and_file(index):
+    assert _id(index, "Quốc Tử Giám") == 4
+    assert _id(index, "Văn Miếu") == 4
+    assert _id(index, "Hồ Hoàn Kiếm") == 3
+    assert index.resolve("Chùa Hương", 0, 1).method == "alias"
+
+
+def test_parenthesised_qualifier_is_not_an_alias(index):
+    assert _id(index, "Hà Nội") is None
+    assert index.find_in_text("Thời tiết Hà Nội hôm nay?", 0, 1) is None
+
+
+def test_colliding_aliases_are_dropped(index):
+    assert _id(index, "Đền Hùng") is None
+    assert _id(index, "Đền Hùng (Phú Thọ)") == 6
+
+
+def test_substring_requires_min_coverage(index):
+    assert _id(index, "ho") is None
+    match = index.resolve("guom", 0, 1)
+    assert (match.subproject_id, match.method) == (3, "substring")
+
+
+def test_fuzzy_typo(index):
+    match = index.resolve("Chua Mot Cott", 0, 1)
+    assert (match.subproject_id, match.method) == (1, "fuzzy")
+    assert _id(index, "xyz abc") is None
+
+
+def test_find_in_text_prefers_longest_key(index):
+    assert index.find_in_text("Chùa Một Cột mở cửa mấy giờ?", 0, 1).subproject_id == 1
+    assert index.find_in_text("Giờ mở cửa thế nào?", 0, 1) is None
+
+
+def test_unknown_project_and_non_latin_names(index):
+    assert not index.covers(0, 2)
+    assert index.resolve("Hồ Gươm", 0, 2) is None
+    assert index.resolve("경복궁", 0, 1) is None
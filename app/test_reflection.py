@@ -0,0 +1,116 @@
+# test_reflection.py
+"""Reflection: bảng rewrite đại từ → địa điểm đã nhớ (rule, không LLM)."""
+
+import pytest
+
+from utils.Reflection import TARGET_PLACE_KEY, Reflection
+
+PLACE = "Hồ Gươm"
+
+
+class _Memory:
+    """get_ctx / set_ctx như SessionMemory / ChatManager."""
+
+    def __init__(self, place=None):
+        self.ctx = {TARGET_PLACE_KEY: place} if place else {}
+
+    def get_ctx(self, session_id, key, default=None):
+        return self.ctx.get(key, default)
+
+    def set_ctx(self, session_id, key, value):
+        self.ctx[key] = value
+
+
+def _extract(question):
+    for name in ("Chùa Hương", "Hồ Gươm"):
+        if name.lower() in question.lower():
+            return name
+    return None
+
+
+@pytest.fixture
+def reflection():
+    return Reflection(llm=None, place_extractor=_extract)
+
+
+@pytest.mark.parametrize(
+    "question, expected",
+    [
+        # Vietnamese
+        ("Nó mở cửa mấy giờ?", "Hồ Gươm mở cửa mấy giờ?"),
+        ("Đến đó bằng gì?", "Đến Hồ Gươm bằng gì?"),
+        ("Chỗ đó có gì hay?", "Hồ Gươm có gì hay?"),
+        ("Nó mở cửa mấy giờ, đến đó bằng gì?", "Hồ Gươm mở cửa mấy giờ, đến Hồ Gươm bằng gì?"),
+        # English: every pronoun, not only the first
+        ("Can I visit it at night? Is it free?", "Can I visit Hồ Gươm at night? Is Hồ Gươm free?"),
+        ("How do I get there?", "How do I get to Hồ Gươm?"),
+        ("What are its opening hours?", "What are Hồ Gươm's opening hours?"),
+        ("Is this place crowded?", "Is Hồ Gươm crowded?"),
+        # French / Korean / Japanese / Chinese / Thai
+        ("Comment aller là-bas ?", "Comment aller à Hồ Gươm ?"),
+        ("거기 입장료는 얼마예요?", "Hồ Gươm 입장료는 얼마예요?"),
+        ("そこへの行き方は？", "Hồ Gươmへの行き方は？"),
+        ("那里怎么去？", "Hồ Gươm怎么去？"),
+        ("ที่นั่นเปิดกี่โมง", "Hồ Gươmเปิดกี่โมง"),
+    ],
+)
+def test_pronouns_are_replaced(reflection, question, expected):
+    assert reflection._rewrite_with_rules(_Memory(PLACE), "s", question) == expected
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        # Elliptical follow-ups: no pronoun swap, the LLM decides
+        "それで、営業時間は？",
+        "Còn giá vé thì sao?",
+        "What about parking?",
+        # Implicit follow-ups about the remembered place
+        "What are the opening hours?",
+        "Giờ mở cửa thế nào?",
+    ],
+)
+def test_ambiguous_follow_ups_are_left_to_the_llm(reflection, question):
+    assert reflection._rewrite_with_rules(_Memory(PLACE), "s", question) is None
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "What is the location of the museum?",
+        "what time is it",
+        "Is it raining today?",
+    ],
+)
+def test_non_pronoun_uses_are_kept_without_a_place(reflection, question):
+    assert reflection._rewrite_with_rules(_Memory(), "s", question) == question
+
+
+@pytest.mark.parametrize("question", ["what time is it", "it's raining, what now?"])
+def test_expletive_it_is_not_rewritten(reflection, question):
+    memory = _Memory(PLACE)
+    assert PLACE not in (reflection._rewrite_with_rules(memory, "s", question) or "")
+
+
+def test_own_place_wins_and_is_remembered(reflection):
+    memory = _Memory(PLACE)
+    assert reflection._rewrite_with_rules(memory, "s", "Chùa Hương có gì?") == "Chùa Hương có gì?"
+    assert memory.ctx[TARGET_PLACE_KEY] == "Chùa Hương"
+
+
+def test_pronoun_without_place_goes_to_llm(reflection):
+    assert reflection._rewrite_with_rules(_Memory(), "s", "Nó ở đâu?") is None
+
+
+def test_no_place_source_disables_rules():
+    assert Reflection(llm=None)._rewrite_with_rules(_Memory(PLACE), "s", "Nó ở đâu?") is None
+
+
+def test_rewrite_follow_up(reflection):
+    memory = _Memory()
+    assert reflection.rewrite_follow_up(memory, "s", "Hồ Gươm ở đâu?", has_history=False) == "Hồ Gươm ở đâu?"
+    assert reflection.rewrite_follow_up(memory, "s", "Nó mở cửa mấy giờ?", has_history=True) == (
+        "Hồ Gươm mở cửa mấy giờ?"
+    )
+    # Unresolved follow-up → unchanged (the agent sees the history)
+    assert reflection.rewrite_follow_up(memory, "s", "Giờ mở cửa?", has_history=True) == "Giờ mở cửa?"
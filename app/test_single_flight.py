@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from services.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_run():
+    flight = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["answer"] * 5
+    assert len(runs) == 1
+    assert not flight.in_flight("k")
+
+
+def test_different_keys_and_later_calls_run_again():
+    flight = SingleFlight()
+    runs = []
+
+    def work(key):
+        async def run():
+            runs.append(key)
+            await asyncio.sleep(0)
+            return key
+        return run
+
+    async def scenario():
+        both = await asyncio.gather(flight.do("a", work("a")), flight.do("b", work("b")))
+        again = await flight.do("a", work("a"))
+        return both, again
+
+    assert asyncio.run(scenario()) == (["a", "b"], "a")
+    assert runs == ["a", "b", "a"]
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0)
+        raise RuntimeError("db down")
+
+    async def scenario():
+        return await asyncio.gather(flight.do("k", work), flight.do("k", work), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert [type(r) for r in results] == [RuntimeError, RuntimeError]
+    assert not flight.in_flight("k")
+
+
+def test_cancelled_waiter_leaves_shared_run_for_the_others():
+    flight = SingleFlight()
+    release = None
+
+    async def work():
+        await release.wait()
+        return "done"
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        leader = asyncio.ensure_future(flight.do("k", work))
+        follower = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == "done"
+
+
+def test_shared_run_is_cancelled_when_nobody_waits():
+    flight = SingleFlight()
+    cancelled = []
+
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def scenario():
+        only = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        only.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await only
+        await asyncio.sleep(0)
+        return flight.in_flight("k")
+
+    assert asyncio.run(scenario()) is False
+    assert cancelled == [True]
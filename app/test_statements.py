@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from tools.statements import ID_BUCKETS, StatementRegistry, pad_ids
+
+
+class _SQLite:
+    """db.fetchone / db.fetchall over one in-memory catalog (same API as CatalogSnapshot)."""
+
+    def __init__(self):
+        self.engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        with self.engine.begin() as conn:
+            conn.execute(text("CREATE TABLE SubProjects (SubProjectID INT, ProjectID INT, "
+                              "SubProjectName TEXT, Introduction TEXT, Location TEXT)"))
+            conn.execute(text("CREATE TABLE SubProjectAttractions (SubProjectAttractionID INT, "
+                              "SubProjectID INT, AttractionName TEXT, Introduction TEXT, SortOrder INT)"))
+            conn.execute(text("CREATE TABLE SubProjectAttractionMedia (SubProjectAttractionID INT, "
+                              "MediaType TEXT, MediaURL TEXT)"))
+            conn.execute(text("INSERT INTO SubProjects VALUES "
+                              "(1, 1, 'Hồ Gươm', 'Hồ giữa phố cổ', 'Hoàn Kiếm'), "
+                              "(2, 1, 'Chùa Hương', 'Chùa trong núi', 'Mỹ Đức')"))
+            conn.execute(text("INSERT INTO SubProjectAttractions VALUES "
+                              "(10, 1, 'Tháp Rùa', '', 2), (11, 1, 'Đền Ngọc Sơn', '', 1), "
+                              "(12, 1, 'Cầu Thê Húc', '', 3)"))
+            conn.execute(text("INSERT INTO SubProjectAttractionMedia VALUES "
+                              "(10, 'video', 'v.mp4'), (10, 'audio', 'a.mp3'), (11, 'video', 'w.mp4')"))
+
+    async def fetchone(self, region_id, statement, params=None, timeout=None):
+        with self.engine.connect() as conn:
+            return conn.execute(statement, params or {}).fetchone()
+
+    async def fetchall(self, region_id, statement, params=None, timeout=None):
+        with self.engine.connect() as conn:
+            return conn.execute(statement, params or {}).fetchall()
+
+
+@pytest.fixture
+def registry():
+    return StatementRegistry({0: {"prefix": "main"}}, dialect="sqlite", source="test")
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_statements_are_compiled_once_per_region():
+    registry = StatementRegistry({0: {"prefix": "r0"}, 1: {"prefix": "r1"}})
+    first = registry.get(0, "place_info.by_id")
+    assert registry.get(0, "place_info.by_id") is first
+    assert "r0.SubProjects" in str(first) and "r1.SubProjects" in str(registry.get(1, "place_info.by_id"))
+    assert "TOP (:limit)" in str(registry.get(0, "attractions.by_name"))
+    with pytest.raises(ValueError, match="Unknown statement"):
+        registry.get(2, "place_info.by_id")
+
+
+def test_values_are_bound_not_formatted(registry):
+    db = _SQLite()
+    row = _run(registry.fetchone(db, 0, "place_info.by_name", {"place_name": "%' OR 1=1 --%", "project_id": 1}))
+    assert row is None
+    row = _run(registry.fetchone(db, 0, "place_info.by_id", {"subproject_id": 1, "project_id": 1}))
+    assert row.SubProjectName == "Hồ Gươm"
+
+
+def test_limit_order_and_optional_media_type(registry):
+    db = _SQLite()
+    params = {"subproject_id": 1, "project_id": 1, "limit": 2}
+    rows = _run(registry.fetchall(db, 0, "attractions.by_id", params))
+    assert [r.AttractionName for r in rows] == ["Đền Ngọc Sơn", "Tháp Rùa"]
+
+    every = _run(registry.fetchall(db, 0, "place_media.by_id", {**params, "limit": 10, "media_type": None}))
+    videos = _run(registry.fetchall(db, 0, "place_media.by_id", {**params, "limit": 10, "media_type": "video"}))
+    assert len(every) == 3 and {r.MediaType for r in videos} == {"video"}
+
+
+def test_bulk_statements_expand_padded_id_lists(registry):
+    db = _SQLite()
+    rows = _run(registry.fetchall(db, 0, "bulk.places", {"ids": pad_ids([2, 1])}))
+    assert sorted(r.SubProjectID for r in rows) == [1, 2]
+
+
+def test_pad_ids_uses_fixed_buckets():
+    assert len(pad_ids([5])) == ID_BUCKETS[0]
+    assert pad_ids([5, 6])[:3] == [5, 6, 5]
+    assert len(pad_ids(list(range(ID_BUCKETS[0] + 1)))) == ID_BUCKETS[1]
+    assert len(pad_ids(list(range(ID_BUCKETS[-1])))) == ID_BUCKETS[-1]
+
+
+def test_stats_count_executions_and_errors(registry):
+    db = _SQLite()
+    _run(registry.fetchone(db, 0, "place_info.by_id", {"subproject_id": 1, "project_id": 1}))
+    with pytest.raises(Exception):
+        _run(registry.fetchone(db, 0, "place_info.by_id", {"project_id": 1}))
+
+    stats = registry.stats("place_info.by_id")["place_info.by_id"]
+    assert stats["count"] == 2 and stats["errors"] == 1
@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+from services.answer_cache import AnswerCache
+from services.cache import RedisTier
+from services.sync_events import RegionVersions
+
+
+class _SlowRedis:
+    """Redis tier whose reads block like a socket near its timeout."""
+
+    def __init__(self, value=7, delay=0.2):
+        self.value = value
+        self.delay = delay
+        self.reads = 0
+
+    def get_int(self, key):
+        self.reads += 1
+        time.sleep(self.delay)
+        return self.value
+
+    def incr(self, key):
+        self.value += 1
+
+
+def test_remote_read_does_not_block_the_event_loop():
+    versions = RegionVersions(poll_interval=60, redis_tier=_SlowRedis())
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        version = await versions.current_async(1)
+        task.cancel()
+        return version, ticks
+
+    version, ticks = asyncio.run(scenario())
+    assert version == "7.0"
+    assert ticks >= 5
+
+
+def test_memoized_version_skips_redis():
+    redis = _SlowRedis(delay=0)
+    versions = RegionVersions(poll_interval=60, redis_tier=redis)
+
+    async def twice():
+        return [await versions.current_async(1), await versions.current_async(1)]
+
+    assert asyncio.run(twice()) == ["7.0", "7.0"]
+    assert redis.reads == 1
+
+
+def test_bump_invalidates_cached_answers():
+    versions = RegionVersions(poll_interval=60, redis_tier=RedisTier("test:sync", url=""))
+    cache = AnswerCache(redis_tier=RedisTier("test:answer", url=""), versions=versions)
+    cache.enabled = True
+
+    async def scenario():
+        await cache.set(1, 1, "vi", "Hồ Gươm ở đâu?", "Quận Hoàn Kiếm")
+        before = await cache.get(1, 1, "vi", "hồ gươm ở đâu")
+        cache.invalidate_region(1)
+        after = await cache.get(1, 1, "vi", "hồ gươm ở đâu")
+        other = await cache.get(2, 1, "vi", "hồ gươm ở đâu")
+        return before, after, other
+
+    assert asyncio.run(scenario()) == ("Quận Hoàn Kiếm", None, None)
@@ -0,0 +1,130 @@
+# test_tool_executor.py
+"""ToolExecutor: chọn câu SQL theo PlaceIndex và cache key của tool."""
+
+import asyncio
+
+import pytest
+
+from rag.place_index import PlaceIndex
+from services.cache import RedisTier
+from services.sync_events import RegionVersions
+from services.tool_cache import ToolResultCache
+from tools.executor import ToolExecutor
+
+
+class _DB:
+    DB_MAP = {0: {"prefix": "r0"}, 1: {"prefix": "r1"}}
+
+
+def _tool_cache():
+    cache = ToolResultCache(
+        redis_tier=RedisTier("test:tool", url=""),
+        versions=RegionVersions(redis_tier=RedisTier("test:sync", url="")),
+    )
+    cache.enabled = True
+    return cache
+
+
+@pytest.fixture
+def executor():
+    index = PlaceIndex(aliases={}, min_score=0.55, min_substring=0.5)
+    index.replace_region(0, {1: [(1, "Chùa Một Cột"), (2, "Chùa Hương"), (3, "Hồ Gươm")]})
+    return ToolExecutor(_DB(), place_index=index, cache=_tool_cache())
+
+
+CTX = {"region_id": 0, "project_id": 1}
+
+
+def test_place_filter_uses_index(executor):
+    assert executor._place_filter("Ho Guom", CTX) == ("by_id", {"subproject_id": 3})
+    # Index covers the project and knows no such place → no SQL
+    assert executor._place_filter("Vịnh Hạ Long", CTX) == (None, None)
+    # Project not in the index → LIKE
+    assert executor._place_filter("Hồ Gươm", {"region_id": 1, "project_id": 1})[0] == "by_name"
+
+
+@pytest.mark.parametrize("name", ["경복궁", "金閣寺", "故宫", "วัดพระแก้ว"])
+def test_place_filter_non_latin_names_fall_back_to_like(executor, name):
+    assert executor._place_filter(name, CTX) == ("by_name", {"place_name": f"%{name}%"})
+
+
+def _key(executor, tool, args, ctx=CTX):
+    return asyncio.run(executor._cache_key(tool, args, ctx))
+
+
+def test_cache_key_shares_spellings_of_one_place(executor):
+    key = _key(executor, "get_place_info", {"place_name": "Hồ Gươm"})
+    assert _key(executor, "get_place_info", {"place_name": "ho guom"}) == key
+    assert _key(executor, "get_place_location", {"place_name": "Hồ Gươm"}) != key
+    assert _key(executor, "get_place_info", {"place_name": "Hồ Gươm"}, {"region_id": 0, "project_id": 2}) != key
+
+
+def test_cache_key_of_search_folds_query_and_keeps_top_k(executor):
+    key = _key(executor, "search_places", {"query": "Chùa"})
+    assert _key(executor, "search_places", {"query": "chua", "top_k": 5}) == key
+    assert _key(executor, "search_places", {"query": "chua", "top_k": 3}) != key
+    # Free-text queries are never merged into a resolved place
+    assert _key(executor, "search_places", {"query": "chua huong"}) != _key(
+        executor, "search_places", {"query": "chùa hương tích"}
+    )
+
+
+def test_cache_key_changes_after_region_sync(executor):
+    key = _key(executor, "get_place_info", {"place_name": "Hồ Gươm"})
+    executor.cache.invalidate_region(0)
+    assert _key(executor, "get_place_info", {"place_name": "Hồ Gươm"}) != key
+
+
+def test_tool_cache_loads_once_and_skips_errors():
+    cache = _tool_cache()
+    loads = []
+
+    def loader(result):
+        async def load():
+            loads.append(result)
+            await asyncio.sleep(0.01)
+            return result
+        return load
+
+    async def scenario():
+        found = {"found": True, "name": "Hồ Gươm"}
+        first = await asyncio.gather(*(cache.get_or_load("t", "k", loader(found)) for _ in range(3)))
+        again = await cache.get_or_load("t", "k", loader({"found": True, "name": "stale"}))
+        await cache.get_or_load("t", "err", loader({"error": "timeout"}))
+        retried = await cache.get_or_load("t", "err", loader({"found": False}))
+        return first, again, retried
+
+    first, again, retried = asyncio.run(scenario())
+    assert first == [{"found": True, "name": "Hồ Gươm"}] * 3 and again == first[0]
+    assert retried == {"found": False}
+    assert len(loads) == 3
+
+
+def test_execute_many_runs_calls_concurrently_in_order(executor):
+    async def slow(args, ctx):
+        await asyncio.sleep(args["delay"])
+        return {"found": True, "delay": args["delay"]}
+
+    async def hang(args, ctx):
+        await asyncio.sleep(10)
+
+    executor.cache = None
+    executor.registry.update({"slow": slow, "hang": hang})
+    calls = [
+        {"name": "slow", "args": {"delay": 0.1}},
+        {"name": "slow", "args": {"delay": 0.05}},
+        {"name": "hang", "args": {}},
+        {"name": "nope", "args": {}},
+    ]
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        results = await executor.execute_many(calls, CTX, timeout=0.2)
+        return results, loop.time() - start
+
+    results, elapsed = asyncio.run(scenario())
+    assert [r.get("delay") for r in results[:2]] == [0.1, 0.05]
+    assert results[2] == {"error": "Tool hang timed out"}
+    assert results[3] == {"error": "Unknown tool: nope"}
+    assert elapsed < 0.35
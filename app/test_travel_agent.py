@@ -0,0 +1,57 @@
+import asyncio
+
+from agents.chitchat import ChitchatClassifier
+from agents.travel_agent import ERROR_RESPONSE, PARTIAL_HEADER, TravelAgent
+from services.deadline import Deadline
+
+PLANNED = {"name": "get_place_info", "args": {"place_name": "Hồ Gươm"}}
+INFO = {"found": True, "name": "Hồ Gươm", "introduction": "Hồ nước ngọt giữa trung tâm Hà Nội."}
+
+
+class _Executor:
+    place_index = None
+
+    def __init__(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+
+    async def execute_many(self, calls, context, prefetched=None):
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return [INFO for _ in calls]
+
+
+class _LLM:
+    def __init__(self):
+        self.calls = 0
+
+    async def chat_stream(self, messages, **kwargs):
+        self.calls += 1
+        yield {"message": {"content": "Hồ Gươm nằm ở quận Hoàn Kiếm."}}
+
+
+def _run(executor, context):
+    llm = _LLM()
+    agent = TravelAgent(executor=executor, llm_client=llm, chitchat=ChitchatClassifier())
+
+    async def collect():
+        return [e async for e in agent.run_stream("Hồ Gươm", context, planned_call=PLANNED)]
+
+    return asyncio.run(collect()), llm
+
+
+def test_deadline_during_planned_call_gives_partial_answer():
+    events, llm = _run(_Executor(delay=0.05), {"region_id": 1, "deadline": Deadline(0.01)})
+
+    assert events[-2] == {"event": "deadline", "data": {"partial": True}}
+    assert events[-1]["data"].startswith(PARTIAL_HEADER)
+    assert "Hồ Gươm" in events[-1]["data"]
+    assert llm.calls == 0
+
+
+def test_planned_call_error_gives_error_answer():
+    events, llm = _run(_Executor(error=RuntimeError("pool closed")), {"region_id": 1})
+
+    assert events[-1] == {"event": "final", "data": ERROR_RESPONSE}
+    assert llm.calls == 0
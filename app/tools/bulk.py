@@ -0,0 +1,142 @@
+"""
+PlaceBulkLoader: info + location + attractions + media của nhiều địa điểm một lần.
+
+Dùng cho màn hình POI của backend C# (POST /api/places/bulk) thay vì N
+request chatbot / tool:
+- Tên địa điểm → SubProjectID qua PlaceIndex (hoặc client gửi thẳng id)
+- Card còn mới trong PlaceCardStore → trả luôn, không SQL
+- Phần còn lại: gom theo region, mỗi chunk (≤ BULK_SQL_CHUNK id) chạy 3 câu
+  set-based `SubProjectID IN (...)` của StatementRegistry (snapshot local khi
+  còn mới, SQL Server nếu không); các region / chunk chạy đồng thời
+- Kết quả được yield ngay khi chunk xong → endpoint stream được NDJSON
+"""
+import asyncio
+import logging
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from services.metrics import metrics
+from services.place_cards import build_cards
+from tools.statements import ID_BUCKETS, pad_ids
+
+logger = logging.getLogger(__name__)
+
+
+class PlaceBulkLoader:
+    """Set-based place data for many (region, project, place) at once."""
+
+    def __init__(self, executor, chunk_size: int = None):
+        """
+        Args:
+            executor: ToolExecutor (db, place_index, cards, snapshot, statements)
+            chunk_size: Số SubProjectID tối đa mỗi câu SQL (BULK_SQL_CHUNK, ≤ 1000)
+        """
+        self.executor = executor
+        self.chunk_size = min(chunk_size or int(os.getenv("BULK_SQL_CHUNK", "1000")), ID_BUCKETS[-1])
+
+    async def load_all(self, refs: List[Dict[str, Any]], deadline=None) -> List[Dict[str, Any]]:
+        """Như load(), nhưng trả về list theo đúng thứ tự refs."""
+        results: List[Dict[str, Any]] = [None] * len(refs)
+        async for index, result in self.load(refs, deadline):
+            results[index] = result
+        return results
+
+    async def load(self, refs: List[Dict[str, Any]], deadline=None) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Yield (vị trí trong refs, kết quả) theo thứ tự hoàn thành.
+
+        Args:
+            refs: [{region_id, project_id, place | subproject_id}, ...]
+            deadline: Optional Deadline (giới hạn timeout SQL)
+        """
+        metrics.inc("places_bulk.items", len(refs))
+        pending: Dict[int, Dict[int, List[int]]] = {}  # region → subproject_id → [index]
+
+        for index, ref in enumerate(refs):
+            subproject_id, failure = self._resolve(ref)
+            if failure is not None:
+                yield index, failure
+                continue
+            region_id = ref["region_id"]
+            card = self.executor.cards.get(region_id, ref["project_id"], subproject_id) if self.executor.cards else None
+            if card is not None:
+                metrics.inc("places_bulk.served", source="place_card")
+                yield index, self._result(ref, card, "place_card")
+                continue
+            pending.setdefault(region_id, {}).setdefault(subproject_id, []).append(index)
+
+        tasks = []
+        for region_id, by_id in pending.items():
+            ids = list(by_id)
+            for start in range(0, len(ids), self.chunk_size):
+                chunk = ids[start : start + self.chunk_size]
+                tasks.append(asyncio.ensure_future(self._load_chunk(region_id, chunk, deadline)))
+
+        try:
+            for done in asyncio.as_completed(tasks):
+                region_id, chunk, cards, source, error = await done
+                for subproject_id in chunk:
+                    for index in pending[region_id][subproject_id]:
+                        ref = refs[index]
+                        if error is not None:
+                            yield index, {**self._echo(ref), "error": error}
+                            continue
+                        card = cards.get(subproject_id)
+                        if card is None or card["project_id"] != ref["project_id"]:
+                            yield index, self._not_found(ref)
+                        else:
+                            yield index, self._result(ref, card, source)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _resolve(self, ref: Dict[str, Any]) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+        """ref → (SubProjectID, None), hoặc (None, kết quả lỗi / không tìm thấy)."""
+        region_id = ref["region_id"]
+        if region_id not in self.executor.db.DB_MAP:
+            return None, {**self._echo(ref), "error": f"Invalid region_id: {region_id}"}
+        if ref.get("subproject_id") is not None:
+            return int(ref["subproject_id"]), None
+        place_index = self.executor.place_index
+        if not ref.get("place") or place_index is None:
+            return None, {**self._echo(ref), "error": "place or subproject_id required"}
+        match = place_index.resolve(ref["place"], region_id, ref["project_id"])
+        if match is None:
+            return None, self._not_found(ref)
+        return match.subproject_id, None
+
+    async def _load_chunk(self, region_id: int, ids: List[int], deadline):
+        """3 câu set-based cho một chunk → (region, ids, {id: card}, source, error)."""
+        statements, source = self.executor.sql_source(region_id)
+        timeout = self.executor.tool_timeout
+        if deadline is not None:
+            timeout = max(0.001, deadline.timeout(cap=timeout))
+        params = {"ids": pad_ids(ids)}
+        try:
+            places, attractions, media = await asyncio.gather(
+                statements.fetchall(source, region_id, "bulk.places", params, timeout=timeout),
+                statements.fetchall(source, region_id, "bulk.attractions", params, timeout=timeout),
+                statements.fetchall(source, region_id, "bulk.media", params, timeout=timeout),
+            )
+        except Exception as e:
+            logger.warning(f"[PlaceBulk] Region {region_id} chunk of {len(ids)} failed: {e}")
+            metrics.inc("places_bulk.chunk_errors", region=region_id)
+            return region_id, ids, {}, statements.source, str(e)
+        cards = {card["subproject_id"]: card for card in build_cards(places, attractions, media)}
+        metrics.inc("places_bulk.served", len(ids), source=statements.source)
+        return region_id, ids, cards, statements.source, None
+
+    @staticmethod
+    def _echo(ref: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: ref.get(k) for k in ("region_id", "project_id", "place", "subproject_id") if ref.get(k) is not None}
+
+    def _not_found(self, ref: Dict[str, Any]) -> Dict[str, Any]:
+        label = ref.get("place") or ref.get("subproject_id")
+        return {**self._echo(ref), "found": False, "message": f"Không tìm thấy địa điểm {label}"}
+
+    def _result(self, ref: Dict[str, Any], card: Dict[str, Any], source: str) -> Dict[str, Any]:
+        return {**self._echo(ref), **card, "found": True, "source": source}
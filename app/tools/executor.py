@@ -1,11 +1,26 @@
 """
 ToolExecutor: Execute tools based on LLM decisions.
 Handles multi-region database queries with fallback to vector search.
+SQL runs in the region's thread pool (MultiDBManager.fetchone/fetchall),
+never on the event loop. Place names are resolved to a SubProjectID by the
+in-memory PlaceIndex, so lookups hit the primary key instead of LIKE scans.
+Place tools answer from the local PlaceCardStore when its cards are fresh
+(one primary-key lookup), with SQL as the fallback. SQL uses the
+precompiled, fully parameterized statements of StatementRegistry and reads
+the local CatalogSnapshot when fresh, SQL Server otherwise. Results go
+through an optional read-through ToolResultCache. Tools only ever query
+the caller's region: regions are separate tenant databases, so cross-region
+reads (MultiDBManager.fan_out) are left to explicit jobs / preloads.
 """
+import asyncio
 import logging
-from typing import Any, Dict, Optional
+import os
+from typing import Any, Awaitable, Dict, List, Optional
 
-from sqlalchemy import text
+from rag.normalize import fold_text
+from services.place_cards import card_tool_result
+from services.tracing import tracer
+from tools.statements import StatementRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -13,14 +28,42 @@ logger = logging.getLogger(__name__)
 class ToolExecutor:
     """Execute travel-related tools for TravelAgent."""
 
-    def __init__(self, db_manager, vector_store=None):
+    def __init__(
+        self,
+        db_manager,
+        vector_store=None,
+        tool_timeout: float = None,
+        place_index=None,
+        cache=None,
+        cards=None,
+        snapshot=None,
+    ):
         """
         Args:
             db_manager: MultiDBManager instance for SQL queries
             vector_store: Optional TravelVectorStore for search_places
+            tool_timeout: Per-tool timeout in seconds (default TOOL_TIMEOUT_SECONDS)
+            place_index: Optional PlaceIndex (name → SubProjectID); without it
+                handlers fall back to SubProjectName LIKE '%name%'
+            cache: Optional ToolResultCache (read-through, invalidated by region sync)
+            cards: Optional PlaceCardStore (materialized place cards, needs place_index)
+            snapshot: Optional CatalogSnapshot (local SQLite copy of the catalog tables)
         """
         self.db = db_manager
         self.vector_store = vector_store
+        self.place_index = place_index
+        self.cache = cache
+        self.cards = cards
+        self.statements = StatementRegistry(db_manager.DB_MAP)
+        self.snapshot = snapshot
+        self.snapshot_statements = None
+        if snapshot is not None:
+            self.snapshot_statements = StatementRegistry(
+                {region_id: {"prefix": snapshot.PREFIX} for region_id in db_manager.DB_MAP},
+                dialect="sqlite",
+                source="snapshot",
+            )
+        self.tool_timeout = tool_timeout or float(os.getenv("TOOL_TIMEOUT_SECONDS", "15"))
         
         self.registry = {
             "get_place_info": self._get_place_info,
@@ -42,7 +85,7 @@ class ToolExecutor:
         Args:
             tool_name: Name of tool to execute
             args: Tool arguments from LLM
-            context: {region_id, project_id, user_location}
+            context: {region_id, project_id, user_location, deadline}
             
         Returns:
             Tool execution result as dict
@@ -51,14 +94,150 @@ class ToolExecutor:
             logger.error(f"Unknown tool: {tool_name}")
             return {"error": f"Unknown tool: {tool_name}"}
         
-        try:
-            handler = self.registry[tool_name]
-            result = await handler(args, context)
-            logger.info(f"Tool {tool_name} executed successfully")
+        with tracer.span(
+            "tool.execute",
+            tool=tool_name,
+            region=context.get("region_id"),
+            project=context.get("project_id"),
+        ) as span:
+            try:
+                deadline = context.get("deadline")
+                if deadline is not None:
+                    deadline.check("tool")
+                handler = self.registry[tool_name]
+                if self.cache is not None:
+                    result = await self.cache.get_or_load(
+                        tool_name,
+                        await self._cache_key(tool_name, args, context),
+                        lambda: handler(args, context),
+                    )
+                else:
+                    result = await handler(args, context)
+                logger.info(f"Tool {tool_name} executed successfully")
+            except Exception as e:
+                logger.error(f"Tool {tool_name} failed: {e}")
+                span.record_error(e)
+                return {"error": str(e)}
+            span.set_attributes(
+                found=bool(result.get("found")),
+                rows=result.get("count", 1 if result.get("found") else 0),
+                source=result.get("source"),
+            )
             return result
-        except Exception as e:
-            logger.error(f"Tool {tool_name} failed: {e}")
-            return {"error": str(e)}
+
+    async def execute_many(
+        self,
+        calls: List[Dict[str, Any]],
+        context: Dict[str, Any],
+        timeout: float = None,
+        prefetched: Optional[List[Optional[Awaitable]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Execute independent tool calls concurrently.
+        
+        Args:
+            calls: [{"name": ..., "args": {...}}, ...] from one LLM turn
+            context: {region_id, project_id, user_location, deadline}
+            timeout: Per-tool timeout in seconds (default self.tool_timeout),
+                capped by the time left before the request deadline
+            prefetched: Already-running results per call (speculative execution)
+            
+        Returns:
+            Results in the same order as `calls`
+        """
+        timeout = timeout or self.tool_timeout
+        deadline = context.get("deadline")
+        if deadline is not None:
+            timeout = deadline.timeout(cap=timeout)
+        prefetched = prefetched or [None] * len(calls)
+
+        async def run_one(call: Dict[str, Any], pending: Optional[Awaitable]) -> Dict[str, Any]:
+            tool_name = call.get("name")
+            try:
+                return await asyncio.wait_for(
+                    pending or self.execute(tool_name, call.get("args", {}), context),
+                    timeout=timeout,
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"Tool {tool_name} timed out after {timeout}s")
+                return {"error": f"Tool {tool_name} timed out"}
+
+        return await asyncio.gather(*(run_one(c, p) for c, p in zip(calls, prefetched)))
+
+    def _sql_timeout(self, ctx: Dict) -> float:
+        """SQL timeout: tool timeout, capped by the request deadline."""
+        deadline = ctx.get("deadline")
+        if deadline is None:
+            return self.tool_timeout
+        return max(0.001, deadline.timeout(cap=self.tool_timeout))
+
+    async def _cache_key(self, tool_name: str, args: Dict, ctx: Dict) -> str:
+        """
+        (tool, region, project, place, other args) → cache key.
+
+        Chỉ place_name mới được resolve về SubProjectID; query của search_places
+        là từ khóa tự do nên chỉ fold (không dồn các truy vấn khác nhau vào một
+        địa điểm do khớp substring / fuzzy).
+        """
+        region_id = ctx.get("region_id", 0)
+        project_id = ctx.get("project_id", 1)
+        rest = {k: v for k, v in args.items() if k not in ("place_name", "query")}
+        if tool_name == "search_places":
+            place = fold_text(args.get("query") or "")
+            rest["top_k"] = args.get("top_k", 5)
+        else:
+            name = args.get("place_name") or ""
+            match = self.place_index.resolve(name, region_id, project_id) if self.place_index else None
+            place = f"sp{match.subproject_id}" if match else fold_text(name)
+        return await self.cache.key(tool_name, region_id, project_id, place, rest)
+
+    async def _fetchone(self, region_id: int, name: str, params: Dict, ctx: Dict):
+        """(first row or None, "snapshot" | "database")."""
+        statements, source = self.sql_source(region_id)
+        row = await statements.fetchone(source, region_id, name, params, timeout=self._sql_timeout(ctx))
+        return row, statements.source
+
+    async def _fetchall(self, region_id: int, name: str, params: Dict, ctx: Dict):
+        """(rows, "snapshot" | "database")."""
+        statements, source = self.sql_source(region_id)
+        rows = await statements.fetchall(source, region_id, name, params, timeout=self._sql_timeout(ctx))
+        return rows, statements.source
+
+    def sql_source(self, region_id: int):
+        """(StatementRegistry, source): fresh local snapshot, else SQL Server."""
+        if self.snapshot is not None and self.snapshot.is_fresh(region_id):
+            return self.snapshot_statements, self.snapshot
+        return self.statements, self.db
+
+    def _card(self, place_name: str, ctx: Dict) -> Optional[Dict]:
+        """Fresh place card for the place, or None (→ live SQL)."""
+        if self.cards is None or self.place_index is None:
+            return None
+        region_id = ctx.get("region_id", 0)
+        project_id = ctx.get("project_id", 1)
+        match = self.place_index.resolve(place_name, region_id, project_id)
+        if match is None:
+            return None
+        return self.cards.get(region_id, project_id, match.subproject_id)
+
+    def _place_filter(self, place_name: str, ctx: Dict):
+        """
+        Statement variant for a place.
+
+        Returns:
+            ("by_id" | "by_name", params), or (None, None) when the index covers
+            this region/project and knows no such place (no SQL needed). Names
+            that fold to nothing (ko/ja/zh/th scripts) are not indexed → LIKE.
+        """
+        region_id = ctx.get("region_id", 0)
+        project_id = ctx.get("project_id", 1)
+        if self.place_index is not None and fold_text(place_name):
+            match = self.place_index.resolve(place_name, region_id, project_id)
+            if match is not None:
+                return "by_id", {"subproject_id": match.subproject_id}
+            if self.place_index.covers(region_id, project_id):
+                return None, None
+        return "by_name", {"place_name": f"%{place_name}%"}
 
     # =========================================================================
     # TOOL IMPLEMENTATIONS
@@ -70,28 +249,24 @@ class ToolExecutor:
         project_id = ctx.get("project_id", 1)
         place_name = args["place_name"]
         
-        prefix = self.db.DB_MAP[region_id]["prefix"]
-        engine = self.db.get_engine(region_id)
+        card = self._card(place_name, ctx)
+        if card is not None:
+            return card_tool_result("get_place_info", card, args)
         
-        sql = f"""
-        SELECT SubProjectName, Introduction 
-        FROM {prefix}.SubProjects 
-        WHERE SubProjectName LIKE :place_name 
-        AND ProjectID = :project_id
-        """
+        variant, params = self._place_filter(place_name, ctx)
         
-        with engine.connect() as conn:
-            row = conn.execute(
-                text(sql),
-                {"place_name": f"%{place_name}%", "project_id": project_id}
-            ).fetchone()
+        row, source = None, None
+        if variant:
+            row, source = await self._fetchone(
+                region_id, f"place_info.{variant}", {**params, "project_id": project_id}, ctx
+            )
         
         if row:
             return {
                 "found": True,
                 "name": row.SubProjectName,
                 "introduction": row.Introduction or "Không có thông tin",
-                "source": "database"
+                "source": source
             }
         
         # Fallback to vector search if available
@@ -107,28 +282,24 @@ class ToolExecutor:
         project_id = ctx.get("project_id", 1)
         place_name = args["place_name"]
         
-        prefix = self.db.DB_MAP[region_id]["prefix"]
-        engine = self.db.get_engine(region_id)
+        card = self._card(place_name, ctx)
+        if card is not None:
+            return card_tool_result("get_place_location", card, args)
         
-        sql = f"""
-        SELECT SubProjectName, Location 
-        FROM {prefix}.SubProjects 
-        WHERE SubProjectName LIKE :place_name 
-        AND ProjectID = :project_id
-        """
+        variant, params = self._place_filter(place_name, ctx)
         
-        with engine.connect() as conn:
-            row = conn.execute(
-                text(sql),
-                {"place_name": f"%{place_name}%", "project_id": project_id}
-            ).fetchone()
+        row, source = None, None
+        if variant:
+            row, source = await self._fetchone(
+                region_id, f"place_location.{variant}", {**params, "project_id": project_id}, ctx
+            )
         
         if row:
             return {
                 "found": True,
                 "name": row.SubProjectName,
                 "location": row.Location or "Không có thông tin địa chỉ",
-                "source": "database"
+                "source": source
             }
         
         return {"found": False, "message": f"Không tìm thấy vị trí của {place_name}"}
@@ -140,37 +311,23 @@ class ToolExecutor:
         place_name = args["place_name"]
         media_type = args.get("media_type", "video")
         
-        prefix = self.db.DB_MAP[region_id]["prefix"]
-        engine = self.db.get_engine(region_id)
+        card = self._card(place_name, ctx)
+        if card is not None:
+            return card_tool_result("get_place_media", card, args)
         
-        # Build media type filter
-        media_filter = ""
-        if media_type != "all":
-            media_filter = "AND am.MediaType = :media_type"
-        
-        sql = f"""
-        SELECT TOP 5
-            sp.SubProjectName, 
-            a.AttractionName, 
-            am.MediaType, 
-            am.MediaURL 
-        FROM {prefix}.SubProjects sp 
-        JOIN {prefix}.SubProjectAttractions a ON sp.SubProjectID = a.SubProjectID 
-        JOIN {prefix}.SubProjectAttractionMedia am ON a.SubProjectAttractionID = am.SubProjectAttractionID 
-        WHERE sp.SubProjectName LIKE :place_name 
-        AND sp.ProjectID = :project_id
-        {media_filter}
-        """
+        variant, place_params = self._place_filter(place_name, ctx)
+        if variant is None:
+            return {"found": False, "message": f"Không tìm thấy media của {place_name}"}
         
         params = {
-            "place_name": f"%{place_name}%",
+            **place_params,
             "project_id": project_id,
+            "limit": 5,
+            # NULL = every media type
+            "media_type": None if media_type == "all" else media_type,
         }
-        if media_type != "all":
-            params["media_type"] = media_type
         
-        with engine.connect() as conn:
-            rows = conn.execute(text(sql), params).fetchall()
+        rows, source = await self._fetchall(region_id, f"place_media.{variant}", params, ctx)
         
         if rows:
             media_list = [
@@ -186,7 +343,7 @@ class ToolExecutor:
                 "name": rows[0].SubProjectName,
                 "media": media_list,
                 "count": len(media_list),
-                "source": "database"
+                "source": source
             }
         
         return {"found": False, "message": f"Không tìm thấy media của {place_name}"}
@@ -196,28 +353,22 @@ class ToolExecutor:
         region_id = ctx.get("region_id", 0)
         project_id = ctx.get("project_id", 1)
         place_name = args["place_name"]
-        limit = args.get("limit", 5)
+        limit = int(args.get("limit", 5))
         
-        prefix = self.db.DB_MAP[region_id]["prefix"]
-        engine = self.db.get_engine(region_id)
-        
-        sql = f"""
-        SELECT TOP {limit} 
-            sp.SubProjectName, 
-            a.AttractionName, 
-            a.Introduction 
-        FROM {prefix}.SubProjects sp 
-        JOIN {prefix}.SubProjectAttractions a ON sp.SubProjectID = a.SubProjectID 
-        WHERE sp.SubProjectName LIKE :place_name 
-        AND sp.ProjectID = :project_id 
-        ORDER BY a.SortOrder
-        """
+        card = self._card(place_name, ctx)
+        if card is not None:
+            result = card_tool_result("get_attractions", card, args)
+            if result is not None:
+                return result
+            variant = None  # card is complete: no attractions → vector search
+        else:
+            variant, params = self._place_filter(place_name, ctx)
         
-        with engine.connect() as conn:
-            rows = conn.execute(
-                text(sql),
-                {"place_name": f"%{place_name}%", "project_id": project_id}
-            ).fetchall()
+        rows, source = [], None
+        if variant:
+            rows, source = await self._fetchall(
+                region_id, f"attractions.{variant}", {**params, "project_id": project_id, "limit": limit}, ctx
+            )
         
         if rows:
             attractions = [
@@ -232,7 +383,7 @@ class ToolExecutor:
                 "place": rows[0].SubProjectName,
                 "attractions": attractions,
                 "count": len(attractions),
-                "source": "database"
+                "source": source
             }
         
         # Fallback to vector search
@@ -0,0 +1,187 @@
+"""
+StatementRegistry: câu SQL của ToolExecutor, compile sẵn một lần khi khởi động.
+
+- Một `text()` cho mỗi (region prefix, statement) → cùng một câu SQL cho mọi
+  lời gọi, SQL Server tái sử dụng plan, Python không parse lại mỗi request
+- Giá trị thay đổi theo request (SubProjectID, tên, limit, media type) đều là
+  bound parameter: `TOP (:limit)`, `(:media_type IS NULL OR ...)`
+- Mỗi lần chạy ghi `sql.statement.executions{statement,source}` và
+  `sql.statement.ms{statement,source}`; `stats()` trả về tổng hợp theo statement
+- dialect="sqlite": cùng bộ statement cho catalog snapshot local (LIMIT thay TOP)
+- bulk.*: bản set-based (SubProjectID IN :ids) cho API lấy dữ liệu nhiều địa
+  điểm một lần; độ dài list được pad lên vài bucket cố định (pad_ids) để số
+  câu SQL khác nhau vẫn nhỏ
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import bindparam, text
+
+from services.metrics import metrics
+
+# Place condition variants: resolved SubProjectID (primary key) or LIKE fallback
+_PLACE_CONDITIONS = {
+    "by_id": "sp.SubProjectID = :subproject_id",
+    "by_name": "sp.SubProjectName LIKE :place_name",
+}
+
+# {prefix} = schema of the region, {condition} = one of _PLACE_CONDITIONS,
+# {top} / {limit} = row limit in the dialect's syntax
+_TEMPLATES = {
+    "place_info": """
+        SELECT sp.SubProjectName, sp.Introduction
+        FROM {prefix}.SubProjects sp
+        WHERE {condition}
+        AND sp.ProjectID = :project_id
+    """,
+    "place_location": """
+        SELECT sp.SubProjectName, sp.Location
+        FROM {prefix}.SubProjects sp
+        WHERE {condition}
+        AND sp.ProjectID = :project_id
+    """,
+    "place_media": """
+        SELECT {top}
+            sp.SubProjectName,
+            a.AttractionName,
+            am.MediaType,
+            am.MediaURL
+        FROM {prefix}.SubProjects sp
+        JOIN {prefix}.SubProjectAttractions a ON sp.SubProjectID = a.SubProjectID
+        JOIN {prefix}.SubProjectAttractionMedia am ON a.SubProjectAttractionID = am.SubProjectAttractionID
+        WHERE {condition}
+        AND sp.ProjectID = :project_id
+        AND (:media_type IS NULL OR am.MediaType = :media_type)
+        {limit}
+    """,
+    "attractions": """
+        SELECT {top}
+            sp.SubProjectName,
+            a.AttractionName,
+            a.Introduction
+        FROM {prefix}.SubProjects sp
+        JOIN {prefix}.SubProjectAttractions a ON sp.SubProjectID = a.SubProjectID
+        WHERE {condition}
+        AND sp.ProjectID = :project_id
+        ORDER BY a.SortOrder
+        {limit}
+    """,
+}
+
+# Set-based variants keyed by SubProjectID (IN list, expanded per call)
+_BULK_TEMPLATES = {
+    "bulk.places": """
+        SELECT sp.SubProjectID, sp.ProjectID, sp.SubProjectName, sp.Introduction, sp.Location
+        FROM {prefix}.SubProjects sp
+        WHERE sp.SubProjectID IN :ids
+    """,
+    "bulk.attractions": """
+        SELECT a.SubProjectID, a.AttractionName, a.Introduction, a.SortOrder
+        FROM {prefix}.SubProjectAttractions a
+        WHERE a.SubProjectID IN :ids
+        ORDER BY a.SubProjectID, a.SortOrder
+    """,
+    "bulk.media": """
+        SELECT a.SubProjectID, a.AttractionName, am.MediaType, am.MediaURL
+        FROM {prefix}.SubProjectAttractions a
+        JOIN {prefix}.SubProjectAttractionMedia am ON a.SubProjectAttractionID = am.SubProjectAttractionID
+        WHERE a.SubProjectID IN :ids
+        ORDER BY a.SubProjectID, a.SortOrder
+    """,
+}
+
+# IN-list sizes actually sent (SQL Server caps a statement at 2100 parameters)
+ID_BUCKETS = (10, 50, 200, 1000)
+
+
+def pad_ids(ids: List[int]) -> List[int]:
+    """Pad ids (≤ ID_BUCKETS[-1]) lên bucket gần nhất bằng cách lặp id đầu tiên."""
+    size = next(b for b in ID_BUCKETS if b >= len(ids))
+    return list(ids) + [ids[0]] * (size - len(ids))
+
+
+# Row limit syntax: (SELECT {top} ..., ... {limit})
+_DIALECTS = {
+    "mssql": {"top": "TOP (:limit)", "limit": ""},
+    "sqlite": {"top": "", "limit": "LIMIT :limit"},
+}
+
+
+class StatementRegistry:
+    """Precompiled, parameterized ToolExecutor statements for every region."""
+
+    def __init__(self, db_map: Dict[int, Dict[str, Any]], dialect: str = "mssql", source: str = "database"):
+        """
+        Args:
+            db_map: MultiDBManager.DB_MAP (region_id → {"prefix": ...})
+            dialect: "mssql" (SQL Server) hoặc "sqlite" (catalog snapshot)
+            source: Nhãn metrics phân biệt nguồn dữ liệu
+        """
+        self.source = source
+        syntax = _DIALECTS[dialect]
+        self._statements = {
+            (region_id, f"{name}.{variant}"): text(
+                template.format(prefix=cfg["prefix"], condition=condition, **syntax)
+            )
+            for region_id, cfg in db_map.items()
+            for name, template in _TEMPLATES.items()
+            for variant, condition in _PLACE_CONDITIONS.items()
+        }
+        self._statements.update(
+            {
+                (region_id, name): text(template.format(prefix=cfg["prefix"])).bindparams(
+                    bindparam("ids", expanding=True)
+                )
+                for region_id, cfg in db_map.items()
+                for name, template in _BULK_TEMPLATES.items()
+            }
+        )
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, region_id: int, name: str):
+        """Compiled statement, e.g. get(0, "place_info.by_id")."""
+        try:
+            return self._statements[(region_id, name)]
+        except KeyError:
+            raise ValueError(f"Unknown statement {name!r} for region {region_id}") from None
+
+    async def fetchone(self, db, region_id: int, name: str, params: Dict, timeout: float = None):
+        """Chạy statement qua db.fetchone (MultiDBManager / CatalogSnapshot), có đo count / latency."""
+        return await self._timed(name, db.fetchone(region_id, self.get(region_id, name), params, timeout=timeout))
+
+    async def fetchall(self, db, region_id: int, name: str, params: Dict, timeout: float = None):
+        """Chạy statement qua db.fetchall (MultiDBManager / CatalogSnapshot), có đo count / latency."""
+        return await self._timed(name, db.fetchall(region_id, self.get(region_id, name), params, timeout=timeout))
+
+    def stats(self, name: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """{statement: {count, errors, total_ms, avg_ms, max_ms}} (gộp mọi region)."""
+        with self._lock:
+            snapshot = {
+                key: {**s, "avg_ms": round(s["total_ms"] / s["count"], 3) if s["count"] else 0.0}
+                for key, s in self._stats.items()
+                if name is None or key == name
+            }
+        return snapshot
+
+    async def _timed(self, name: str, awaitable):
+        start = time.perf_counter()
+        error = False
+        try:
+            return await awaitable
+        except Exception:
+            error = True
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            metrics.inc("sql.statement.executions", statement=name, source=self.source)
+            metrics.observe("sql.statement.ms", elapsed_ms, statement=name, source=self.source)
+            if error:
+                metrics.inc("sql.statement.errors", statement=name, source=self.source)
+            with self._lock:
+                s = self._stats.setdefault(name, {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+                s["count"] += 1
+                s["errors"] += int(error)
+                s["total_ms"] = round(s["total_ms"] + elapsed_ms, 3)
+                s["max_ms"] = round(max(s["max_ms"], elapsed_ms), 3)